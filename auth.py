@@ -1,6 +1,82 @@
 """This is the module that contains functions related to authenticating to GitHub with a personal access token."""
 
+import datetime
+import threading
+
 import github3
+import requests
+
+# Refresh GitHub App installation tokens this long before they expire
+TOKEN_REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+
+class InstallationTokenBroker(requests.auth.AuthBase):
+    """
+    Authenticate as a GitHub App installation and renew the token before it expires.
+
+    Installation tokens are only valid for an hour. The broker is the
+    authentication of the shared session, so every worker uses the same
+    token and the first request that sees it about to expire renews it once
+    for everyone.
+    """
+
+    def __init__(self, login, token_auth):
+        self._login = login
+        self.token_auth = token_auth
+        self._lock = threading.Lock()
+
+    def expiring(self) -> bool:
+        """Return True when the token expires within TOKEN_REFRESH_MARGIN."""
+        expires_at = getattr(self.token_auth, "expires_at", None)
+        if not isinstance(expires_at, datetime.datetime):
+            return False
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return expires_at - TOKEN_REFRESH_MARGIN <= now
+
+    def renew(self) -> None:
+        """Renew the token unless another worker renewed it while this one waited."""
+        with self._lock:
+            if self.expiring():
+                self.token_auth = self._login().session.auth
+
+    def __call__(self, request):
+        if self.expiring():
+            self.renew()
+        return self.token_auth(request)
+
+
+def login_as_app_installation(
+    gh_app_id: int | None,
+    gh_app_installation_id: int | None,
+    gh_app_private_key_bytes: bytes,
+    ghe: str,
+    gh_app_enterprise_only: bool,
+) -> github3.GitHub:
+    """Create a connection authenticated with a new GitHub App installation token."""
+    if ghe and gh_app_enterprise_only:
+        gh = github3.github.GitHubEnterprise(url=ghe)
+    else:
+        gh = github3.github.GitHub()
+    gh.login_as_app_installation(
+        gh_app_private_key_bytes, str(gh_app_id), gh_app_installation_id
+    )
+    return gh
+
+
+def get_installation_account(
+    gh_app_id: int | None,
+    gh_app_installation_id: int,
+    gh_app_private_key_bytes: bytes,
+    ghe: str,
+    gh_app_enterprise_only: bool,
+) -> str:
+    """Return the login of the organization or user a GitHub App installation belongs to."""
+    if ghe and gh_app_enterprise_only:
+        gh = github3.github.GitHubEnterprise(url=ghe)
+    else:
+        gh = github3.github.GitHub()
+    gh.login_as_app(gh_app_private_key_bytes, str(gh_app_id))
+    return gh.app_installation(gh_app_installation_id).account["login"]
 
 
 def auth_to_github(
@@ -14,6 +90,9 @@ def auth_to_github(
     """
     Connect to GitHub.com or GitHub Enterprise, depending on env variables.
 
+    A GitHub App installation token is renewed automatically before it
+    expires, so runs can last longer than the token.
+
     Args:
         token (str): the GitHub personal access token
         gh_app_id (int | None): the GitHub App ID
@@ -26,14 +105,20 @@ def auth_to_github(
         github3.GitHub: the GitHub connection object
     """
     if gh_app_id and gh_app_private_key_bytes and gh_app_installation_id:
-        if ghe and gh_app_enterprise_only:
-            gh = github3.github.GitHubEnterprise(url=ghe)
-        else:
-            gh = github3.github.GitHub()
-        gh.login_as_app_installation(
-            gh_app_private_key_bytes, str(gh_app_id), gh_app_installation_id
+
+        def login():
+            return login_as_app_installation(
+                gh_app_id,
+                gh_app_installation_id,
+                gh_app_private_key_bytes,
+                ghe,
+                gh_app_enterprise_only,
+            )
+
+        github_connection = login()
+        github_connection.session.auth = InstallationTokenBroker(
+            login, github_connection.session.auth
         )
-        github_connection = gh
     elif ghe and token:
         github_connection = github3.github.GitHubEnterprise(url=ghe, token=token)
     elif token:
@@ -0,0 +1,150 @@
+"""Find the CODEOWNERS files of the branches of a repository with batched GraphQL queries."""
+
+from fnmatch import fnmatchcase
+
+from github_graphql import graphql_query
+from local_checkouts import CODEOWNERS_PATHS
+
+# Branches returned by each page of the refs query, the GraphQL maximum
+BRANCH_PAGE_SIZE = 100
+# Blobs fetched by each query of their contents
+BLOB_BATCH_SIZE = 25
+# Pattern matching every branch with a branch protection rule
+PROTECTED_BRANCHES = "protected"
+
+_CODEOWNERS_FILES = "\n".join(
+    f'path{index}: file(path: "{path}") {{ oid size }}'
+    for index, path in enumerate(CODEOWNERS_PATHS)
+)
+
+BRANCHES_QUERY = f"""
+query($owner: String!, $name: String!, $cursor: String) {{
+  repository(owner: $owner, name: $name) {{
+    refs(refPrefix: "refs/heads/", first: {BRANCH_PAGE_SIZE}, after: $cursor) {{
+      nodes {{
+        name
+        branchProtectionRule {{ id }}
+        target {{
+          ... on Commit {{
+            {_CODEOWNERS_FILES}
+          }}
+        }}
+      }}
+      pageInfo {{ hasNextPage endCursor }}
+    }}
+  }}
+}}
+"""
+
+
+def matches_branch(name: str, patterns, protected: bool) -> bool:
+    """
+    Check whether a branch matches any of the BRANCHES patterns.
+
+    Args:
+        name (str): The name of the branch, ie. release/1.0
+        patterns (list[str]): Shell-style patterns or protected for the protected branches
+        protected (bool): Whether the branch has a branch protection rule
+
+    Returns:
+        bool: whether the branch is scanned
+    """
+    return any(
+        protected if pattern == PROTECTED_BRANCHES else fnmatchcase(name, pattern)
+        for pattern in patterns
+    )
+
+
+def get_branch_codeowners(
+    github_connection, full_name: str, patterns, skip_branch: str
+) -> list[tuple[str, str, str]]:
+    """
+    List the CODEOWNERS file of every branch matching the patterns.
+
+    Each page of the refs query returns up to BRANCH_PAGE_SIZE branches with
+    the blob SHA of every CODEOWNERS location of their head commit, so no
+    request is made per branch. The first location found wins, like on the
+    default branch, and branches without a CODEOWNERS file are left out.
+
+    Args:
+        github_connection: The authenticated github3 connection
+        full_name (str): The repository, ie. org/repo
+        patterns (list[str]): The BRANCHES patterns
+        skip_branch (str): The branch scanned already, ie. the default branch
+
+    Returns:
+        list[tuple[str, str, str]]: the branch, CODEOWNERS path and blob SHA
+    """
+    owner, name = full_name.split("/", 1)
+    branches = []
+    cursor = None
+    while True:
+        data = graphql_query(
+            github_connection,
+            BRANCHES_QUERY,
+            {"owner": owner, "name": name, "cursor": cursor},
+        )
+        refs = (data.get("repository") or {}).get("refs") or {}
+        for node in refs.get("nodes") or []:
+            if node["name"] == skip_branch or not matches_branch(
+                node["name"], patterns, node.get("branchProtectionRule") is not None
+            ):
+                continue
+            target = node.get("target") or {}
+            for index, path in enumerate(CODEOWNERS_PATHS):
+                entry = target.get(f"path{index}")
+                if entry:
+                    # Empty files have no owner to remove
+                    if entry.get("size"):
+                        branches.append((node["name"], path, entry["oid"]))
+                    break
+        page_info = refs.get("pageInfo") or {}
+        if not page_info.get("hasNextPage"):
+            return branches
+        cursor = page_info["endCursor"]
+
+
+def get_blob_contents(github_connection, repo, oids) -> dict[str, bytes]:
+    """
+    Fetch the contents of blobs, BLOB_BATCH_SIZE blobs per GraphQL query.
+
+    Blobs too large for GraphQL to return in full are downloaded with the
+    REST API instead.
+
+    Args:
+        github_connection: The authenticated github3 connection
+        repo: The github3 repository the blobs belong to
+        oids (list[str]): The blob SHAs
+
+    Returns:
+        dict[str, bytes]: the contents of each blob SHA
+    """
+    owner, name = repo.full_name.split("/", 1)
+    contents: dict[str, bytes] = {}
+    oids = list(oids)
+    for start in range(0, len(oids), BLOB_BATCH_SIZE):
+        end = start + BLOB_BATCH_SIZE
+        batch = oids[start:end]
+        declarations = "".join(
+            f", $oid{index}: GitObjectID!" for index in range(len(batch))
+        )
+        fields = "\n".join(
+            f"blob{index}: object(oid: $oid{index}) {{ ... on Blob {{ text isTruncated }} }}"
+            for index in range(len(batch))
+        )
+        query = (
+            f"query($owner: String!, $name: String!{declarations}) {{\n"
+            f"  repository(owner: $owner, name: $name) {{\n{fields}\n  }}\n}}"
+        )
+        variables = {"owner": owner, "name": name}
+        variables.update({f"oid{index}": oid for index, oid in enumerate(batch)})
+        repository = (
+            graphql_query(github_connection, query, variables).get("repository") or {}
+        )
+        for index, oid in enumerate(batch):
+            blob = repository.get(f"blob{index}") or {}
+            if blob.get("text") is None or blob.get("isTruncated"):
+                contents[oid] = repo.blob(oid).decode_content()
+            else:
+                contents[oid] = blob["text"].encode("utf-8")
+    return contents
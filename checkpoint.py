@@ -0,0 +1,155 @@
+"""Save the progress of a run so that an interrupted run can be resumed."""
+
+import hashlib
+import json
+import os
+import signal
+import threading
+import time
+
+from results import RepoResult
+
+CHECKPOINT_VERSION = 1
+# Number of completed repositories between two writes of the checkpoint file
+CHECKPOINT_SAVE_INTERVAL = 25
+
+
+def get_fingerprint(**config) -> str:
+    """Get a digest identifying the configuration a checkpoint belongs to."""
+    encoded = json.dumps(config, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class Checkpoint:
+    """
+    Record the completed repositories, their outcomes and the listing cursors.
+
+    The checkpoint is tied to a fingerprint of the configuration so that a
+    checkpoint written for one set of organizations or shards is never used
+    to resume a different run.
+    """
+
+    def __init__(self, path: str, fingerprint: str):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.completed: dict[str, dict | None] = {}
+        self.cursors: dict[str, str] = {}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str) -> "Checkpoint":
+        """Load the checkpoint file or start a new checkpoint if there is none to resume."""
+        checkpoint = cls(path, fingerprint)
+        if not os.path.exists(path):
+            return checkpoint
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if (
+            data.get("version") != CHECKPOINT_VERSION
+            or data.get("fingerprint") != fingerprint
+        ):
+            print(
+                f"Ignoring checkpoint {path} as it was written for another configuration"
+            )
+            return checkpoint
+        checkpoint.completed = data["completed"]
+        checkpoint.cursors = data["cursors"]
+        print(
+            f"Resuming from checkpoint {path} with {len(checkpoint.completed)} repositories already processed"
+        )
+        return checkpoint
+
+    def is_completed(self, full_name: str) -> bool:
+        """Check whether a repository was already processed by a previous run."""
+        with self._lock:
+            return full_name in self.completed
+
+    def get_cursor(self, scope: str) -> str | None:
+        """Get the listing page the scan of a scope should resume from."""
+        with self._lock:
+            return self.cursors.get(scope)
+
+    def set_cursor(self, scope: str, cursor: str | None) -> None:
+        """Record the listing page that holds the next repository of a scope."""
+        if cursor:
+            with self._lock:
+                self.cursors[scope] = cursor
+
+    def record(self, full_name: str, result: RepoResult | None) -> None:
+        """Mark a repository as processed and save the checkpoint periodically."""
+        with self._lock:
+            self.completed[full_name] = result.to_dict() if result else None
+            self._unsaved += 1
+            save = self._unsaved >= CHECKPOINT_SAVE_INTERVAL
+        if save:
+            self.save()
+
+    def restore(self, results) -> None:
+        """Add the outcomes recorded by previous runs to the results of this run."""
+        with self._lock:
+            records = [record for record in self.completed.values() if record]
+        for record in records:
+            results.add(RepoResult.from_dict(record))
+
+    def save(self) -> None:
+        """Atomically write the checkpoint file."""
+        with self._lock:
+            data = {
+                "version": CHECKPOINT_VERSION,
+                "fingerprint": self.fingerprint,
+                "completed": self.completed,
+                "cursors": self.cursors,
+            }
+            self._unsaved = 0
+            temporary_path = f"{self.path}.tmp"
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(temporary_path, self.path)
+
+    def clear(self) -> None:
+        """Remove the checkpoint file once every repository has been processed."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class RunDeadline:
+    """
+    Track the wall-clock budget of a run and cancellation signals.
+
+    The deadline expires a little before the budget runs out, leaving time
+    to save the checkpoint and write the reports.
+    """
+
+    def __init__(self, max_runtime_seconds: float | None):
+        self.started = time.monotonic()
+        self.max_runtime_seconds = max_runtime_seconds
+        # Keep 10% of the budget, at most a minute, to wrap up the run
+        self.reserve_seconds = (
+            min(60.0, max_runtime_seconds * 0.1) if max_runtime_seconds else 0.0
+        )
+        self._cancelled = threading.Event()
+
+    def install_signal_handlers(self) -> None:
+        """Treat SIGINT and SIGTERM as a request to stop cleanly."""
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self._handle_signal)
+
+    def _handle_signal(self, signum, _frame):
+        print(f"Received signal {signum}, stopping after the current repositories")
+        self._cancelled.set()
+
+    def cancel(self) -> None:
+        """Request the run to stop."""
+        self._cancelled.set()
+
+    def stop_reason(self) -> str | None:
+        """Return why the run should stop or None if it can continue."""
+        if self._cancelled.is_set():
+            return "the run was cancelled"
+        if self.max_runtime_seconds is None:
+            return None
+        elapsed = time.monotonic() - self.started
+        if elapsed >= self.max_runtime_seconds - self.reserve_seconds:
+            return "MAX_RUNTIME was reached"
+        return None
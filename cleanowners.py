@@ -1,283 +1,822 @@
 """A GitHub Action to suggest removal of non-organization members from CODEOWNERS files."""
 
-import re
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 
 import auth
 import env
 import github3
+import requests
+from branches import get_blob_contents, get_branch_codeowners
+from checkpoint import Checkpoint, RunDeadline, get_fingerprint
+from collaborators import get_removal_reason, get_writers
+from events import discover_repositories, read_event
+from github_graphql import graphql_query
+from history import RunHistory
+from local_checkouts import get_local_repositories
+from lru import LruCache
 from markdown_writer import write_step_summary, write_to_markdown
+from membership import MembershipCache
+from membership_snapshot import load_snapshots
+from metrics import RunMetrics
+from owners import (
+    OWNER_TEAM,
+    OWNER_USER,
+    classify_owner,
+    count_owner_categories,
+    get_owner_entries,
+    get_owner_tokens,
+    remove_owners_from_content,
+)
+from ownership import find_unowned_rules
+from prefetch import RepositoryPrefetcher
+from preflight import estimate_run, report_preflight
+from priority import prioritize
+from rate_limit import RateLimitBudget
+from results import RepoResult, ScanResults
+from results_stream import ResultsStream
+from shards import get_partial_results_path, in_shard, write_partial_results
+from token_pool import build_token_pool
+
+# Distinct CODEOWNERS blobs whose parsed owners and edited contents are kept
+PARSED_CODEOWNERS_CACHE_SIZE = 4096
+EDITED_CODEOWNERS_CACHE_SIZE = 256
+
+
+@dataclass
+class ParsedCodeowners:
+    """The owners extracted from a CODEOWNERS file"""
+
+    usernames: list[str]
+    owner_counts: dict[str, int]
+
+
+@dataclass
+class ScanContext:  # pylint: disable=too-many-instance-attributes
+    """Settings and shared state used by every worker of a run."""
+
+    github_connection: object
+    membership: MembershipCache
+    results: ScanResults
+    budget: RateLimitBudget | None
+    exempt_repositories_list: list[str]
+    dry_run: bool
+    pull_request: dict[str, str]
+    shard_index: int = 0
+    shard_count: int = 1
+    checkpoint: Checkpoint | None = None
+    deadline: RunDeadline | None = None
+    stream: ResultsStream | None = None
+    history: RunHistory | None = None
+    local_checkouts: str = ""
+    patch_dir: str = ""
+    priority: str = ""
+    # Lowercase logins of the users an event removed, the only ones checked
+    target_usernames: set[str] | None = None
+    metrics: RunMetrics | None = None
+    # Patterns of the branches scanned in addition to the default branch
+    branches: list[str] = field(default_factory=list)
+    # Whether owners without write access to the repository are removed too
+    check_write_access: bool = False
+    # keep, flag or remove the owners who are outside collaborators, empty to not look them up
+    outside_collaborators: str = ""
+    # Whether the files left without owners by the proposed changes are reported
+    unowned_paths: bool = False
+    # Parsed CODEOWNERS of the recent blob SHAs, so identical files are parsed once
+    parsed_codeowners: LruCache = field(
+        default_factory=lambda: LruCache(PARSED_CODEOWNERS_CACHE_SIZE)
+    )
+    # New contents and whether every username is gone, by blob SHA and removed users
+    edited_codeowners: LruCache = field(
+        default_factory=lambda: LruCache(EDITED_CODEOWNERS_CACHE_SIZE)
+    )
+
+
+def main():  # pragma: no cover
+    """Run the main program"""
+
+    # Get the environment variables
+    env_vars = env.get_env_vars()
+    organization_list = env_vars.organization_list
+    repository_list = env_vars.repository_list
+    dry_run = env_vars.dry_run
+    metrics = RunMetrics()
+
+    target_usernames = None
+    departed_logins = list(env_vars.departed_user_list)
+    if env_vars.event_path:
+        event_organization, event_logins = read_event(env_vars.event_path)
+        if not event_logins and not departed_logins:
+            print(f"No departed users in the event payload {env_vars.event_path}")
+            return
+        departed_logins += [
+            login
+            for login in event_logins
+            if login.lower() not in {known.lower() for known in departed_logins}
+        ]
+        if not organization_list and not repository_list and not env_vars.enterprise:
+            if not event_organization:
+                raise ValueError(
+                    f"The event payload {env_vars.event_path} does not name an organization, "
+                    "please set ORGANIZATION"
+                )
+            organization_list = [event_organization]
+    if departed_logins:
+        target_usernames = {login.lower() for login in departed_logins}
+        print(f"Removing the departed users {', '.join(departed_logins)}")
+
+    deadline = RunDeadline(env_vars.max_runtime * 60 if env_vars.max_runtime else None)
+    deadline.install_signal_handlers()
+    checkpoint = None
+    if env_vars.checkpoint_file:
+        # Each event is a different run, its departed users are part of the fingerprint
+        scope = {"event": sorted(target_usernames)} if target_usernames else {}
+        if env_vars.dry_run:
+            # Outcomes of a dry run opened no pull request, a real run redoes them
+            scope["dry_run"] = True
+        if env_vars.local_checkouts:
+            scope["local_checkouts"] = env_vars.local_checkouts
+            scope["patch_dir"] = env_vars.patch_dir
+        if env_vars.check_write_access:
+            # Outcomes recorded without the write access check cannot be reused
+            scope["check_write_access"] = True
+        if env_vars.outside_collaborators:
+            scope["outside_collaborators"] = env_vars.outside_collaborators
+        if env_vars.branch_list:
+            scope["branches"] = env_vars.branch_list
+        if env_vars.unowned_paths:
+            scope["unowned_paths"] = True
+        checkpoint = Checkpoint.load(
+            env_vars.checkpoint_file,
+            get_fingerprint(
+                organizations=organization_list,
+                enterprise=env_vars.enterprise,
+                repositories=repository_list,
+                shard=[env_vars.shard_index, env_vars.shard_count],
+                **scope,
+            ),
+        )
 
+    snapshots = load_snapshots(env_vars.membership_snapshot_list)
+    github_connection = None
+    budget = None
+    if env_vars.local_checkouts:
+        # Local checkouts are scanned without any API call, pull requests
+        # are replaced by patch files
+        dry_run = dry_run or not env_vars.patch_dir
+        owners = organization_list or [
+            repository.split("/")[0] for repository in repository_list
+        ]
+        for owner in owners:
+            if owner.lower() not in snapshots:
+                raise ValueError(
+                    f"MEMBERSHIP_SNAPSHOT does not include a snapshot of {owner}"
+                )
+    else:
+        # Auth to GitHub.com or GHE
+        github_connection = auth.auth_to_github(
+            env_vars.token,
+            env_vars.gh_app_id,
+            env_vars.gh_app_installation_id,
+            env_vars.gh_app_private_key_bytes,
+            env_vars.ghe,
+            env_vars.gh_app_enterprise_only,
+        )
+        configure_connection_pool(github_connection, env_vars.max_workers)
+        token_list, gh_app_installation_id_list = env.get_credential_pool_env_vars()
+        if len(token_list) + len(gh_app_installation_id_list) > 1:
+            budget = build_token_pool(
+                token_list,
+                env_vars.gh_app_id,
+                gh_app_installation_id_list,
+                env_vars.gh_app_private_key_bytes,
+                env_vars.ghe,
+                env_vars.gh_app_enterprise_only,
+            )
+        else:
+            budget = RateLimitBudget()
+        budget.attach(github_connection.session)
+        if env_vars.metrics_file:
+            metrics.attach(github_connection.session)
+
+        if env_vars.enterprise:
+            for organization in get_enterprise_organizations(
+                github_connection, env_vars.enterprise
+            ):
+                if organization not in organization_list:
+                    organization_list.append(organization)
+
+    membership = MembershipCache(github_connection, snapshots, metrics)
+    if organization_list and not repository_list and not env_vars.local_checkouts:
+        for organization in organization_list:
+            if not membership.get_org(organization):
+                raise ValueError(
+                    f"""Organization {organization} is not an organization and
+                REPOSITORY environment variable was not set.
+                Please set valid ORGANIZATION or set REPOSITORY environment
+                variable
+                """
+                )
 
-def get_org(github_connection, organization):
-    """Get the organization object"""
+    if env_vars.preflight:
+        if env_vars.local_checkouts:
+            print("Preflight: scanning LOCAL_CHECKOUTS makes no API calls")
+            return
+        preflight_history = (
+            RunHistory(env_vars.history_db) if env_vars.history_db else None
+        )
+        try:
+            estimate = estimate_run(
+                github_connection,
+                organization_list,
+                repository_list,
+                budget,
+                exempt_count=len(env_vars.exempt_repositories_list),
+                shard_count=env_vars.shard_count,
+                dry_run=dry_run,
+                snapshot_organizations=snapshots,
+                history=preflight_history,
+                check_write_access=env_vars.check_write_access,
+                branches=bool(env_vars.branch_list),
+                unowned_paths=env_vars.unowned_paths,
+            )
+        finally:
+            if preflight_history:
+                preflight_history.close()
+        if not report_preflight(estimate):
+            raise SystemExit(1)
+        return
+
+    context = ScanContext(
+        github_connection=github_connection,
+        membership=membership,
+        results=ScanResults(),
+        budget=budget,
+        exempt_repositories_list=env_vars.exempt_repositories_list,
+        dry_run=dry_run,
+        pull_request={
+            "title": env_vars.title,
+            "body": env_vars.body,
+            "commit_message": env_vars.commit_message,
+        },
+        shard_index=env_vars.shard_index,
+        shard_count=env_vars.shard_count,
+        checkpoint=checkpoint,
+        deadline=deadline,
+        local_checkouts=env_vars.local_checkouts,
+        patch_dir=env_vars.patch_dir,
+        priority=env_vars.priority,
+        target_usernames=target_usernames,
+        metrics=metrics,
+        check_write_access=env_vars.check_write_access,
+        outside_collaborators=env_vars.outside_collaborators,
+        branches=env_vars.branch_list,
+        unowned_paths=env_vars.unowned_paths,
+    )
+    results = context.results
+    if checkpoint:
+        checkpoint.restore(results)
+    if env_vars.results_file:
+        # Keep appending to the stream of the run being resumed
+        context.stream = ResultsStream(
+            env_vars.results_file, append=bool(checkpoint and checkpoint.completed)
+        )
+    if env_vars.history_db:
+        run_scope = ",".join(organization_list + repository_list) or env_vars.enterprise
+        if env_vars.shard_count > 1:
+            # Each shard defers and resumes its own slice of the repositories
+            run_scope += f" shard {env_vars.shard_index} of {env_vars.shard_count}"
+        if target_usernames:
+            run_scope += f" departed {','.join(sorted(target_usernames))}"
+        context.history = RunHistory(env_vars.history_db)
+        context.history.start_run(
+            run_scope,
+            dry_run,
+            full_scan=env_vars.shard_count == 1
+            and not repository_list
+            and not target_usernames,
+        )
+    if target_usernames and not repository_list and not env_vars.local_checkouts:
+        # Only scan the repositories that mention the departed users
+        with metrics.phase("discovery"):
+            candidates = discover_repositories(
+                context.history, github_connection, departed_logins, organization_list
+            )
+        if candidates is not None:
+            repository_list = candidates
+            if not candidates:
+                organization_list = []
     try:
-        return github_connection.organization(organization)
-    except github3.exceptions.NotFoundError:
-        print(f"Organization {organization} not found")
-        return None
+        with metrics.phase("scan"):
+            scan_organizations(
+                organization_list, repository_list, context, env_vars.max_workers
+            )
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        results.add_error(str(e))
+    finally:
+        for error in membership.errors:
+            results.add_error(error)
+        if context.stream:
+            context.stream.close()
+        if context.history:
+            context.history.finish_run(results.stop_reason, results.errors)
+            context.history.close()
+
+    if checkpoint:
+        if results.stop_reason or results.errors:
+            checkpoint.save()
+            print(f"Saved checkpoint {env_vars.checkpoint_file} to resume the next run")
+        else:
+            checkpoint.clear()
+
+    if env_vars.shard_count > 1:
+        write_partial_results(
+            get_partial_results_path(env_vars.shard_index, env_vars.shard_count),
+            results,
+            env_vars.shard_index,
+            env_vars.shard_count,
+        )
 
+    with metrics.phase("report"):
+        error_message = report_results(
+            results,
+            env_vars.issue_report,
+            env_vars.enable_github_actions_step_summary,
+            full_results_location=env_vars.results_file
+            or ("report.md" if env_vars.issue_report else None),
+        )
+    if env_vars.metrics_file:
+        metrics.write(env_vars.metrics_file, results, budget)
+        print(f"Wrote the metrics of the run to {env_vars.metrics_file}")
+    if error_message:
+        raise SystemExit(1)
 
-def remove_username_from_content(content, username, changed_lines):
-    """Remove a @username from CODEOWNERS content using line-scoped regex.
 
-    Args:
-        content: The current CODEOWNERS file content as bytes.
-        username: The GitHub username to remove (without @).
-        changed_lines: A set[int] tracking which line indices were modified.
+def report_results(
+    results,
+    issue_report,
+    enable_github_actions_step_summary,
+    full_results_location=None,
+):
+    """Print the statistics and write the reports of a run and return the error message, if any"""
+    error_message = "\n".join(results.errors) if results.errors else None
+    if error_message:
+        print(f"Error: {error_message}")
+    if results.stop_reason:
+        print(f"Stopped before every repository was processed: {results.stop_reason}")
+
+    # Report the statistics from this run
+    print_stats(**results.counts)
+    print_owner_counts(results.owner_counts)
+
+    write_step_summary(
+        **results.counts,
+        owner_counts=results.owner_counts,
+        repo_and_users_to_remove=results.repo_and_users_to_remove,
+        repo_and_outside_collaborators=results.repo_and_outside_collaborators,
+        repo_and_unowned_rules=results.repo_and_unowned_rules,
+        repos_missing_codeowners=results.repos_missing_codeowners,
+        error=error_message,
+        pull_request_urls=results.pull_request_urls,
+        enable_github_actions_step_summary=enable_github_actions_step_summary,
+        stop_reason=results.stop_reason,
+        full_results_location=full_results_location,
+    )
 
-    Returns:
-        The updated content with the username removed.
+    if issue_report:
+        write_to_markdown(
+            results.counts["users_count"],
+            results.counts["pull_count"],
+            results.counts["no_codeowners_count"],
+            results.counts["codeowners_count"],
+            results.repo_and_users_to_remove,
+            results.repos_missing_codeowners,
+            stop_reason=results.stop_reason,
+            owner_counts=results.owner_counts,
+            repo_and_outside_collaborators=results.repo_and_outside_collaborators,
+            repo_and_unowned_rules=results.repo_and_unowned_rules,
+        )
+    return error_message
+
+
+def configure_connection_pool(github_connection, max_workers):
+    """Size the connection pool of the shared session for concurrent workers."""
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=max_workers, pool_maxsize=max_workers * 2
+    )
+    github_connection.session.mount("https://", adapter)
+    github_connection.session.mount("http://", adapter)
+
+
+def get_enterprise_organizations(github_connection, enterprise):
+    """Get the logins of every organization that belongs to an enterprise"""
+    query = """
+    query($slug: String!, $cursor: String) {
+      enterprise(slug: $slug) {
+        organizations(first: 100, after: $cursor) {
+          nodes { login }
+          pageInfo { hasNextPage endCursor }
+        }
+      }
+    }
     """
-    pattern = re.escape(f"@{username}".encode("ASCII"))
-    lines = content.split(b"\n")
-    for i, line in enumerate(lines):
-        new_line = re.sub(pattern + rb"(?=\s|$)", b"", line)
-        if new_line != line:
-            lines[i] = new_line
-            changed_lines.add(i)
-    return b"\n".join(lines)
+    organizations = []
+    cursor = None
+    while True:
+        data = graphql_query(
+            github_connection, query, {"slug": enterprise, "cursor": cursor}
+        )
+        if not data.get("enterprise"):
+            raise ValueError(f"Enterprise {enterprise} not found")
+        page = data["enterprise"]["organizations"]
+        organizations.extend(node["login"] for node in page["nodes"])
+        if not page["pageInfo"]["hasNextPage"]:
+            return organizations
+        cursor = page["pageInfo"]["endCursor"]
 
 
-def cleanup_whitespace(content, changed_lines):
-    """Normalize whitespace only on lines where usernames were removed.
+def scan_organizations(organization_list, repository_list, context, max_workers):
+    """
+    Scan every organization concurrently, or the list of repositories.
+
+    All workers share the connection, membership cache, rate limit budget and
+    results of the context. An error in one organization is recorded without
+    interrupting the scan of the others.
+    """
+    if repository_list or not organization_list:
+        if repository_list:
+            # Only fetch the repositories of this shard, one request each
+            repository_list = [
+                name
+                for name in repository_list
+                if in_shard(name, context.shard_index, context.shard_count)
+            ]
+            if not repository_list:
+                return
+        organization = organization_list[0] if len(organization_list) == 1 else None
+        repos = get_repos_iterator(
+            organization,
+            repository_list,
+            context.github_connection,
+            context.local_checkouts,
+        )
+        if context.priority:
+            repos = prioritize(repos, context.priority, context.history)
+        scan_repositories(repos, organization, context)
+        return
+
+    def scan_organization(organization):
+        repos = get_repos_iterator(
+            organization, [], context.github_connection, context.local_checkouts
+        )
+        if context.priority:
+            # Ordering needs the whole listing, completed repositories are
+            # skipped by the checkpoint
+            repos = prioritize(repos, context.priority, context.history)
+        elif context.checkpoint and context.checkpoint.get_cursor(organization):
+            # Resume the listing from the page of the first unprocessed repository
+            repos.url = context.checkpoint.get_cursor(organization)
+        if isinstance(repos, list):
+            scan_repositories(repos, organization, context)
+            return
+        # List the next pages while the repositories of the current one are processed
+        with RepositoryPrefetcher(repos) as prefetched:
+            scan_repositories(prefetched, organization, context)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(scan_organization, organization): organization
+            for organization in organization_list
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                context.results.add_error(f"{futures[future]}: {e}")
+
+
+def get_stop_reason(context):
+    """Return why the scan should stop before the next repository or None to continue"""
+    if context.deadline:
+        stop_reason = context.deadline.stop_reason()
+        if stop_reason:
+            return stop_reason
+    if context.budget and context.budget.exhausted():
+        return "rate limit budget exhausted"
+    if context.branches and context.budget and context.budget.exhausted("graphql"):
+        # The branches are listed and read with GraphQL queries
+        return "GraphQL rate limit budget exhausted"
+    return None
+
+
+def scan_repositories(repos, organization, context):
+    """Process each repository and add the outcome to the results of the context"""
+    checkpoint = context.checkpoint
+    for index, repo in enumerate(repos):
+        # Leave the repositories of other shards to the runners that own them
+        if not in_shard(repo.full_name, context.shard_index, context.shard_count):
+            continue
+        if checkpoint and checkpoint.is_completed(repo.full_name):
+            continue
+        stop_reason = get_stop_reason(context)
+        if stop_reason:
+            print(
+                f"Stopping the scan of {organization or 'the repository list'}: {stop_reason}"
+            )
+            context.results.stop(stop_reason)
+            if context.history and isinstance(repos, list):
+                record_deferred(repos[index:], context)
+            return
+        if checkpoint:
+            checkpoint.set_cursor(
+                organization or "repositories", getattr(repos, "last_url", None)
+            )
+        started = time.monotonic()
+        result = process_repo(repo, organization, context)
+        if result:
+            result.duration = time.monotonic() - started
+            if context.metrics:
+                context.metrics.record_repository(result.duration)
+            context.results.add(result)
+            if context.stream:
+                context.stream.write(result)
+            if context.history:
+                context.history.record(result)
+        if checkpoint:
+            checkpoint.record(repo.full_name, result)
+        if isinstance(repos, list):
+            # Only the compact result is kept, release the repository object
+            repos[index] = None
+
+
+def record_deferred(repos, context):
+    """Record the repositories of this shard left unprocessed for the next run"""
+    deferred = [
+        repo.full_name
+        for repo in repos
+        if in_shard(repo.full_name, context.shard_index, context.shard_count)
+        and not (context.checkpoint and context.checkpoint.is_completed(repo.full_name))
+    ]
+    context.history.record_deferred(deferred)
+    print(f"Deferred {len(deferred)} repositories to the next run")
+
+
+def process_repo(repo, organization, context):
+    """
+    Check the CODEOWNERS file of a repository and open a pull request if needed.
 
     Args:
-        content: The CODEOWNERS file content as bytes.
-        changed_lines: A set[int] of line indices to clean up.
+        repo: The github3 repository to process
+        organization: The organization to check membership against or None to use the repository owner
+        context: The ScanContext of the run
 
     Returns:
-        The content with extra whitespace removed on affected lines.
+        RepoResult | None: the outcome or None if the repository was skipped
     """
-    lines = content.split(b"\n")
-    for i in changed_lines:
-        lines[i] = re.sub(rb"[ \t]{2,}", b" ", lines[i])
-        lines[i] = re.sub(rb"[ \t]+(?=\r?$)", b"", lines[i])
-    return b"\n".join(lines)
-
+    # Check if the repository is in the exempt_repositories_list
+    if repo.full_name in context.exempt_repositories_list:
+        print(f"Skipping {repo.full_name} as it is in the exempt_repositories_list")
+        return None
 
-def main():  # pragma: no cover
-    """Run the main program"""
+    # Check to see if repository is archived
+    if repo.archived:
+        print(f"Skipping {repo.full_name} as it is archived")
+        return None
 
-    # Get the environment variables
-    (
-        organization,
-        repository_list,
-        gh_app_id,
-        gh_app_installation_id,
-        gh_app_private_key_bytes,
-        gh_app_enterprise_only,
-        token,
-        ghe,
-        exempt_repositories_list,
-        dry_run,
-        title,
-        body,
-        commit_message,
-        issue_report,
-        enable_github_actions_step_summary,
-    ) = env.get_env_vars()
-
-    # Auth to GitHub.com or GHE
-    github_connection = auth.auth_to_github(
-        token,
-        gh_app_id,
-        gh_app_installation_id,
-        gh_app_private_key_bytes,
-        ghe,
-        gh_app_enterprise_only,
+    org = organization if organization else repo.owner.login
+    result = process_default_branch(repo, org, context)
+    if context.branches:
+        try:
+            process_branches(repo, org, context, result)
+        except ValueError as e:
+            # A failed refs or blob query keeps the result of the default branch
+            print(f"\tFailed to scan the branches of {repo.full_name}: {e}")
+            context.results.add_error(f"{repo.full_name} branches: {e}")
+    return result
+
+
+def process_default_branch(repo, org, context):
+    """Check the CODEOWNERS file of the default branch and return the RepoResult"""
+    # Check to see if repository has a CODEOWNERS file
+    codeowners_file_contents, codeowners_filepath = get_codeowners_file(repo)
+    has_codeowners = codeowners_file_contents is not None
+    codeowners_size = (
+        getattr(codeowners_file_contents, "size", None) if has_codeowners else None
     )
+    is_empty_codeowners = has_codeowners and codeowners_size == 0
 
-    pull_count = 0
-    eligble_for_pr_count = 0
-    no_codeowners_count = 0
-    codeowners_count = 0
-    users_count = 0
+    if not has_codeowners or is_empty_codeowners:
+        result = RepoResult(
+            repo.full_name,
+            "empty" if has_codeowners else "missing",
+            codeowners_filepath,
+        )
+        if not has_codeowners:
+            print(f"{repo.full_name} does not have a CODEOWNERS file")
+        else:
+            print(f"{repo.full_name} has an empty CODEOWNERS file")
+
+        # Events only remove departed users, they do not add CODEOWNERS files
+        if context.dry_run or context.target_usernames is not None:
+            return result
+
+        suggested_codeowners = build_default_codeowners(repo)
+        result.eligible_for_pr = True
+        result.pull_request_url = open_pull_request(
+            repo,
+            suggested_codeowners,
+            codeowners_filepath or ".github/CODEOWNERS",
+            context,
+            create_new=not has_codeowners,
+        )
+        return result
 
-    if organization and not repository_list:
-        gh_org = get_org(github_connection, organization)
-        if not gh_org:
-            raise ValueError(f"""Organization {organization} is not an organization and
-            REPOSITORY environment variable was not set.
-            Please set valid ORGANIZATION or set REPOSITORY environment
-            variable
-            """)
-
-    # Get the repositories from the organization or list of repositories
-    repos = get_repos_iterator(organization, repository_list, github_connection)
-
-    repo_and_users_to_remove = {}
-    repos_missing_codeowners = []
-    pull_request_urls = []
-    error_message = None
-    try:
-        for repo in repos:
-            # Check if the repository is in the exempt_repositories_list
-            if repo.full_name in exempt_repositories_list:
-                print(
-                    f"Skipping {repo.full_name} as it is in the exempt_repositories_list"
-                )
-                continue
-
-            # Check to see if repository is archived
-            if repo.archived:
-                print(f"Skipping {repo.full_name} as it is archived")
-                continue
-
-            # Check to see if repository has a CODEOWNERS file
-            file_changed = False
-            codeowners_file_contents, codeowners_filepath = get_codeowners_file(repo)
-            has_codeowners = codeowners_file_contents is not None
-            codeowners_size = (
-                getattr(codeowners_file_contents, "size", None)
-                if has_codeowners
-                else None
-            )
-            is_empty_codeowners = has_codeowners and codeowners_size == 0
-
-            if not has_codeowners or is_empty_codeowners:
-                repo_name = repo.full_name
-                no_codeowners_count += 1
-                repos_missing_codeowners.append(repo_name)
-
-                if not has_codeowners:
-                    print(f"{repo_name} does not have a CODEOWNERS file")
-                else:
-                    print(f"{repo_name} has an empty CODEOWNERS file")
-
-                if dry_run:
-                    continue
-
-                suggested_codeowners = build_default_codeowners(repo)
-                target_path = codeowners_filepath or ".github/CODEOWNERS"
-                eligble_for_pr_count += 1
-                try:
-                    pull = commit_changes(
-                        title,
-                        body,
-                        repo,
-                        suggested_codeowners,
-                        commit_message,
-                        target_path,
-                        create_new=not has_codeowners,
-                    )
-                    pull_count += 1
-                    pull_request_urls.append(pull.html_url)
-                    print(f"\tCreated pull request {pull.html_url}")
-                except github3.exceptions.NotFoundError:
-                    print("\tFailed to create pull request. Check write permissions.")
-                continue
-
-            codeowners_count += 1
-
-            if codeowners_file_contents.content is None:
-                # This is a large file so we need to get the sha and download based off the sha
-                codeowners_decoded = repo.blob(
-                    repo.file_contents(codeowners_filepath).sha
-                ).decode_content()
-            else:
-                codeowners_decoded = codeowners_file_contents.decoded
-
-            # Extract the usernames from the CODEOWNERS file
-            usernames = get_usernames_from_codeowners(codeowners_decoded)
-
-            usernames_to_remove = []
-            codeowners_file_contents_new = codeowners_decoded
-            changed_lines: set[int] = set()
-            for username in usernames:
-                org = organization if organization else repo.owner.login
-                gh_org = get_org(github_connection, org)
-                if not gh_org:
-                    print(f"Owner {org} of repo {repo} is not an organization.")
-                    break
-
-                # Check to see if the username is a member of the organization
-                if not gh_org.is_member(username):
-                    print(
-                        f"\t{username} is not a member of {org}. Suggest removing them from {repo.full_name}"
-                    )
-                    users_count += 1
-                    usernames_to_remove.append(username)
-                    if not dry_run:
-                        # Remove that username from the codeowners_file_contents
-                        file_changed = True
-                        codeowners_file_contents_new = remove_username_from_content(
-                            codeowners_file_contents_new, username, changed_lines
-                        )
-
-            # Store the repo and users to remove for reporting later
-            if usernames_to_remove:
-                repo_and_users_to_remove[repo] = usernames_to_remove
-
-            # Clean up extra whitespace only on lines where usernames were removed
-            if file_changed:
-                codeowners_file_contents_new = cleanup_whitespace(
-                    codeowners_file_contents_new, changed_lines
-                )
+    result = RepoResult(
+        repo.full_name,
+        "present",
+        codeowners_filepath,
+        codeowners_sha=getattr(codeowners_file_contents, "sha", None),
+    )
 
-            # Update the CODEOWNERS file if usernames were removed
-            if file_changed:
-                eligble_for_pr_count += 1
-                new_usernames = get_usernames_from_codeowners(
-                    codeowners_file_contents_new
-                )
-                if len(new_usernames) == 0:
-                    print(
-                        f"\twarning: All usernames removed from CODEOWNERS in {repo.full_name}."
-                    )
-                try:
-                    pull = commit_changes(
-                        title,
-                        body,
-                        repo,
-                        codeowners_file_contents_new,
-                        commit_message,
-                        codeowners_filepath,
-                    )
-                    pull_count += 1
-                    pull_request_urls.append(pull.html_url)
-                    print(f"\tCreated pull request {pull.html_url}")
-                except github3.exceptions.NotFoundError:
-                    print("\tFailed to create pull request. Check write permissions.")
-                    continue
-    except Exception as e:  # pylint: disable=broad-exception-caught
-        error_message = str(e)
-        print(f"Error: {error_message}")
-    finally:
-        # Report the statistics from this run
-        print_stats(
-            pull_count=pull_count,
-            eligble_for_pr_count=eligble_for_pr_count,
-            no_codeowners_count=no_codeowners_count,
-            codeowners_count=codeowners_count,
-            users_count=users_count,
+    if codeowners_file_contents.content is None:
+        # This is a large file so we need to get the sha and download based off the sha
+        codeowners_decoded = repo.blob(
+            repo.file_contents(codeowners_filepath).sha
+        ).decode_content()
+    else:
+        codeowners_decoded = codeowners_file_contents.decoded
+
+    parsed = parse_codeowners(codeowners_decoded, result.codeowners_sha, context)
+    if context.history:
+        # Only the owner index of the history needs the line of each owner
+        result.owner_entries = get_owner_entries(codeowners_decoded)
+    result.owner_counts = dict(parsed.owner_counts)
+    result.usernames = list(parsed.usernames)
+
+    writers = None
+    if context.check_write_access and parsed.usernames:
+        # One listing of the collaborators answers the check of every owner
+        writers = get_writers(repo, context.results)
+    codeowners_file_contents_new = remove_owners(
+        repo, codeowners_decoded, parsed.usernames, org, writers, context, result
+    )
+    if codeowners_file_contents_new is not None and context.unowned_paths:
+        result.unowned_rules = find_unowned_rules(
+            repo, codeowners_decoded, codeowners_file_contents_new
+        )
+    # Update the CODEOWNERS file if usernames were removed
+    if codeowners_file_contents_new is not None and not context.dry_run:
+        result.eligible_for_pr = True
+        result.pull_request_url = open_pull_request(
+            repo, codeowners_file_contents_new, codeowners_filepath, context
+        )
+    return result
+
+
+def parse_codeowners(codeowners_decoded, codeowners_sha, context):
+    """Extract the usernames and owners from a CODEOWNERS file, once per blob SHA"""
+    parsed = context.parsed_codeowners.get(codeowners_sha)
+    if context.metrics:
+        context.metrics.record_cache("codeowners_parse", parsed is not None)
+    if parsed is None:
+        parsed = ParsedCodeowners(
+            get_usernames_from_codeowners(codeowners_decoded),
+            count_owner_categories(codeowners_decoded),
         )
+        if codeowners_sha:
+            context.parsed_codeowners[codeowners_sha] = parsed
+    return parsed
 
-        write_step_summary(
-            pull_count=pull_count,
-            eligble_for_pr_count=eligble_for_pr_count,
-            no_codeowners_count=no_codeowners_count,
-            codeowners_count=codeowners_count,
-            users_count=users_count,
-            repo_and_users_to_remove=repo_and_users_to_remove,
-            repos_missing_codeowners=repos_missing_codeowners,
-            error=error_message,
-            pull_request_urls=pull_request_urls,
-            enable_github_actions_step_summary=enable_github_actions_step_summary,
+
+def remove_owners(
+    repo, codeowners_decoded, usernames, org, writers, context, result
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Check the owners of a CODEOWNERS file and remove the ones who should go.
+
+    Returns:
+        bytes | None: the new CODEOWNERS contents or None when nothing was removed
+    """
+    if context.target_usernames is not None:
+        usernames = [
+            username
+            for username in usernames
+            if username.lower() in context.target_usernames
+        ]
+    for username in usernames:
+        # Check to see if the username is a member of the organization
+        is_member = context.membership.is_member(org, username)
+        if is_member is None:
+            print(f"Owner {org} of repo {repo} is not an organization.")
+            break
+
+        reason = get_removal_reason(context, org, username, is_member, writers, result)
+        if reason is None:
+            continue
+        print(f"\t{username} {reason}. Suggest removing them from {repo.full_name}")
+        result.usernames_to_remove.append(username)
+
+    if not result.usernames_to_remove:
+        return None
+    # Identical files losing the same owners are edited once per run
+    key = (result.codeowners_sha, frozenset(result.usernames_to_remove))
+    edited = context.edited_codeowners.get(key)
+    if context.metrics:
+        context.metrics.record_cache("codeowners_edit", edited is not None)
+    if edited is None:
+        codeowners_file_contents_new = remove_owners_from_content(
+            codeowners_decoded, result.usernames_to_remove
         )
+        edited = (
+            codeowners_file_contents_new,
+            not get_usernames_from_codeowners(codeowners_file_contents_new),
+        )
+        if result.codeowners_sha:
+            context.edited_codeowners[key] = edited
+    if edited[1]:
+        print(f"\twarning: All usernames removed from CODEOWNERS in {repo.full_name}.")
+    return edited[0]
 
-        if issue_report:
-            write_to_markdown(
-                users_count,
-                pull_count,
-                no_codeowners_count,
-                codeowners_count,
-                repo_and_users_to_remove,
-                repos_missing_codeowners,
+
+def process_branches(repo, org, context, result):
+    """
+    Remove the same owners from the CODEOWNERS files of the branches matching BRANCHES.
+
+    Branches that share a CODEOWNERS blob are checked and edited once, then
+    each of them gets its own pull request. The owners removed and the pull
+    requests are added to the result of the repository.
+    """
+    blobs: dict[tuple[str, str], list[str]] = {}
+    for branch, path, oid in get_branch_codeowners(
+        context.github_connection, repo.full_name, context.branches, repo.default_branch
+    ):
+        blobs.setdefault((path, oid), []).append(branch)
+    contents = get_blob_contents(
+        context.github_connection, repo, sorted({oid for _, oid in blobs})
+    )
+    writers = None
+    for (path, oid), branch_names in blobs.items():
+        parsed = parse_codeowners(contents[oid], oid, context)
+        if context.check_write_access and writers is None and parsed.usernames:
+            writers = get_writers(repo, context.results)
+        branch_result = RepoResult(
+            result.full_name, "present", path, codeowners_sha=oid
+        )
+        new_contents = remove_owners(
+            repo, contents[oid], parsed.usernames, org, writers, context, branch_result
+        )
+        for name in ("usernames_to_remove", "outside_collaborators"):
+            found = getattr(result, name)
+            found.extend(
+                username
+                for username in dict.fromkeys(getattr(branch_result, name))
+                if username not in found
+            )
+        if new_contents is None or context.dry_run:
+            continue
+        result.eligible_branches.extend(branch_names)
+        for branch in branch_names:
+            print(f"\tOpening a pull request against {branch}")
+            pull_request_url = open_pull_request(
+                repo, new_contents, path, context, base_branch=branch
             )
+            if pull_request_url:
+                result.branch_pull_request_urls.append(pull_request_url)
 
-    if error_message:
-        raise SystemExit(1)
+
+def open_pull_request(
+    repo,
+    codeowners_contents,
+    codeowners_filepath,
+    context,
+    create_new=False,
+    base_branch=None,
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Commit the new CODEOWNERS contents and return the pull request url or None on failure"""
+    if context.patch_dir:
+        patch_path = repo.write_patch(
+            context.patch_dir, codeowners_filepath, codeowners_contents
+        )
+        print(f"\tWrote patch {patch_path}")
+        return None
+    try:
+        pull = commit_changes(
+            context.pull_request["title"],
+            context.pull_request["body"],
+            repo,
+            codeowners_contents,
+            context.pull_request["commit_message"],
+            codeowners_filepath,
+            create_new=create_new,
+            base_branch=base_branch,
+        )
+    except github3.exceptions.NotFoundError:
+        print("\tFailed to create pull request. Check write permissions.")
+        return None
+    print(f"\tCreated pull request {pull.html_url}")
+    return pull.html_url
 
 
 def get_codeowners_file(repo):
@@ -318,8 +857,26 @@ def print_stats(
         )
 
 
-def get_repos_iterator(organization, repository_list, github_connection):
-    """Get the repositories from the organization or list of repositories"""
+def print_owner_counts(owner_counts):
+    """Print the owners that were not checked for membership"""
+    if any(owner_counts.values()):
+        print(
+            f"Skipped the membership check of {owner_counts.get('team', 0)} team, "
+            f"{owner_counts.get('email', 0)} email and "
+            f"{owner_counts.get('invalid', 0)} invalid owners"
+        )
+
+
+def get_repos_iterator(
+    organization, repository_list, github_connection, local_checkouts=""
+):
+    """Get the repositories from the organization or list of repositories
+
+    When local_checkouts is set, the repositories are read from that directory
+    of local checkouts instead of the GitHub API.
+    """
+    if local_checkouts:
+        return get_local_repositories(local_checkouts, organization, repository_list)
     repos = []
     if organization and not repository_list:
         repos = github_connection.organization(organization).repositories()
@@ -334,29 +891,18 @@ def get_repos_iterator(organization, repository_list, github_connection):
 
 
 def get_usernames_from_codeowners(codeowners_file_contents, ignore_teams=True):
-    """Extract the usernames from the CODEOWNERS file"""
-    usernames = []
-    for line in codeowners_file_contents.splitlines():
-        if line:
-            line = line.decode() if isinstance(line, bytes) else line
-            # skip comments
-            if line.lstrip().startswith("#"):
-                continue
-            # skip empty lines
-            if not line.strip():
-                continue
-            # Identify handles
-            if "@" in line:
-                handles = line.split("@")[1:]
-                for handle in handles:
-                    handle = handle.split()[0]
-                    # Identify team handles by the presence of a slash.
-                    # Ignore teams because non-org members cannot be in a team.
-                    if ignore_teams and "/" not in handle:
-                        usernames.append(handle)
-                    elif not ignore_teams:
-                        usernames.append(handle)
-    return usernames
+    """Extract the usernames from the CODEOWNERS file
+
+    Emails and tokens that are not valid GitHub handles are left out, so
+    they never reach a membership check.
+    """
+    # Ignore teams because non-org members cannot be in a team.
+    categories = (OWNER_USER,) if ignore_teams else (OWNER_USER, OWNER_TEAM)
+    return [
+        token[1:]
+        for _, _, token in get_owner_tokens(codeowners_file_contents)
+        if classify_owner(token) in categories
+    ]
 
 
 def build_default_codeowners(repo):
@@ -384,14 +930,18 @@ def commit_changes(
     commit_message,
     codeowners_filepath,
     create_new=False,
+    base_branch=None,
 ):
-    """Commit the changes to the repo and open a pull request and return the pull request object"""
-    default_branch = repo.default_branch
-    # Get latest commit sha from default branch
-    default_branch_commit = repo.ref(f"heads/{default_branch}").object.sha
+    """Commit the changes to the repo and open a pull request and return the pull request object
+
+    The pull request targets the default branch unless base_branch is set.
+    """
+    base = base_branch or repo.default_branch
+    # Get latest commit sha from the base branch
+    base_commit = repo.ref(f"heads/{base}").object.sha
     front_matter = "refs/heads/"
     branch_name = f"codeowners-{str(uuid.uuid4())}"
-    repo.create_ref(front_matter + branch_name, default_branch_commit)
+    repo.create_ref(front_matter + branch_name, base_commit)
     if create_new:
         repo.create_file(
             codeowners_filepath,
@@ -400,15 +950,18 @@ def commit_changes(
             branch=branch_name,
         )
     else:
-        repo.file_contents(codeowners_filepath).update(
+        file_contents = (
+            repo.file_contents(codeowners_filepath, ref=base_branch)
+            if base_branch
+            else repo.file_contents(codeowners_filepath)
+        )
+        file_contents.update(
             message=commit_message,
             content=codeowners_file_contents_new,
             branch=branch_name,
         )
 
-    pull = repo.create_pull(
-        title=title, body=body, head=branch_name, base=repo.default_branch
-    )
+    pull = repo.create_pull(title=title, body=body, head=branch_name, base=base)
     return pull
 
 
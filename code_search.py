@@ -0,0 +1,75 @@
+"""Find the CODEOWNERS files that mention specific users with the code search API."""
+
+from local_checkouts import CODEOWNERS_PATHS
+
+# Results returned by each page of the code search API
+SEARCH_PAGE_SIZE = 100
+# Code search never returns more results than this for a single query
+SEARCH_RESULT_LIMIT = 1000
+
+
+def search_login(github_connection, organization: str, login: str) -> set[str] | None:
+    """
+    Search the CODEOWNERS files of an organization for a login.
+
+    Returns:
+        set[str] | None: the repositories whose CODEOWNERS file matched, or
+        None when the search failed or its results are incomplete
+    """
+    session = github_connection.session
+    query = f'"@{login}" org:{organization} filename:CODEOWNERS'
+    repositories: set[str] = set()
+    page = 1
+    while True:
+        response = session.get(
+            f"{session.base_url}/search/code",
+            params={"q": query, "per_page": SEARCH_PAGE_SIZE, "page": page},
+        )
+        if response.status_code != 200:
+            print(f"Code search for {login} failed with status {response.status_code}")
+            return None
+        payload = response.json()
+        total_count = payload.get("total_count", 0)
+        if payload.get("incomplete_results") or total_count > SEARCH_RESULT_LIMIT:
+            print(
+                f"Code search for {login} in {organization} returned incomplete results"
+            )
+            return None
+        items = payload.get("items") or []
+        repositories.update(
+            item["repository"]["full_name"]
+            for item in items
+            if item["path"] in CODEOWNERS_PATHS
+        )
+        if len(items) < SEARCH_PAGE_SIZE or page * SEARCH_PAGE_SIZE >= total_count:
+            return repositories
+        page += 1
+
+
+def search_codeowners_repositories(
+    github_connection, organization_list, logins
+) -> list[str] | None:
+    """
+    Find the repositories whose CODEOWNERS file mentions any of the logins.
+
+    Code search only covers the default branch of the repositories it has
+    indexed, so every match still goes through the normal checks before
+    anything is removed.
+
+    Args:
+        github_connection: The authenticated github3 connection
+        organization_list (list[str]): The organizations to search
+        logins (list[str]): The logins to search for
+
+    Returns:
+        list[str] | None: the repositories, or None when any search failed or
+        was incomplete and every repository must be scanned instead
+    """
+    repositories: set[str] = set()
+    for organization in organization_list:
+        for login in logins:
+            found = search_login(github_connection, organization, login)
+            if found is None:
+                return None
+            repositories.update(found)
+    return sorted(repositories)
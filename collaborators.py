@@ -0,0 +1,87 @@
+"""Decide on CODEOWNERS owners from their access to the repository and organization."""
+
+import github3
+
+# Repository permissions that let a code owner approve changes
+WRITE_PERMISSIONS = ("admin", "maintain", "push")
+
+
+def get_writers(repo, results) -> set[str] | None:
+    """
+    List the collaborators of a repository who have write access.
+
+    One paginated listing returns every collaborator with their permissions,
+    including the members who get access through a team or the base
+    permission of the organization, so no request is made per owner.
+
+    Args:
+        repo: The github3 repository
+        results: The ScanResults the failure to list the collaborators is recorded in
+
+    Returns:
+        set[str] | None: the lowercase logins with write access, or None when
+        the collaborators cannot be listed with the credentials of the run
+    """
+    try:
+        return {
+            collaborator.login.lower()
+            for collaborator in repo.collaborators()
+            if any(
+                (collaborator.permissions or {}).get(permission)
+                for permission in WRITE_PERMISSIONS
+            )
+        }
+    except github3.exceptions.GitHubException as error:
+        message = f"Unable to list the collaborators of {repo.full_name}: {error}"
+        print(message)
+        # The write access of the owners of this repository goes unchecked
+        results.add_error(message)
+        return None
+
+
+def get_removal_reason(
+    context, org, username, is_member, writers, result
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Decide whether an owner is removed from CODEOWNERS.
+
+    Members are kept unless they lack write access. Outside collaborators
+    are answered from the list of the organization fetched once, and are
+    kept, flagged or removed by the OUTSIDE_COLLABORATORS policy. Any other
+    non member is removed, unless that list cannot be fetched, in which case
+    non members are kept since any of them may be an outside collaborator.
+
+    Args:
+        context: The ScanContext of the run
+        org (str): The organization the owner is checked against
+        username (str): The owner
+        is_member (bool): Whether the owner is a member of the organization
+        writers (set[str] | None): The logins with write access or None when not checked
+        result: The RepoResult that records the flagged and removed outside collaborators
+
+    Returns:
+        str | None: why the owner is removed or None to keep them
+    """
+    if is_member:
+        if writers is not None and username.lower() not in writers:
+            return f"does not have write access to {result.full_name}"
+        return None
+    policy = context.outside_collaborators
+    collaborators = context.membership.outside_collaborators(org) if policy else set()
+    if collaborators is None:
+        print(
+            f"\tThe outside collaborators of {org} are unknown. "
+            f"Keeping {username} in {result.full_name}"
+        )
+        return None
+    if username.lower() not in collaborators:
+        return f"is not a member of {org}"
+    if policy != "keep":
+        result.outside_collaborators.append(username)
+    if policy == "remove":
+        return f"is an outside collaborator of {org}"
+    action = "Keeping" if policy == "keep" else "Flagging"
+    print(
+        f"\t{username} is an outside collaborator of {org}. {action} them in {result.full_name}"
+    )
+    return None
@@ -3,6 +3,7 @@ Sets up the environment variables for the action.
 """
 
 import os
+from dataclasses import dataclass
 from os.path import dirname, join
 
 from dotenv import load_dotenv
@@ -42,33 +43,90 @@ def get_int_env_var(env_var_name: str) -> int | None:
         return None
 
 
-def get_env_vars(
-    test: bool = False,
-) -> tuple[
-    str | None,
-    list[str],
-    int | None,
-    int | None,
-    bytes,
-    bool,
-    str | None,
-    str,
-    list[str],
-    bool,
-    str,
-    str,
-    str,
-    bool,
-    bool,
-]:
+def get_credential_pool_env_vars() -> tuple[list[str], list[int]]:
     """
-    Get the environment variables for use in the action.
+    Get every credential of the pool used to spread requests across rate limits.
+
+    GH_TOKEN and GH_APP_INSTALLATION_ID accept comma separated lists.
+
+    Returns:
+        token_list (list[str]): The GitHub tokens
+        gh_app_installation_id_list (list[int]): The GitHub App installation IDs
+    """
+    token_list = [
+        token.strip()
+        for token in os.environ.get("GH_TOKEN", "").split(",")
+        if token.strip()
+    ]
+    gh_app_installation_id_list = [
+        int(installation_id)
+        for installation_id in os.environ.get("GH_APP_INSTALLATION_ID", "").split(",")
+        if installation_id.strip().isdigit()
+    ]
+    return token_list, gh_app_installation_id_list
+
+
+def get_auth_env_vars(
+    required: bool = True,
+) -> tuple[int | None, int | None, bytes, bool, str | None, str]:
+    """
+    Get the environment variables used to authenticate to GitHub.
 
     Args:
-        test (bool): Whether or not to load the environment variables from a .env file (default: False)
+        required (bool): Whether a token or GitHub App must be configured (default: True)
 
     Returns:
-        organization (str | None): The organization to search for repositories in
+        gh_app_id (int | None): The GitHub App ID to use for authentication
+        gh_app_installation_id (int | None): The GitHub App Installation ID to use for authentication
+        gh_app_private_key_bytes (bytes): The GitHub App Private Key as bytes to use for authentication
+        gh_app_enterprise_only (bool): Set this to true if the GH APP is created on GHE and needs to communicate with GHE api only
+        token (str | None): The GitHub token to use for authentication
+        ghe (str): The GitHub Enterprise URL to use for authentication
+
+    """
+    token_list, gh_app_installation_id_list = get_credential_pool_env_vars()
+    gh_app_id = get_int_env_var("GH_APP_ID")
+    gh_app_private_key_bytes = os.environ.get("GH_APP_PRIVATE_KEY", "").encode("utf8")
+    # The first credential of a pool is used when a single one is needed
+    gh_app_installation_id = (
+        gh_app_installation_id_list[0] if gh_app_installation_id_list else None
+    )
+    gh_app_enterprise_only = get_bool_env_var("GITHUB_APP_ENTERPRISE_ONLY")
+
+    if gh_app_id and (not gh_app_private_key_bytes or not gh_app_installation_id):
+        raise ValueError(
+            "GH_APP_ID set and GH_APP_INSTALLATION_ID or GH_APP_PRIVATE_KEY variable not set"
+        )
+
+    token = token_list[0] if token_list else os.getenv("GH_TOKEN")
+    if (
+        required
+        and not gh_app_id
+        and not gh_app_private_key_bytes
+        and not gh_app_installation_id
+        and not token
+    ):
+        raise ValueError("GH_TOKEN environment variable not set")
+
+    ghe = os.getenv("GH_ENTERPRISE_URL", default="").strip()
+
+    return (
+        gh_app_id,
+        gh_app_installation_id,
+        gh_app_private_key_bytes,
+        gh_app_enterprise_only,
+        token,
+        ghe,
+    )
+
+
+@dataclass
+class EnvVars:  # pylint: disable=too-many-instance-attributes
+    """
+    The settings of the action read from the environment variables.
+
+    Attributes:
+        organization_list (list[str]): The organizations to search for repositories in
         repository_list (list[str]): A list of repositories to search for
         gh_app_id (int | None): The GitHub App ID to use for authentication
         gh_app_installation_id (int | None): The GitHub App Installation ID to use for authentication
@@ -80,9 +138,77 @@ def get_env_vars(
         dry_run (bool): Whether or not to actually open issues/pull requests
         title (str): The title to use for the pull request
         body (str): The body to use for the pull request
-        message (str): Commit message to use
+        commit_message (str): Commit message to use
         issue_report (bool): Whether or not to create an issue report with the results
         enable_github_actions_step_summary (bool): Whether to write a GitHub Actions step summary
+        enterprise (str): The enterprise slug whose organizations should be searched
+        max_workers (int): The number of organizations to scan concurrently
+        shard_index (int): The shard of the repositories this run is responsible for
+        shard_count (int): The total number of shards the repositories are split into
+        max_runtime (int | None): The number of minutes after which the run stops cleanly
+        checkpoint_file (str): The file used to save progress and resume the next run
+        results_file (str): The NDJSON file the result of each repository is streamed to
+        history_db (str): The SQLite database the per-repository results of every run are stored in
+        membership_snapshot_list (list[str]): Membership snapshot files used instead of membership API calls
+        local_checkouts (str): A directory of local checkouts scanned instead of the repositories on GitHub
+        patch_dir (str): The directory patch files are written to when scanning local checkouts
+        preflight (bool): Whether to only estimate the API calls of the run and check them against the budget
+        priority (str): The order repositories are scanned in: pushed, stale, handles or listing order when empty
+        event_path (str): The webhook or repository_dispatch payload whose departed users are the only ones removed
+        departed_user_list (list[str]): Logins that left the organization, the only ones removed
+        metrics_file (str): The OpenMetrics file the metrics of the run are written to
+        check_write_access (bool): Whether owners without write access to the repository are removed too
+        outside_collaborators (str): Whether outside collaborators are kept, flagged or removed, or not looked up when empty
+        branch_list (list[str]): Patterns of the branches whose CODEOWNERS files are scanned in addition to the default branch
+        unowned_paths (bool): Whether to report the files left without owners by the proposed changes
+    """
+
+    organization_list: list[str]
+    repository_list: list[str]
+    gh_app_id: int | None
+    gh_app_installation_id: int | None
+    gh_app_private_key_bytes: bytes
+    gh_app_enterprise_only: bool
+    token: str | None
+    ghe: str
+    exempt_repositories_list: list[str]
+    dry_run: bool
+    title: str
+    body: str
+    commit_message: str
+    issue_report: bool
+    enable_github_actions_step_summary: bool
+    enterprise: str
+    max_workers: int
+    shard_index: int
+    shard_count: int
+    max_runtime: int | None
+    checkpoint_file: str
+    results_file: str
+    history_db: str
+    membership_snapshot_list: list[str]
+    local_checkouts: str
+    patch_dir: str
+    preflight: bool
+    priority: str
+    event_path: str
+    departed_user_list: list[str]
+    metrics_file: str
+    check_write_access: bool
+    outside_collaborators: str
+    branch_list: list[str]
+    unowned_paths: bool
+
+
+def get_env_vars(test: bool = False) -> EnvVars:
+    """
+    Get the environment variables for use in the action.
+
+    Args:
+        test (bool): Whether or not to load the environment variables from a .env file (default: False)
+
+    Returns:
+        EnvVars: The settings of the action
 
     """
     if not test:
@@ -90,14 +216,31 @@ def get_env_vars(
         dotenv_path = join(dirname(__file__), ".env")
         load_dotenv(dotenv_path)
 
-    organization = os.getenv("ORGANIZATION")
+    organizations_str = os.getenv("ORGANIZATION")
     repositories_str = os.getenv("REPOSITORY")
-    # Either organization or repository must be set
-    if not organization and not repositories_str:
+    enterprise = os.getenv("ENTERPRISE", default="").strip()
+    event_path = os.getenv("EVENT_PATH", default="").strip()
+    # Either organization, enterprise or repository must be set, an event
+    # payload can name the organization instead
+    if (
+        not organizations_str
+        and not repositories_str
+        and not enterprise
+        and not event_path
+    ):
         raise ValueError(
-            "ORGANIZATION and REPOSITORY environment variables were not set. Please set one"
+            "ORGANIZATION, ENTERPRISE and REPOSITORY environment variables were not set. Please set one"
         )
 
+    # Separate organizations_str into a list based on the comma separator
+    organization_list = []
+    if organizations_str:
+        organization_list = [
+            organization.strip()
+            for organization in organizations_str.split(",")
+            if organization.strip()
+        ]
+
     if repositories_str and repositories_str.find("/") == 0:
         raise ValueError(
             "REPOSITORY environment variable was not set correctly. Please set it to a comma separated list of repositories in the format org/repo"
@@ -110,26 +253,15 @@ def get_env_vars(
             repository.strip() for repository in repositories_str.split(",")
         ]
 
-    gh_app_id = get_int_env_var("GH_APP_ID")
-    gh_app_private_key_bytes = os.environ.get("GH_APP_PRIVATE_KEY", "").encode("utf8")
-    gh_app_installation_id = get_int_env_var("GH_APP_INSTALLATION_ID")
-    gh_app_enterprise_only = get_bool_env_var("GITHUB_APP_ENTERPRISE_ONLY")
-
-    if gh_app_id and (not gh_app_private_key_bytes or not gh_app_installation_id):
-        raise ValueError(
-            "GH_APP_ID set and GH_APP_INSTALLATION_ID or GH_APP_PRIVATE_KEY variable not set"
-        )
-
-    token = os.getenv("GH_TOKEN")
-    if (
-        not gh_app_id
-        and not gh_app_private_key_bytes
-        and not gh_app_installation_id
-        and not token
-    ):
-        raise ValueError("GH_TOKEN environment variable not set")
-
-    ghe = os.getenv("GH_ENTERPRISE_URL", default="").strip()
+    local_checkouts = os.getenv("LOCAL_CHECKOUTS", default="").strip()
+    (
+        gh_app_id,
+        gh_app_installation_id,
+        gh_app_private_key_bytes,
+        gh_app_enterprise_only,
+        token,
+        ghe,
+    ) = get_auth_env_vars(required=not local_checkouts)
 
     exempt_repos = os.getenv("EXEMPT_REPOS")
     exempt_repositories_list = []
@@ -176,20 +308,133 @@ def get_env_vars(
         "ENABLE_GITHUB_ACTIONS_STEP_SUMMARY", default=True
     )
 
-    return (
-        organization,
-        repositories_list,
-        gh_app_id,
-        gh_app_installation_id,
-        gh_app_private_key_bytes,
-        gh_app_enterprise_only,
-        token,
-        ghe,
-        exempt_repositories_list,
-        dry_run,
-        title,
-        body,
-        commit_message,
-        issue_report,
-        enable_github_actions_step_summary,
+    max_workers = get_int_env_var("MAX_WORKERS")
+    if max_workers is None:
+        max_workers = 4
+    elif max_workers < 1:
+        raise ValueError("MAX_WORKERS environment variable must be at least 1")
+
+    shard_index = get_int_env_var("SHARD_INDEX") or 0
+    shard_count = get_int_env_var("SHARD_COUNT") or 1
+    if shard_count < 1:
+        raise ValueError("SHARD_COUNT environment variable must be at least 1")
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(
+            "SHARD_INDEX environment variable must be between 0 and SHARD_COUNT - 1"
+        )
+
+    max_runtime = get_int_env_var("MAX_RUNTIME")
+    if max_runtime is not None and max_runtime < 1:
+        raise ValueError("MAX_RUNTIME environment variable must be at least 1 minute")
+    checkpoint_file = os.getenv("CHECKPOINT_FILE", default="").strip()
+    results_file = os.getenv("RESULTS_FILE", default="").strip()
+    history_db = os.getenv("HISTORY_DB", default="").strip()
+    membership_snapshots = os.getenv("MEMBERSHIP_SNAPSHOT")
+    membership_snapshot_list = []
+    if membership_snapshots:
+        membership_snapshot_list = [
+            path.strip() for path in membership_snapshots.split(",") if path.strip()
+        ]
+
+    patch_dir = os.getenv("PATCH_DIR", default="").strip()
+    metrics_file = os.getenv("METRICS_FILE", default="").strip()
+    departed_users = os.getenv("DEPARTED_USERS")
+    departed_user_list = []
+    if departed_users:
+        departed_user_list = [
+            login.strip().lstrip("@")
+            for login in departed_users.split(",")
+            if login.strip().lstrip("@")
+        ]
+    preflight = get_bool_env_var("PREFLIGHT")
+    check_write_access = get_bool_env_var("CHECK_WRITE_ACCESS")
+    branches = os.getenv("BRANCHES")
+    branch_list = []
+    if branches:
+        branch_list = [
+            pattern.strip() for pattern in branches.split(",") if pattern.strip()
+        ]
+    unowned_paths = get_bool_env_var("UNOWNED_PATHS")
+    outside_collaborators = (
+        os.getenv("OUTSIDE_COLLABORATORS", default="").strip().lower()
+    )
+    if outside_collaborators and outside_collaborators not in (
+        "keep",
+        "flag",
+        "remove",
+    ):
+        raise ValueError(
+            "OUTSIDE_COLLABORATORS environment variable must be one of keep, flag or remove"
+        )
+    priority = os.getenv("PRIORITY", default="").strip().lower()
+    if priority and priority not in ("pushed", "stale", "handles"):
+        raise ValueError(
+            "PRIORITY environment variable must be one of pushed, stale or handles"
+        )
+    if priority in ("stale", "handles") and not history_db:
+        raise ValueError(
+            f"PRIORITY environment variable {priority} requires HISTORY_DB to be set"
+        )
+    if local_checkouts:
+        if enterprise or len(organization_list) > 1:
+            raise ValueError(
+                "LOCAL_CHECKOUTS environment variable supports a single ORGANIZATION"
+            )
+        if not membership_snapshot_list:
+            raise ValueError(
+                "LOCAL_CHECKOUTS environment variable requires MEMBERSHIP_SNAPSHOT to be set"
+            )
+        if check_write_access:
+            raise ValueError(
+                "CHECK_WRITE_ACCESS environment variable is not supported with LOCAL_CHECKOUTS"
+            )
+        if outside_collaborators:
+            raise ValueError(
+                "OUTSIDE_COLLABORATORS environment variable is not supported with LOCAL_CHECKOUTS"
+            )
+        if branch_list:
+            raise ValueError(
+                "BRANCHES environment variable is not supported with LOCAL_CHECKOUTS"
+            )
+        if unowned_paths:
+            raise ValueError(
+                "UNOWNED_PATHS environment variable is not supported with LOCAL_CHECKOUTS"
+            )
+
+    return EnvVars(
+        organization_list=organization_list,
+        repository_list=repositories_list,
+        gh_app_id=gh_app_id,
+        gh_app_installation_id=gh_app_installation_id,
+        gh_app_private_key_bytes=gh_app_private_key_bytes,
+        gh_app_enterprise_only=gh_app_enterprise_only,
+        token=token,
+        ghe=ghe,
+        exempt_repositories_list=exempt_repositories_list,
+        dry_run=dry_run,
+        title=title,
+        body=body,
+        commit_message=commit_message,
+        issue_report=issue_report,
+        enable_github_actions_step_summary=enable_github_actions_step_summary,
+        enterprise=enterprise,
+        max_workers=max_workers,
+        shard_index=shard_index,
+        shard_count=shard_count,
+        max_runtime=max_runtime,
+        checkpoint_file=checkpoint_file,
+        results_file=results_file,
+        history_db=history_db,
+        membership_snapshot_list=membership_snapshot_list,
+        local_checkouts=local_checkouts,
+        patch_dir=patch_dir,
+        preflight=preflight,
+        priority=priority,
+        event_path=event_path,
+        departed_user_list=departed_user_list,
+        metrics_file=metrics_file,
+        check_write_access=check_write_access,
+        outside_collaborators=outside_collaborators,
+        branch_list=branch_list,
+        unowned_paths=unowned_paths,
     )
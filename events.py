@@ -0,0 +1,119 @@
+"""Read the users who left an organization from a webhook or repository_dispatch payload."""
+
+import json
+
+from code_search import search_codeowners_repositories
+
+
+def read_event(path: str) -> tuple[str | None, list[str]]:
+    """
+    Read the organization and the departed logins of an event payload.
+
+    Supported payloads:
+        organization member_removed webhooks, with membership.user.login
+        repository_dispatch events, with client_payload.logins or client_payload.login
+
+    Args:
+        path (str): The file holding the JSON payload, ie. GITHUB_EVENT_PATH
+
+    Returns:
+        tuple: the organization login or None, and the departed logins
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        payload = json.load(file)
+
+    logins = []
+    client_payload = payload.get("client_payload") or {}
+    if payload.get("action") == "member_removed":
+        login = ((payload.get("membership") or {}).get("user") or {}).get("login")
+        if login:
+            logins.append(login)
+    elif client_payload:
+        logins.extend(client_payload.get("logins") or [])
+        if client_payload.get("login"):
+            logins.append(client_payload["login"])
+
+    organization = (payload.get("organization") or {}).get("login") or (
+        client_payload.get("organization")
+    )
+    # Keep the first spelling of each login
+    unique_logins: dict[str, str] = {}
+    for login in logins:
+        unique_logins.setdefault(login.lstrip("@").lower(), login.lstrip("@"))
+    return organization, list(unique_logins.values())
+
+
+def get_candidate_repositories(
+    history, github_connection, logins, organization_list
+) -> list[str] | None:
+    """
+    Get the repositories whose CODEOWNERS mentioned the logins in their latest scan.
+
+    The history is only relied on when the latest full scan of every
+    organization went through all of its repositories. Repositories without
+    any scan in the history, like the ones created since, are candidates too.
+
+    Args:
+        history: The RunHistory of previous runs
+        github_connection: The connection listing the repositories of the organizations
+        logins (list[str]): The departed logins
+        organization_list (list[str]): The organizations the repositories must belong to
+
+    Returns:
+        list[str] | None: the repositories or None when there is no scan to rely on
+    """
+    if not organization_list or not all(
+        history.covers_organization(organization) for organization in organization_list
+    ):
+        return None
+    organizations = {organization.lower() for organization in organization_list}
+    repositories: set[str] = set()
+    for login in logins:
+        repositories.update(
+            repository
+            for repository in history.repos_mentioning(login)
+            if repository.split("/")[0].lower() in organizations
+        )
+    scanned = history.last_scanned()
+    for organization in organization_list:
+        unscanned = {
+            repo.full_name
+            for repo in github_connection.organization(organization).repositories()
+            if repo.full_name not in scanned
+        }
+        if unscanned:
+            print(f"{len(unscanned)} repositories of {organization} were never scanned")
+        repositories.update(unscanned)
+    return sorted(repositories)
+
+
+def discover_repositories(
+    history, github_connection, logins, organization_list
+) -> list[str] | None:
+    """
+    Find the repositories whose CODEOWNERS file mentions any of the departed logins.
+
+    The latest scan in the run history is used when it covered every
+    repository, otherwise the code search API.
+
+    Returns:
+        list[str] | None: the repositories or None when every repository must be scanned
+    """
+    if history:
+        candidates = get_candidate_repositories(
+            history, github_connection, logins, organization_list
+        )
+        if candidates is not None:
+            print(
+                f"{len(candidates)} repositories mentioned the departed users "
+                "in their latest scan or were never scanned"
+            )
+            return candidates
+    candidates = search_codeowners_repositories(
+        github_connection, organization_list, logins
+    )
+    if candidates is None:
+        print("Scanning every repository for the departed users")
+    else:
+        print(f"Code search found {len(candidates)} repositories mentioning them")
+    return candidates
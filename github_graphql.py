@@ -0,0 +1,51 @@
+"""Helpers for sending GraphQL queries through an authenticated github3 connection."""
+
+
+def get_graphql_url(github_connection) -> str:
+    """
+    Get the GraphQL endpoint that matches the REST API of the connection.
+
+    Args:
+        github_connection: The authenticated github3 connection
+
+    Returns:
+        str: the GraphQL endpoint url
+    """
+    base_url = github_connection.session.base_url.rstrip("/")
+    # GitHub Enterprise Server serves REST from /api/v3 and GraphQL from /api/graphql
+    if base_url.endswith("/api/v3"):
+        return base_url[: -len("/v3")] + "/graphql"
+    return base_url + "/graphql"
+
+
+def graphql_query(github_connection, query: str, variables: dict | None = None) -> dict:
+    """
+    Run a GraphQL query using the session of the github3 connection.
+
+    The query shares the connection pool, credentials and rate limit tracking
+    of every other request made through the connection.
+
+    Args:
+        github_connection: The authenticated github3 connection
+        query (str): The GraphQL query document
+        variables (dict | None): The variables for the query
+
+    Returns:
+        dict: the data of the response
+
+    Raises:
+        ValueError: if the request fails or the response contains errors
+    """
+    response = github_connection.session.post(
+        get_graphql_url(github_connection),
+        json={"query": query, "variables": variables or {}},
+    )
+    if response.status_code != 200:
+        raise ValueError(
+            f"GraphQL query failed with status code {response.status_code}"
+        )
+    payload = response.json()
+    if payload.get("errors"):
+        messages = "; ".join(error.get("message", "") for error in payload["errors"])
+        raise ValueError(f"GraphQL query returned errors: {messages}")
+    return payload.get("data") or {}
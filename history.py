@@ -0,0 +1,422 @@
+"""Store the per-repository results of every run in a local SQLite database.
+
+The database is meant to be kept between runs, for example with actions/cache,
+so that questions about previous runs can be answered without scanning the
+organization again.
+
+Usage:
+    python history.py --db cleanowners-history.db removed <username>
+    python history.py --db cleanowners-history.db clean-since <YYYY-MM-DD>
+    python history.py --db cleanowners-history.db slowest [--limit N]
+    python history.py --db cleanowners-history.db owns <username or org/team>
+    python history.py --db cleanowners-history.db top-owners [--limit N]
+"""
+
+import argparse
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scope TEXT NOT NULL,
+    dry_run INTEGER NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    stop_reason TEXT,
+    errors TEXT,
+    full_scan INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS repo_results (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    repo TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    codeowners_path TEXT,
+    codeowners_sha TEXT,
+    handles_found INTEGER NOT NULL,
+    handles_removed INTEGER NOT NULL,
+    pull_request_url TEXT,
+    duration_seconds REAL NOT NULL,
+    PRIMARY KEY (run_id, repo)
+);
+CREATE TABLE IF NOT EXISTS repo_handles (
+    run_id INTEGER NOT NULL,
+    repo TEXT NOT NULL,
+    handle TEXT NOT NULL,
+    removed INTEGER NOT NULL,
+    PRIMARY KEY (run_id, repo, handle)
+);
+CREATE TABLE IF NOT EXISTS deferred_repos (
+    run_id INTEGER NOT NULL,
+    repo TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (run_id, repo)
+);
+CREATE TABLE IF NOT EXISTS owner_index (
+    repo TEXT NOT NULL,
+    handle TEXT NOT NULL,
+    codeowners_path TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    pattern TEXT NOT NULL,
+    PRIMARY KEY (repo, handle, line)
+);
+CREATE INDEX IF NOT EXISTS idx_owner_index_handle ON owner_index (handle);
+CREATE INDEX IF NOT EXISTS idx_repo_results_repo ON repo_results (repo, recorded_at);
+CREATE INDEX IF NOT EXISTS idx_repo_results_duration
+    ON repo_results (run_id, duration_seconds);
+CREATE INDEX IF NOT EXISTS idx_repo_handles_handle ON repo_handles (handle, removed);
+"""
+
+
+def _now() -> str:
+    """Return the current UTC time as an ISO 8601 string."""
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class RunHistory:
+    """
+    Record runs and their per-repository results and query them.
+
+    A single connection is shared by the workers of a run, so every statement
+    is executed under a lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.run_id: int | None = None
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        columns = {
+            row[1] for row in self._connection.execute("PRAGMA table_info(runs)")
+        }
+        if "full_scan" not in columns:
+            # Databases of earlier versions never recorded which runs were full scans
+            self._connection.execute(
+                "ALTER TABLE runs ADD COLUMN full_scan INTEGER NOT NULL DEFAULT 0"
+            )
+        self._lock = threading.Lock()
+
+    def start_run(
+        self, scope: str, dry_run: bool, full_scan: bool = False
+    ) -> int | None:
+        """
+        Record the start of a run and return its id.
+
+        A full scan is a run that lists every repository of its organizations,
+        unlike the runs of a shard, of a repository list or of departed users.
+        """
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO runs (scope, dry_run, started_at, full_scan) "
+                "VALUES (?, ?, ?, ?)",
+                (scope, int(dry_run), _now(), int(full_scan)),
+            )
+        self.run_id = cursor.lastrowid
+        return self.run_id
+
+    def record(self, result) -> None:
+        """Record the result of a repository for the current run."""
+        found = sorted({username.lower() for username in result.usernames})
+        removed = {username.lower() for username in result.usernames_to_remove}
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO repo_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.run_id,
+                    result.full_name,
+                    _now(),
+                    result.status,
+                    result.codeowners_filepath,
+                    result.codeowners_sha,
+                    len(found),
+                    len(removed),
+                    result.pull_request_url,
+                    result.duration,
+                ),
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO repo_handles VALUES (?, ?, ?, ?)",
+                [
+                    (self.run_id, result.full_name, handle, int(handle in removed))
+                    for handle in found
+                ],
+            )
+            # The owner index keeps the latest CODEOWNERS of each repository
+            self._connection.execute(
+                "DELETE FROM owner_index WHERE repo = ?", (result.full_name,)
+            )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO owner_index VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        result.full_name,
+                        handle,
+                        result.codeowners_filepath,
+                        line,
+                        pattern,
+                    )
+                    for handle, line, pattern in result.owner_entries
+                ],
+            )
+
+    def record_deferred(self, repos: list[str]) -> None:
+        """Record the repositories this run left for the next run, in priority order."""
+        with self._lock, self._connection:
+            start = self._connection.execute(
+                "SELECT COUNT(*) FROM deferred_repos WHERE run_id = ?", (self.run_id,)
+            ).fetchone()[0]
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO deferred_repos VALUES (?, ?, ?)",
+                [
+                    (self.run_id, repo, start + position)
+                    for position, repo in enumerate(repos)
+                ],
+            )
+
+    def finish_run(self, stop_reason: str | None, errors: list[str]) -> None:
+        """Record the end of the current run."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE runs SET finished_at = ?, stop_reason = ?, errors = ? WHERE id = ?",
+                (_now(), stop_reason, "\n".join(errors) or None, self.run_id),
+            )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def _query(self, sql: str, parameters: tuple) -> list[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def repos_where_user_removed(self, username: str) -> list[tuple]:
+        """Return (repo, recorded_at, pull_request_url) for each removal of a user."""
+        return self._query(
+            """
+            SELECT results.repo, results.recorded_at, results.pull_request_url
+            FROM repo_handles AS handles
+            JOIN repo_results AS results
+                ON results.run_id = handles.run_id AND results.repo = handles.repo
+            WHERE handles.handle = ? AND handles.removed = 1
+            ORDER BY results.recorded_at DESC
+            """,
+            (username.lower(),),
+        )
+
+    def repos_clean_since(self, since: str) -> list[tuple]:
+        """
+        Return (repo, recorded_at) for repositories that became clean since a date.
+
+        A repository became clean when its last result before the date had
+        users to remove and its latest result, recorded since, has none.
+        """
+        return self._query(
+            """
+            SELECT latest.repo, latest.recorded_at
+            FROM repo_results AS latest
+            WHERE latest.recorded_at >= ?
+                AND latest.handles_removed = 0
+                AND latest.recorded_at = (
+                    SELECT MAX(recorded_at) FROM repo_results WHERE repo = latest.repo
+                )
+                AND (
+                    SELECT handles_removed FROM repo_results
+                    WHERE repo = latest.repo AND recorded_at < ?
+                    ORDER BY recorded_at DESC LIMIT 1
+                ) > 0
+            ORDER BY latest.repo
+            """,
+            (since, since),
+        )
+
+    def latest_run_totals(self) -> tuple[int, int, int]:
+        """Return the repositories, distinct handles and repositories needing a change of the latest run."""
+        rows = self._query(
+            """
+            SELECT
+                (SELECT COUNT(*) FROM repo_results WHERE run_id = latest.id),
+                (SELECT COUNT(DISTINCT handle) FROM repo_handles WHERE run_id = latest.id),
+                (
+                    SELECT COUNT(*) FROM repo_results WHERE run_id = latest.id
+                        AND (handles_removed > 0 OR status IN ('missing', 'empty'))
+                )
+            FROM (SELECT MAX(run_id) AS id FROM repo_results) AS latest
+            """,
+            (),
+        )
+        return rows[0]
+
+    def covers_organization(self, organization: str) -> bool:
+        """
+        Check whether the latest full scan of an organization went through every repository.
+
+        The scan must have finished, without being stopped and without errors,
+        for its results to stand for the whole organization.
+        """
+        rows = self._query(
+            """
+            SELECT finished_at IS NOT NULL AND stop_reason IS NULL AND errors IS NULL
+            FROM runs
+            WHERE full_scan = 1 AND id IS NOT ? AND EXISTS (
+                SELECT 1 FROM repo_results
+                WHERE run_id = runs.id AND lower(repo) LIKE ?
+            )
+            ORDER BY id DESC LIMIT 1
+            """,
+            (self.run_id, f"{organization.lower()}/%"),
+        )
+        return bool(rows and rows[0][0])
+
+    def deferred_repos(self) -> list[str]:
+        """
+        Return the repositories the previous finished run of the same kind left for this run.
+
+        Only a run with the same scope, ie. the same shard, and the same kind
+        of scan carries on the rotation, so an event or repository run
+        finishing in between does not reset it.
+        """
+        rows = self._query(
+            """
+            SELECT repo FROM deferred_repos
+            WHERE run_id = (
+                SELECT MAX(previous.id) FROM runs AS previous
+                JOIN runs AS current ON current.id = ?
+                WHERE previous.id != current.id
+                AND previous.finished_at IS NOT NULL
+                AND previous.scope = current.scope
+                AND previous.full_scan = current.full_scan
+            )
+            ORDER BY position
+            """,
+            (self.run_id,),
+        )
+        return [repo for (repo,) in rows]
+
+    def last_scanned(self) -> dict[str, str]:
+        """Return when each repository was last scanned."""
+        return dict(
+            self._query(
+                "SELECT repo, MAX(recorded_at) FROM repo_results GROUP BY repo", ()
+            )
+        )
+
+    def last_handle_counts(self) -> dict[str, int]:
+        """Return the number of handles found in each repository by its latest scan."""
+        return dict(
+            self._query(
+                """
+                SELECT repo, handles_found FROM repo_results AS latest
+                WHERE recorded_at = (
+                    SELECT MAX(recorded_at) FROM repo_results WHERE repo = latest.repo
+                )
+                """,
+                (),
+            )
+        )
+
+    def repos_mentioning(self, handle: str) -> list[str]:
+        """Return the repositories whose latest scan found a handle in CODEOWNERS."""
+        rows = self._query(
+            """
+            SELECT handles.repo FROM repo_handles AS handles
+            JOIN repo_results AS results
+                ON results.run_id = handles.run_id AND results.repo = handles.repo
+            WHERE handles.handle = ?
+                AND results.recorded_at = (
+                    SELECT MAX(recorded_at) FROM repo_results WHERE repo = handles.repo
+                )
+            ORDER BY handles.repo
+            """,
+            (handle.lower(),),
+        )
+        return [repo for (repo,) in rows]
+
+    def owned_by(self, handle: str) -> list[tuple]:
+        """Return (repo, codeowners_path, line, pattern) of every line owned by a user or team."""
+        return self._query(
+            """
+            SELECT repo, codeowners_path, line, pattern FROM owner_index
+            WHERE handle = ?
+            ORDER BY repo, line
+            """,
+            (handle.lstrip("@").lower(),),
+        )
+
+    def top_owners(self, limit: int = 10) -> list[tuple]:
+        """Return (handle, repositories, lines) of the owners of the most repositories."""
+        return self._query(
+            """
+            SELECT handle, COUNT(DISTINCT repo) AS repos, COUNT(*) FROM owner_index
+            GROUP BY handle
+            ORDER BY repos DESC, handle
+            LIMIT ?
+            """,
+            (limit,),
+        )
+
+    def slowest_repos(self, limit: int = 10) -> list[tuple]:
+        """Return (repo, duration_seconds) of the slowest repositories of the latest run."""
+        return self._query(
+            """
+            SELECT repo, duration_seconds FROM repo_results
+            WHERE run_id = (SELECT MAX(run_id) FROM repo_results)
+            ORDER BY duration_seconds DESC
+            LIMIT ?
+            """,
+            (limit,),
+        )
+
+
+def main(argv=None):
+    """Answer a query from the run history database"""
+    parser = argparse.ArgumentParser(description="Query the cleanowners run history")
+    parser.add_argument("--db", default="cleanowners-history.db")
+    subparsers = parser.add_subparsers(dest="query", required=True)
+    removed_parser = subparsers.add_parser(
+        "removed", help="repositories where a user was removed"
+    )
+    removed_parser.add_argument("username")
+    clean_parser = subparsers.add_parser(
+        "clean-since", help="repositories that became clean since a date"
+    )
+    clean_parser.add_argument("since", help="ISO 8601 date, ie. 2024-01-31")
+    slowest_parser = subparsers.add_parser(
+        "slowest", help="slowest repositories of the latest run"
+    )
+    slowest_parser.add_argument("--limit", type=int, default=10)
+    owns_parser = subparsers.add_parser(
+        "owns", help="CODEOWNERS lines owned by a user or team, ie. alice or org/team"
+    )
+    owns_parser.add_argument("handle")
+    top_owners_parser = subparsers.add_parser(
+        "top-owners", help="owners of the most repositories"
+    )
+    top_owners_parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    history = RunHistory(args.db)
+    try:
+        if args.query == "removed":
+            rows = history.repos_where_user_removed(args.username.lstrip("@"))
+        elif args.query == "clean-since":
+            rows = history.repos_clean_since(args.since)
+        elif args.query == "owns":
+            rows = history.owned_by(args.handle)
+        elif args.query == "top-owners":
+            rows = history.top_owners(args.limit)
+        else:
+            rows = history.slowest_repos(args.limit)
+    finally:
+        history.close()
+    for row in rows:
+        print("\t".join("" if value is None else str(value) for value in row))
+    return rows
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
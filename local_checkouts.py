@@ -0,0 +1,255 @@
+"""Read repositories from a directory of local checkouts instead of the GitHub API.
+
+Each sub-directory of the checkouts directory is a repository of the
+organization, named after the directory. A sub-directory can be a working
+tree checkout or a bare mirror, whose files are read from HEAD without
+checking anything out. The objects below provide the parts of the github3
+repository interface that the scan uses, so a local run produces the same
+results without any API reads.
+"""
+
+import difflib
+import hashlib
+import os
+import subprocess
+import weakref
+from dataclasses import dataclass
+from typing import IO, cast
+
+CODEOWNERS_PATHS = (".github/CODEOWNERS", "CODEOWNERS", "docs/CODEOWNERS")
+
+
+@dataclass
+class LocalOwner:
+    """The organization that owns the local checkouts"""
+
+    login: str
+    type: str = "Organization"
+
+
+@dataclass
+class LocalContents:
+    """The contents of a file in a local checkout"""
+
+    decoded: bytes
+    # The git blob SHA, as the API would return it, hashed when git did not tell
+    sha: str = ""
+
+    def __post_init__(self):
+        if not self.sha:
+            header = f"blob {len(self.decoded)}\0".encode("ascii")
+            self.sha = hashlib.sha1(
+                header + self.decoded, usedforsecurity=False
+            ).hexdigest()
+
+    @property
+    def content(self) -> bytes:
+        """Return the contents, which are never too large to read locally"""
+        return self.decoded
+
+    @property
+    def size(self) -> int:
+        """Return the size of the file in bytes"""
+        return len(self.decoded)
+
+
+class LocalRepository:
+    """A repository checked out in a local directory"""
+
+    archived = False
+
+    def __init__(self, path: str, organization: str):
+        self.path = path
+        self.name = os.path.basename(os.path.normpath(path))
+        self.owner = LocalOwner(organization)
+        self.full_name = f"{organization}/{self.name}"
+
+    def __str__(self):
+        return self.full_name
+
+    def file_contents(self, path: str) -> LocalContents | None:
+        """Return the contents of a file of the checkout or None if it does not exist"""
+        try:
+            with open(os.path.join(self.path, path), "rb") as file:
+                return LocalContents(file.read())
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return None
+
+    def write_patch(self, patch_dir: str, path: str, new_contents: bytes) -> str:
+        """
+        Write the change of a file as a patch that applies with git apply.
+
+        Args:
+            patch_dir (str): The directory the patch is written to
+            path (str): The path of the file in the checkout
+            new_contents (bytes): The new contents of the file
+
+        Returns:
+            str: the path of the patch file
+        """
+        current = self.file_contents(path)
+        old_lines = _split_lines(current.decoded if current else b"")
+        new_lines = _split_lines(new_contents)
+        diff = difflib.unified_diff(
+            old_lines,
+            new_lines,
+            fromfile=f"a/{path}" if current else "/dev/null",
+            tofile=f"b/{path}",
+        )
+        os.makedirs(patch_dir, exist_ok=True)
+        patch_path = os.path.join(patch_dir, f"{self.name}.patch")
+        with open(patch_path, "w", encoding="utf-8") as file:
+            file.write(f"diff --git a/{path} b/{path}\n")
+            if not current:
+                file.write("new file mode 100644\n")
+            for line in diff:
+                file.write(line)
+                if not line.endswith("\n"):
+                    file.write("\n\\ No newline at end of file\n")
+        return patch_path
+
+
+class MirrorRepository(LocalRepository):
+    """
+    A bare mirror read through a git cat-file --batch process.
+
+    The first lookup starts the process and asks it for every CODEOWNERS
+    location at HEAD at once. The process stays up for later lookups until
+    the repository is released, so no process is spawned per file and
+    nothing is checked out.
+    """
+
+    def __init__(self, path: str, organization: str):
+        super().__init__(path, organization)
+        self.name = self.name.removesuffix(".git")
+        self.full_name = f"{organization}/{self.name}"
+        self._files: dict[str, LocalContents | None] = {}
+        self._batch: CatFileBatch | None = None
+
+    def file_contents(self, path: str) -> LocalContents | None:
+        """Return the contents of a file at HEAD or None if it does not exist"""
+        if path not in self._files:
+            if self._batch is None:
+                self._batch = CatFileBatch(self.path)
+            paths = [path] if self._files else sorted({path, *CODEOWNERS_PATHS})
+            self._files.update(self._batch.read_head_files(paths))
+        return self._files[path]
+
+
+def _stop_process(process, stdin, stdout) -> None:
+    """Let a git cat-file --batch process exit by closing its input"""
+    stdin.close()
+    process.wait()
+    stdout.close()
+
+
+class CatFileBatch:
+    """
+    A git cat-file --batch process answering the object lookups of a repository.
+
+    The process is stopped by close, or when the object is released.
+    """
+
+    def __init__(self, git_dir: str):
+        self._process = subprocess.Popen(  # pylint: disable=consider-using-with
+            ["git", f"--git-dir={git_dir}", "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        # Both pipes exist since they are requested above
+        self._stdin = cast(IO[bytes], self._process.stdin)
+        self._stdout = cast(IO[bytes], self._process.stdout)
+        self._finalizer = weakref.finalize(
+            self, _stop_process, self._process, self._stdin, self._stdout
+        )
+
+    def close(self) -> None:
+        """Stop the process, which later lookups cannot use anymore"""
+        self._finalizer()
+
+    def read_head_files(self, paths) -> dict[str, LocalContents | None]:
+        """
+        Read files at HEAD of the repository.
+
+        Every path is written before the answers are read, which is safe as
+        long as the paths fit in the pipe buffer.
+
+        Args:
+            paths: The paths of the files to read
+
+        Returns:
+            dict: the contents of each path, None for paths that are not files
+        """
+        stdin, stdout = self._stdin, self._stdout
+        stdin.write("".join(f"HEAD:{path}\n" for path in paths).encode("utf-8"))
+        stdin.flush()
+        files: dict[str, LocalContents | None] = {}
+        for path in paths:
+            # Each object is "<sha> <type> <size>\n<contents>\n" or "<name> missing\n"
+            header = stdout.readline().split()
+            files[path] = None
+            if len(header) == 3:
+                contents = stdout.read(int(header[2]) + 1)[:-1]
+                if header[1] == b"blob":
+                    files[path] = LocalContents(contents, header[0].decode("ascii"))
+        return files
+
+
+def is_bare_repository(path: str) -> bool:
+    """Check whether a directory is a bare git repository"""
+    return os.path.isfile(os.path.join(path, "HEAD")) and os.path.isdir(
+        os.path.join(path, "objects")
+    )
+
+
+def _split_lines(contents: bytes) -> list[str]:
+    return contents.decode("utf-8").splitlines(keepends=True)
+
+
+def get_local_repositories(
+    checkouts_dir: str, organization: str | None, repository_list: list[str]
+) -> list[LocalRepository]:
+    """
+    List the local checkouts to scan.
+
+    Args:
+        checkouts_dir (str): The directory holding one checkout per repository
+        organization (str | None): The organization owning the checkouts
+        repository_list (list[str]): Repositories in the format org/repo to
+            scan instead of every checkout
+
+    Returns:
+        list[LocalRepository]: the checkouts and mirrors sorted by name
+    """
+    if repository_list:
+        repos = []
+        for full_repo_path in repository_list:
+            owner, name = full_repo_path.split("/")[:2]
+            for repo_path in (
+                os.path.join(checkouts_dir, name),
+                os.path.join(checkouts_dir, f"{name}.git"),
+            ):
+                if os.path.isdir(repo_path):
+                    repos.append(get_local_repository(repo_path, owner))
+                    break
+            else:
+                print(f"No local checkout of {full_repo_path} in {checkouts_dir}")
+        return repos
+
+    with os.scandir(checkouts_dir) as entries:
+        names = sorted(
+            entry.name
+            for entry in entries
+            if entry.is_dir() and not entry.name.startswith(".")
+        )
+    return [
+        get_local_repository(os.path.join(checkouts_dir, name), organization or "")
+        for name in names
+    ]
+
+
+def get_local_repository(path: str, organization: str) -> LocalRepository:
+    """Return a mirror repository for a bare repository, else a checkout"""
+    if is_bare_repository(path):
+        return MirrorRepository(path, organization)
+    return LocalRepository(path, organization)
@@ -0,0 +1,42 @@
+"""A bounded cache shared by the workers of a run."""
+
+import threading
+from collections import OrderedDict
+
+
+class LruCache:
+    """
+    Map keys to values, keeping only the most recently used entries.
+
+    The caches of a run are looked up by every worker, so each operation
+    runs under a lock. Once max_size entries are stored, adding one drops
+    the least recently used entry, which keeps the memory of a run bounded
+    however many distinct files it sees.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value of a key, marking it as recently used, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def __setitem__(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._entries))
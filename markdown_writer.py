@@ -1,28 +1,129 @@
 """Write the results to a markdown file"""
 
+import io
 import os
 
+# GitHub rejects step summaries larger than 1 MiB
+STEP_SUMMARY_MAX_BYTES = 1024 * 1024
+# Number of entries kept in each list of a step summary that is too large
+STEP_SUMMARY_TOP_N = 50
 
-def _write_repos_and_users_to_remove(file, repo_and_users_to_remove, header_suffix=""):
+
+def _write_repos_and_users_to_remove(
+    file, repo_and_users_to_remove, header_suffix="", limit=None
+):
     """Write the repos and users to remove section to a file handle"""
     if repo_and_users_to_remove:
         file.write(f"## Repositories and Users to Remove{header_suffix}\n")
-        for repo, users in repo_and_users_to_remove.items():
+        items = list(repo_and_users_to_remove.items())
+        if limit is not None and len(items) > limit:
+            items = sorted(items, key=lambda item: len(item[1]), reverse=True)[:limit]
+            file.write(
+                f"Showing the {limit} repositories with the most users to remove.\n\n"
+            )
+        for repo, users in items:
+            file.write(f"{repo}\n")
+            for user in users:
+                file.write(f"- {user}\n")
+            file.write("\n")
+        if len(items) < len(repo_and_users_to_remove):
+            _write_more(
+                file, len(repo_and_users_to_remove) - len(items), "repositories"
+            )
+            file.write("\n")
+
+
+def _write_outside_collaborators(file, repo_and_outside_collaborators, limit=None):
+    """Write the outside collaborators section to a file handle"""
+    if repo_and_outside_collaborators:
+        file.write(
+            "## Outside Collaborators in CODEOWNERS :bust_in_silhouette:\n"
+            "These owners are outside collaborators of the organization, not members.\n\n"
+        )
+        items = list(repo_and_outside_collaborators.items())
+        for repo, users in items[:limit]:
             file.write(f"{repo}\n")
             for user in users:
                 file.write(f"- {user}\n")
             file.write("\n")
+        if limit is not None and len(items) > limit:
+            _write_more(file, len(items) - limit, "repositories")
+            file.write("\n")
+
+
+def _write_unowned_rules(file, repo_and_unowned_rules, limit=None):
+    """Write the rules left without owners section to a file handle"""
+    if repo_and_unowned_rules:
+        file.write(
+            "## Paths Left Without Owners :warning:\n"
+            "These rules lose all of their owners with the proposed changes.\n\n"
+        )
+        items = list(repo_and_unowned_rules.items())
+        for repo, rules in items[:limit]:
+            file.write(f"{repo}\n")
+            for line, pattern, count, paths in rules:
+                file.write(f"- line {line} `{pattern}`: {count} files\n")
+                for path in paths:
+                    file.write(f"  - {path}\n")
+                if count > len(paths):
+                    file.write(f"  - ...and {count - len(paths)} more files\n")
+            file.write("\n")
+        if limit is not None and len(items) > limit:
+            _write_more(file, len(items) - limit, "repositories")
+            file.write("\n")
 
 
-def _write_repos_missing_codeowners(file, repos_missing_codeowners, header_suffix=""):
+def _write_repos_missing_codeowners(
+    file, repos_missing_codeowners, header_suffix="", limit=None
+):
     """Write the repos missing CODEOWNERS section to a file handle"""
     if repos_missing_codeowners:
         file.write(f"## Repositories Missing or Empty CODEOWNERS{header_suffix}\n")
-        for repo in repos_missing_codeowners:
+        for repo in repos_missing_codeowners[:limit]:
             file.write(f"- {repo}\n")
+        _write_more(
+            file, len(repos_missing_codeowners[limit:]) if limit else 0, "repositories"
+        )
+        file.write("\n")
+
+
+def _write_pull_request_urls(file, pull_request_urls, limit=None):
+    """Write the pull requests created section to a file handle"""
+    if pull_request_urls:
+        file.write("## Pull Requests Created :link:\n")
+        for url in pull_request_urls[:limit]:
+            file.write(f"- {url}\n")
+        _write_more(
+            file, len(pull_request_urls[limit:]) if limit else 0, "pull requests"
+        )
         file.write("\n")
 
 
+def _write_more(file, count, noun):
+    """Write how many entries of a list were left out"""
+    if count > 0:
+        file.write(f"- ...and {count} more {noun}\n")
+
+
+def _format_owner_counts(owner_counts):
+    """Format the owners that were not checked for membership or an empty string"""
+    if not owner_counts or not any(owner_counts.values()):
+        return ""
+    return (
+        f"{owner_counts.get('team', 0)} team, {owner_counts.get('email', 0)} email "
+        f"and {owner_counts.get('invalid', 0)} invalid owners not checked for membership"
+    )
+
+
+def _write_stop_reason(file, stop_reason):
+    """Write a note that the run stopped before every repository was processed"""
+    if stop_reason:
+        file.write(
+            "## Partial Run :hourglass:\n"
+            f"The run stopped before every repository was processed: {stop_reason}.\n\n"
+        )
+
+
 def write_to_markdown(
     users_count,
     pull_count,
@@ -30,6 +131,10 @@ def write_to_markdown(
     codeowners_count,
     repo_and_users_to_remove,
     repos_missing_codeowners,
+    stop_reason=None,
+    owner_counts=None,
+    repo_and_outside_collaborators=None,
+    repo_and_unowned_rules=None,
 ):
     """Write the results to a markdown file"""
     with open("report.md", "w", encoding="utf-8") as file:
@@ -41,7 +146,12 @@ def write_to_markdown(
             f"{no_codeowners_count} Repositories missing or empty CODEOWNERS files\n"
             f"{codeowners_count} Repositories with CODEOWNERS file\n"
         )
+        if _format_owner_counts(owner_counts):
+            file.write(f"{_format_owner_counts(owner_counts)}\n")
+        _write_stop_reason(file, stop_reason)
         _write_repos_and_users_to_remove(file, repo_and_users_to_remove)
+        _write_outside_collaborators(file, repo_and_outside_collaborators)
+        _write_unowned_rules(file, repo_and_unowned_rules)
         _write_repos_missing_codeowners(file, repos_missing_codeowners)
 
 
@@ -56,8 +166,18 @@ def write_step_summary(
     error=None,
     pull_request_urls=None,
     enable_github_actions_step_summary=False,
+    stop_reason=None,
+    full_results_location=None,
+    owner_counts=None,
+    repo_and_outside_collaborators=None,
+    repo_and_unowned_rules=None,
 ):
-    """Write the results to the GitHub Actions step summary"""
+    """Write the results to the GitHub Actions step summary
+
+    When the complete lists would exceed the GitHub step summary size limit, only
+    the top entries of each list are written, followed by a pointer to the full
+    results. A summary still over the limit is truncated.
+    """
     if not enable_github_actions_step_summary:
         return
     summary_path = os.environ.get("GITHUB_STEP_SUMMARY")
@@ -65,37 +185,77 @@ def write_step_summary(
         print("GITHUB_STEP_SUMMARY not set, skipping step summary")
         return
 
-    with open(summary_path, "a", encoding="utf-8") as file:
-        all_clean = no_codeowners_count == 0 and users_count == 0
-        stats_emoji = " :white_check_mark:" if all_clean else " :warning:"
-        file.write(
-            "# Cleanowners Report\n\n"
-            f"## Overall Stats{stats_emoji}\n"
-            f"- Found {users_count} users to remove\n"
-            f"- Created {pull_count} pull requests successfully\n"
-            f"- Found {no_codeowners_count} repositories missing or empty CODEOWNERS files\n"
-            f"- Processed {codeowners_count} repositories with a CODEOWNERS file\n"
+    summary = io.StringIO()
+    all_clean = no_codeowners_count == 0 and users_count == 0
+    stats_emoji = " :white_check_mark:" if all_clean else " :warning:"
+    summary.write(
+        "# Cleanowners Report\n\n"
+        f"## Overall Stats{stats_emoji}\n"
+        f"- Found {users_count} users to remove\n"
+        f"- Created {pull_count} pull requests successfully\n"
+        f"- Found {no_codeowners_count} repositories missing or empty CODEOWNERS files\n"
+        f"- Processed {codeowners_count} repositories with a CODEOWNERS file\n"
+    )
+    if eligble_for_pr_count == 0:
+        summary.write("- No pull requests were needed\n")
+    else:
+        summary.write(
+            f"- {round((pull_count / eligble_for_pr_count) * 100, 2)}% of eligible repositories had pull requests created\n"
         )
-        if eligble_for_pr_count == 0:
-            file.write("- No pull requests were needed\n")
-        else:
-            file.write(
-                f"- {round((pull_count / eligble_for_pr_count) * 100, 2)}% of eligible repositories had pull requests created\n"
-            )
-        if codeowners_count + no_codeowners_count == 0:
-            file.write("- No repositories were processed\n")
-        else:
-            file.write(
-                f"- {round((codeowners_count / (codeowners_count + no_codeowners_count)) * 100, 2)}% of repositories had CODEOWNERS files\n"
-            )
-        file.write("\n")
-        warning_suffix = " :warning:" if not error else ""
-        _write_repos_and_users_to_remove(file, repo_and_users_to_remove, warning_suffix)
-        _write_repos_missing_codeowners(file, repos_missing_codeowners, warning_suffix)
-        if pull_request_urls:
-            file.write("## Pull Requests Created :link:\n")
-            for url in pull_request_urls:
-                file.write(f"- {url}\n")
-            file.write("\n")
-        if error:
-            file.write(f"## Error :x:\n\n{error}\n")
+    if codeowners_count + no_codeowners_count == 0:
+        summary.write("- No repositories were processed\n")
+    else:
+        summary.write(
+            f"- {round((codeowners_count / (codeowners_count + no_codeowners_count)) * 100, 2)}% of repositories had CODEOWNERS files\n"
+        )
+    if _format_owner_counts(owner_counts):
+        summary.write(f"- {_format_owner_counts(owner_counts)}\n")
+    summary.write("\n")
+    _write_stop_reason(summary, stop_reason)
+
+    warning_suffix = " :warning:" if not error else ""
+    lists = io.StringIO()
+    _write_repos_and_users_to_remove(lists, repo_and_users_to_remove, warning_suffix)
+    _write_outside_collaborators(lists, repo_and_outside_collaborators)
+    _write_unowned_rules(lists, repo_and_unowned_rules)
+    _write_repos_missing_codeowners(lists, repos_missing_codeowners, warning_suffix)
+    _write_pull_request_urls(lists, pull_request_urls)
+    if len((summary.getvalue() + lists.getvalue()).encode("utf-8")) > (
+        STEP_SUMMARY_MAX_BYTES
+    ):
+        # Keep the summary under the size limit with the top entries of each list
+        lists = io.StringIO()
+        _write_repos_and_users_to_remove(
+            lists, repo_and_users_to_remove, warning_suffix, STEP_SUMMARY_TOP_N
+        )
+        _write_outside_collaborators(
+            lists, repo_and_outside_collaborators, STEP_SUMMARY_TOP_N
+        )
+        _write_unowned_rules(lists, repo_and_unowned_rules, STEP_SUMMARY_TOP_N)
+        _write_repos_missing_codeowners(
+            lists, repos_missing_codeowners, warning_suffix, STEP_SUMMARY_TOP_N
+        )
+        _write_pull_request_urls(lists, pull_request_urls, STEP_SUMMARY_TOP_N)
+        lists.write(
+            "_This summary was shortened to stay under the GitHub step summary size limit."
+        )
+        if full_results_location:
+            lists.write(f" The full results are in {full_results_location}.")
+        lists.write("_\n\n")
+    summary.write(lists.getvalue())
+    if error:
+        summary.write(f"## Error :x:\n\n{error}\n")
+
+    text = summary.getvalue()
+    encoded = text.encode("utf-8")
+    if len(encoded) > STEP_SUMMARY_MAX_BYTES:
+        # The user lists of single repositories and the error text are not
+        # shortened above, so cut what is left over the limit
+        note = (
+            "\n\n_This summary was truncated at the GitHub step summary size limit._\n"
+        )
+        end = max(STEP_SUMMARY_MAX_BYTES - len(note.encode("utf-8")), 0)
+        text = encoded[:end].decode("utf-8", errors="ignore") + note
+
+    with open(summary_path, "a", encoding="utf-8") as file:
+        file.write(text)
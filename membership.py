@@ -0,0 +1,111 @@
+"""Cache organization membership lookups for the duration of a run."""
+
+import threading
+
+import github3
+
+# Outside collaborators returned by each page of the listing
+OUTSIDE_COLLABORATORS_PAGE_SIZE = 100
+
+
+class MembershipCache:  # pylint: disable=too-many-instance-attributes
+    """
+    Resolve and cache organization objects and membership checks.
+
+    A single cache is shared by every worker of a run. Membership is keyed by
+    organization and username so that a user who is a member of one
+    organization is never treated as a member of another. Organizations with
+    a membership snapshot are answered from the snapshot without API calls.
+    """
+
+    def __init__(self, github_connection, snapshots=None, metrics=None):
+        self._github_connection = github_connection
+        self._snapshots = snapshots or {}
+        self._metrics = metrics
+        self._organizations: dict[str, object] = {}
+        self._members: dict[tuple[str, str], bool] = {}
+        self._outside_collaborators: dict[str, set[str] | None] = {}
+        # Listings that failed, reported as errors of the run
+        self.errors: list[str] = []
+        self._lock = threading.Lock()
+
+    def get_org(self, organization: str):
+        """Return the organization object or None if it is not an organization."""
+        key = organization.lower()
+        with self._lock:
+            if key in self._organizations:
+                return self._organizations[key]
+        try:
+            gh_org = self._github_connection.organization(organization)
+        except github3.exceptions.NotFoundError:
+            gh_org = None
+        with self._lock:
+            self._organizations[key] = gh_org
+        return gh_org
+
+    def is_member(self, organization: str, username: str) -> bool | None:
+        """
+        Check whether a user is a member of an organization.
+
+        Args:
+            organization (str): The login of the organization
+            username (str): The GitHub username to check
+
+        Returns:
+            bool | None: the membership or None if the owner is not an organization
+        """
+        snapshot = self._snapshots.get(organization.lower())
+        if snapshot is not None:
+            return username in snapshot
+        key = (organization.lower(), username.lower())
+        with self._lock:
+            member = self._members.get(key)
+        if self._metrics:
+            self._metrics.record_cache("membership", member is not None)
+        if member is not None:
+            return member
+        gh_org = self.get_org(organization)
+        if not gh_org:
+            return None
+        member = bool(gh_org.is_member(username))
+        with self._lock:
+            self._members[key] = member
+        return member
+
+    def outside_collaborators(self, organization: str) -> set[str] | None:
+        """
+        Return the lowercase logins of the outside collaborators of an organization.
+
+        The whole list is fetched with one paginated listing the first time an
+        organization is asked for, so deciding on a handle makes no request.
+        A listing that fails, ie. without the organization owner permission,
+        is cached as None and recorded in errors, since any non member could
+        then be an outside collaborator.
+        """
+        key = organization.lower()
+        with self._lock:
+            if key in self._outside_collaborators:
+                return self._outside_collaborators[key]
+        session = self._github_connection.session
+        url = f"{session.base_url}/orgs/{organization}/outside_collaborators"
+        params: dict | None = {"per_page": OUTSIDE_COLLABORATORS_PAGE_SIZE}
+        collaborators: set[str] | None = set()
+        while url and collaborators is not None:
+            response = session.get(url, params=params)
+            if response.status_code != 200:
+                message = (
+                    f"Unable to list the outside collaborators of {organization}: "
+                    f"status {response.status_code}"
+                )
+                print(message)
+                with self._lock:
+                    self.errors.append(message)
+                collaborators = None
+                continue
+            collaborators.update(user["login"].lower() for user in response.json())
+            # The next page link already carries the query parameters
+            url = response.links.get("next", {}).get("url")
+            params = None
+        with self._lock:
+            self._outside_collaborators[key] = collaborators
+        return collaborators
@@ -0,0 +1,236 @@
+"""Export an organization roster to a memory-mapped membership snapshot file.
+
+A snapshot holds the lower case logins of the members of one organization,
+sorted so that a membership check is a binary search over the mapped file.
+The file is mapped read only, so every process that opens it shares the same
+pages instead of building its own set of logins.
+
+File layout, all integers little endian:
+    header: magic, version, organization length, member count, export time,
+            SHA-256 digest of everything after the header
+    the organization login
+    member count + 1 offsets (uint32) into the logins
+    the concatenated logins
+
+Usage:
+    python membership_snapshot.py export <organization> <path>
+    python membership_snapshot.py import <organization> <roster> <path>
+    python membership_snapshot.py check <path> <username> [<username> ...]
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import time
+from datetime import datetime, timezone
+
+import auth
+import env
+
+SNAPSHOT_MAGIC = b"CLNOWNRS"
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct("<8sHHIQ32s")
+OFFSET = struct.Struct("<I")
+
+
+def write_snapshot(path: str, organization: str, logins) -> int:
+    """
+    Write a membership snapshot file.
+
+    Args:
+        path (str): The file to write
+        organization (str): The login of the organization
+        logins: The logins of the members of the organization
+
+    Returns:
+        int: the number of members in the snapshot
+    """
+    members = sorted({login.lower().encode("utf-8") for login in logins})
+    offsets = bytearray()
+    position = 0
+    for member in members:
+        offsets += OFFSET.pack(position)
+        position += len(member)
+    offsets += OFFSET.pack(position)
+    organization_bytes = organization.lower().encode("utf-8")
+    body = organization_bytes + bytes(offsets) + b"".join(members)
+    header = HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_VERSION,
+        len(organization_bytes),
+        len(members),
+        int(time.time()),
+        hashlib.sha256(body).digest(),
+    )
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(header + body)
+    os.replace(temporary_path, path)
+    return len(members)
+
+
+class MembershipSnapshot:
+    """
+    Check membership against a memory-mapped snapshot file.
+
+    Raises:
+        ValueError: if the file is not a snapshot, has an unknown version or
+            does not match its digest
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_header()
+        except ValueError:
+            self._map.close()
+            raise
+
+    def _read_header(self):
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{self.path} is not a membership snapshot")
+        magic, version, organization_length, count, exported_at, digest = (
+            HEADER.unpack_from(self._map)
+        )
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{self.path} is not a membership snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"{self.path} has unsupported snapshot version {version}")
+        header_end = HEADER.size
+        with memoryview(self._map) as view:
+            with view[header_end:] as body:
+                if hashlib.sha256(body).digest() != digest:
+                    raise ValueError(f"{self.path} does not match its digest")
+        offsets_start = header_end + organization_length
+        self.organization = self._map[header_end:offsets_start].decode("utf-8")
+        self._offsets_start = offsets_start
+        self.count = count
+        self.exported_at = datetime.fromtimestamp(exported_at, timezone.utc)
+        self._logins_start = self._offsets_start + (count + 1) * OFFSET.size
+
+    def _login(self, index: int) -> bytes:
+        start, end = struct.unpack_from(
+            "<II", self._map, self._offsets_start + index * OFFSET.size
+        )
+        start += self._logins_start
+        end += self._logins_start
+        return self._map[start:end]
+
+    def __contains__(self, username: str) -> bool:
+        target = username.lower().encode("utf-8")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._login(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low < self.count and self._login(low) == target
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """Unmap the snapshot file."""
+        self._map.close()
+
+
+def load_snapshots(paths) -> dict[str, MembershipSnapshot]:
+    """Open snapshot files and key them by the lower case organization login."""
+    snapshots = {}
+    for path in paths:
+        snapshot = MembershipSnapshot(path)
+        print(
+            f"Using membership snapshot {path} for {snapshot.organization} with "
+            f"{len(snapshot)} members exported at {snapshot.exported_at.isoformat()}"
+        )
+        snapshots[snapshot.organization] = snapshot
+    return snapshots
+
+
+def export_snapshot(github_connection, organization: str, path: str) -> int:
+    """Write a snapshot of the current members of an organization."""
+    gh_org = github_connection.organization(organization)
+    return write_snapshot(
+        path, organization, (member.login for member in gh_org.members())
+    )
+
+
+def import_roster(roster_path: str, organization: str, path: str) -> int:
+    """Write a snapshot from a roster file listing one login per line."""
+    with open(roster_path, "r", encoding="utf-8") as file:
+        logins = [
+            line.strip().lstrip("@")
+            for line in file
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+    return write_snapshot(path, organization, logins)
+
+
+def main(argv=None):
+    """Export a membership snapshot or check usernames against one"""
+    parser = argparse.ArgumentParser(
+        description="Export or query a cleanowners membership snapshot"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser(
+        "export", help="export the members of an organization"
+    )
+    export_parser.add_argument("organization")
+    export_parser.add_argument("path")
+    import_parser = subparsers.add_parser(
+        "import", help="import a roster file with one login per line"
+    )
+    import_parser.add_argument("organization")
+    import_parser.add_argument("roster")
+    import_parser.add_argument("path")
+    check_parser = subparsers.add_parser(
+        "check", help="check whether users are in a snapshot"
+    )
+    check_parser.add_argument("path")
+    check_parser.add_argument("usernames", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        (
+            gh_app_id,
+            gh_app_installation_id,
+            gh_app_private_key_bytes,
+            gh_app_enterprise_only,
+            token,
+            ghe,
+        ) = env.get_auth_env_vars()
+        github_connection = auth.auth_to_github(
+            token,
+            gh_app_id,
+            gh_app_installation_id,
+            gh_app_private_key_bytes,
+            ghe,
+            gh_app_enterprise_only,
+        )
+        count = export_snapshot(github_connection, args.organization, args.path)
+        print(f"Exported {count} members of {args.organization} to {args.path}")
+        return count
+    if args.command == "import":
+        count = import_roster(args.roster, args.organization, args.path)
+        print(f"Imported {count} members of {args.organization} to {args.path}")
+        return count
+
+    snapshot = MembershipSnapshot(args.path)
+    try:
+        members = {
+            username: username.lstrip("@") in snapshot for username in args.usernames
+        }
+    finally:
+        snapshot.close()
+    for username, member in members.items():
+        print(f"{username}\t{'member' if member else 'not a member'}")
+    return members
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
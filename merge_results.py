@@ -0,0 +1,45 @@
+"""Merge the partial results of cleanowners runs into one report.
+
+The partial results are the JSON files written by sharded runs and the NDJSON
+streams written with RESULTS_FILE, which also allows rebuilding the report of a
+run that crashed before writing it.
+
+Usage: python merge_results.py 'cleanowners-shard-*.json' [more files or patterns]
+"""
+
+import glob
+import sys
+
+import env
+from cleanowners import report_results
+from results_stream import read_results_stream
+from shards import merge_partial_results
+
+
+def main(argv=None):
+    """Merge the partial results files and streams and write the report and step summary"""
+    patterns = sys.argv[1:] if argv is None else argv
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    if not paths:
+        raise ValueError("No partial results files matched the given patterns")
+
+    print(f"Merging {len(paths)} partial results files")
+    results = merge_partial_results(
+        [path for path in paths if not path.endswith(".ndjson")]
+    )
+    for path in paths:
+        if path.endswith(".ndjson"):
+            read_results_stream(path, results)
+    error_message = report_results(
+        results,
+        issue_report=True,
+        enable_github_actions_step_summary=env.get_bool_env_var(
+            "ENABLE_GITHUB_ACTIONS_STEP_SUMMARY", default=True
+        ),
+    )
+    if error_message:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,268 @@
+"""Export the metrics of a run as an OpenMetrics text file.
+
+The file is meant for the textfile collector of the Prometheus node exporter
+on self-hosted runners, so that the throughput of the scans can be graphed
+across runs. Every value describes the latest run.
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# Upper bounds of the API request latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Quantiles of the per-repository processing time
+REPOSITORY_QUANTILES = (0.5, 0.9, 0.99)
+# Rate limit resources reported when the budget knows them
+RATE_LIMIT_RESOURCES = ("core", "graphql", "search")
+# Metric name and help of each counter computed by ScanResults
+RESULT_COUNTS = {
+    "users_count": ("users_to_remove", "Users to remove found by the run"),
+    "pull_count": ("pull_requests_created", "Pull requests created by the run"),
+    "eligble_for_pr_count": (
+        "repositories_eligible_for_pr",
+        "Repositories that needed a pull request",
+    ),
+    "no_codeowners_count": (
+        "repositories_missing_codeowners",
+        "Repositories with a missing or empty CODEOWNERS file",
+    ),
+    "codeowners_count": (
+        "repositories_with_codeowners",
+        "Repositories with a CODEOWNERS file",
+    ),
+}
+
+
+def get_endpoint(method: str, url: str) -> str:
+    """
+    Group the requests to an API URL by endpoint, without repository or user names.
+
+    Returns:
+        str: the method and path template, ie. GET /repos/{owner}/{repo}/contents
+    """
+    segments = [segment for segment in urlparse(url).path.split("/") if segment]
+    # GitHub Enterprise Server serves the API from /api/v3 and /api/graphql
+    if segments[:1] == ["api"]:
+        segments = segments[2:] if segments[1:2] == ["v3"] else segments[1:]
+    if segments[:1] == ["repos"] and len(segments) >= 3:
+        segments = ["repos", "{owner}", "{repo}"] + segments[3:4]
+    elif segments[:1] in (["orgs"], ["users"], ["enterprises"]) and len(segments) >= 2:
+        segments = [segments[0], "{name}"] + segments[2:3]
+    return f"{method} /{'/'.join(segments)}"
+
+
+def _escape(value: str) -> str:
+    """Escape a label value"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def get_quantile(sorted_values: list[float], quantile: float) -> float:
+    """Return the nearest-rank quantile of sorted values"""
+    index = max(math.ceil(quantile * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+class RunMetrics:
+    """
+    Collect the timings of a run.
+
+    API requests are timed from a response hook on the shared session, so
+    every worker records into the same metrics under a lock.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.phases: dict[str, float] = {}
+        # Bucket counts, sum and count of the latency of each endpoint
+        self.latencies: dict[str, list] = {}
+        self.repository_durations: list[float] = []
+        # Hits and misses of each cache
+        self.caches: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, session) -> None:
+        """Time the requests of a session"""
+        session.hooks["response"].append(self.record_response)
+
+    def record_response(self, response, *_args, **_kwargs):
+        """Record the latency of an API request"""
+        endpoint = get_endpoint(response.request.method or "GET", response.url or "")
+        seconds = response.elapsed.total_seconds()
+        with self._lock:
+            buckets, total, count = self.latencies.get(
+                endpoint, [[0] * len(LATENCY_BUCKETS), 0.0, 0]
+            )
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[index] += 1
+            self.latencies[endpoint] = [buckets, total + seconds, count + 1]
+        return response
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a phase of the run"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = (
+                    self.phases.get(name, 0.0) + time.monotonic() - started
+                )
+
+    def record_repository(self, seconds: float) -> None:
+        """Record the processing time of a repository"""
+        with self._lock:
+            self.repository_durations.append(seconds)
+
+    def record_cache(self, name: str, hit: bool) -> None:
+        """Record a lookup in a cache"""
+        with self._lock:
+            counts = self.caches.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def render(self, results, budget=None) -> str:
+        """Render the metrics of the run in the OpenMetrics text format"""
+        lines: list[str] = []
+
+        def family(name, metric_type, help_text, samples):
+            lines.append(f"# TYPE cleanowners_{name} {metric_type}")
+            lines.append(f"# HELP cleanowners_{name} {help_text}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(
+                    f'{key}="{_escape(str(label))}"' for key, label in labels.items()
+                )
+                label_text = f"{{{label_text}}}" if label_text else ""
+                lines.append(
+                    f"cleanowners_{name}{suffix}{label_text} {_format_value(value)}"
+                )
+
+        with self._lock:
+            for key, (name, help_text) in RESULT_COUNTS.items():
+                family(name, "gauge", help_text, [("", {}, results.counts[key])])
+            family(
+                "owners_not_checked",
+                "gauge",
+                "Owners counted instead of checked for membership",
+                [
+                    ("", {"category": category}, count)
+                    for category, count in sorted(results.owner_counts.items())
+                ],
+            )
+            family(
+                "errors", "gauge", "Errors of the run", [("", {}, len(results.errors))]
+            )
+            family(
+                "stopped",
+                "gauge",
+                "Whether the run stopped before every repository was processed",
+                [("", {}, int(bool(results.stop_reason)))],
+            )
+            family(
+                "run_timestamp_seconds",
+                "gauge",
+                "When the run finished",
+                [("", {}, round(time.time(), 3))],
+            )
+            family(
+                "run_duration_seconds",
+                "gauge",
+                "Duration of the run",
+                [("", {}, round(time.monotonic() - self.started, 3))],
+            )
+            family(
+                "phase_duration_seconds",
+                "gauge",
+                "Duration of each phase of the run",
+                [
+                    ("", {"phase": name}, round(seconds, 3))
+                    for name, seconds in sorted(self.phases.items())
+                ],
+            )
+            self._render_latencies(family)
+            if budget:
+                self._render_rate_limit(family, budget)
+            family(
+                "cache_hit_ratio",
+                "gauge",
+                "Share of the lookups answered by each cache",
+                [
+                    ("", {"cache": name}, round(hits / (hits + misses), 4))
+                    for name, (hits, misses) in sorted(self.caches.items())
+                ],
+            )
+            durations = sorted(self.repository_durations)
+            family(
+                "repository_duration_seconds",
+                "summary",
+                "Processing time of each repository",
+                [
+                    (
+                        "",
+                        {"quantile": quantile},
+                        round(get_quantile(durations, quantile), 3),
+                    )
+                    for quantile in REPOSITORY_QUANTILES
+                    if durations
+                ]
+                + [
+                    ("_sum", {}, round(sum(durations), 3)),
+                    ("_count", {}, len(durations)),
+                ],
+            )
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def _render_latencies(self, family) -> None:
+        samples = []
+        for endpoint, (buckets, total, count) in sorted(self.latencies.items()):
+            for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                samples.append(
+                    ("_bucket", {"endpoint": endpoint, "le": bound}, bucket_count)
+                )
+            samples.append(("_bucket", {"endpoint": endpoint, "le": "+Inf"}, count))
+            samples.append(("_sum", {"endpoint": endpoint}, round(total, 3)))
+            samples.append(("_count", {"endpoint": endpoint}, count))
+        family(
+            "api_request_duration_seconds",
+            "histogram",
+            "Latency of the API requests of each endpoint",
+            samples,
+        )
+
+    @staticmethod
+    def _render_rate_limit(family, budget) -> None:
+        remaining = []
+        limits = []
+        for resource in RATE_LIMIT_RESOURCES:
+            if budget.remaining(resource) is not None:
+                remaining.append(
+                    ("", {"resource": resource}, budget.remaining(resource))
+                )
+            if budget.limit(resource) is not None:
+                limits.append(("", {"resource": resource}, budget.limit(resource)))
+        family(
+            "rate_limit_remaining",
+            "gauge",
+            "Remaining API calls at the end of the run",
+            remaining,
+        )
+        family("rate_limit_limit", "gauge", "Hourly API call limit", limits)
+
+    def write(self, path: str, results, budget=None) -> None:
+        """Write the metrics file atomically, so a collector never reads half of it"""
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write(self.render(results, budget))
+        os.replace(temporary_path, path)
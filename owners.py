@@ -0,0 +1,145 @@
+"""Split the owners of a CODEOWNERS file and classify them with the login syntax of GitHub."""
+
+import re
+
+# Categories of the owner tokens of a CODEOWNERS file
+OWNER_USER = "user"
+OWNER_TEAM = "team"
+OWNER_EMAIL = "email"
+OWNER_INVALID = "invalid"
+# Owners that are counted in the report instead of checked for membership
+UNCHECKED_OWNER_CATEGORIES = (OWNER_TEAM, OWNER_EMAIL, OWNER_INVALID)
+# Logins are alphanumeric with single inner hyphens, underscores come from
+# Enterprise Managed Users
+LOGIN_PATTERN = re.compile(r"^[A-Za-z0-9](?:[A-Za-z0-9_]|-(?=[A-Za-z0-9_])){0,38}$")
+TEAM_SLUG_PATTERN = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*$")
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def classify_owner(token):
+    """
+    Classify an owner token of a CODEOWNERS file with the login syntax of GitHub.
+
+    Args:
+        token: An owner of a CODEOWNERS line, ie. @alice, @org/team or dev@example.com
+
+    Returns:
+        str: OWNER_USER, OWNER_TEAM, OWNER_EMAIL or OWNER_INVALID
+    """
+    if token.startswith("@"):
+        handle = token[1:]
+        organization, slash, team = handle.partition("/")
+        if slash:
+            if LOGIN_PATTERN.match(organization) and TEAM_SLUG_PATTERN.match(team):
+                return OWNER_TEAM
+            return OWNER_INVALID
+        return OWNER_USER if LOGIN_PATTERN.match(handle) else OWNER_INVALID
+    return OWNER_EMAIL if EMAIL_PATTERN.match(token) else OWNER_INVALID
+
+
+def get_owner_tokens(codeowners_file_contents):
+    """
+    Split the CODEOWNERS file into its owner tokens.
+
+    The owners of a line follow its pattern, up to an inline comment. Lines
+    that start with an owner have no pattern.
+
+    Returns:
+        list[tuple]: (line number, pattern, token) of each owner token
+    """
+    tokens = []
+    lines = codeowners_file_contents.splitlines()
+    for line_number, line in enumerate(lines, start=1):
+        line = line.decode() if isinstance(line, bytes) else line
+        fields = line.split()
+        # skip comments and empty lines
+        if not fields or fields[0].startswith("#"):
+            continue
+        pattern = "" if fields[0].startswith("@") else fields[0]
+        for token in fields[1:] if pattern else fields:
+            if token.startswith("#"):
+                break
+            tokens.append((line_number, pattern, token))
+    return tokens
+
+
+def count_owner_categories(codeowners_file_contents):
+    """Count the owners of the CODEOWNERS file that are not checked for membership"""
+    counts = {category: 0 for category in UNCHECKED_OWNER_CATEGORIES}
+    for _, _, token in get_owner_tokens(codeowners_file_contents):
+        category = classify_owner(token)
+        if category in counts:
+            counts[category] += 1
+    return counts
+
+
+def get_owner_entries(codeowners_file_contents):
+    """
+    Extract every user and team owner of the CODEOWNERS file with where it appears.
+
+    Returns:
+        list[tuple]: (handle, line number, pattern) of each owner, the handle
+        lowercase without the @, ie. alice or org/team
+    """
+    return [
+        (token[1:].lower(), line_number, pattern)
+        for line_number, pattern, token in get_owner_tokens(codeowners_file_contents)
+        if classify_owner(token) in (OWNER_USER, OWNER_TEAM)
+    ]
+
+
+def remove_usernames_from_content(content, usernames, changed_lines):
+    """Remove several @usernames from CODEOWNERS content in one pass over its lines.
+
+    Args:
+        content: The current CODEOWNERS file content as bytes.
+        usernames: The GitHub usernames to remove (without @).
+        changed_lines: A set[int] tracking which line indices were modified.
+
+    Returns:
+        The updated content with the usernames removed.
+    """
+    pattern = re.compile(
+        rb"@(?:"
+        + b"|".join(re.escape(username.encode("ASCII")) for username in usernames)
+        + rb")(?=\s|$)"
+    )
+    lines = content.split(b"\n")
+    for i, line in enumerate(lines):
+        new_line = pattern.sub(b"", line)
+        if new_line != line:
+            lines[i] = new_line
+            changed_lines.add(i)
+    return b"\n".join(lines)
+
+
+def cleanup_whitespace(content, changed_lines):
+    """Normalize whitespace only on lines where usernames were removed.
+
+    Args:
+        content: The CODEOWNERS file content as bytes.
+        changed_lines: A set[int] of line indices to clean up.
+
+    Returns:
+        The content with extra whitespace removed on affected lines.
+    """
+    lines = content.split(b"\n")
+    for i in changed_lines:
+        lines[i] = re.sub(rb"[ \t]{2,}", b" ", lines[i])
+        lines[i] = re.sub(rb"[ \t]+(?=\r?$)", b"", lines[i])
+    return b"\n".join(lines)
+
+
+def remove_owners_from_content(content, usernames):
+    """Remove the @usernames from CODEOWNERS content and clean up the lines they were on.
+
+    Args:
+        content: The CODEOWNERS file content as bytes.
+        usernames: The GitHub usernames to remove (without @).
+
+    Returns:
+        The new content.
+    """
+    changed_lines: set[int] = set()
+    content = remove_usernames_from_content(content, usernames, changed_lines)
+    return cleanup_whitespace(content, changed_lines)
@@ -0,0 +1,275 @@
+"""Find the paths of a repository that a CODEOWNERS change leaves without owners."""
+
+import re
+from urllib.parse import quote
+
+# Files listed for each rule left without owners, the others are only counted
+UNOWNED_PATHS_PER_RULE = 10
+
+
+def get_rules(codeowners_file_contents) -> list[tuple[int, str, int]]:
+    """
+    Split the CODEOWNERS file into its rules.
+
+    Negated patterns and character ranges are not supported by GitHub, so
+    their lines are left out like GitHub does.
+
+    Returns:
+        list[tuple]: (line number, pattern, number of owners) of each rule in file order
+    """
+    rules = []
+    lines = codeowners_file_contents.splitlines()
+    for line_number, line in enumerate(lines, start=1):
+        line = line.decode() if isinstance(line, bytes) else line
+        fields = line.split()
+        if not fields or fields[0].startswith(("#", "@", "!")) or "[" in fields[0]:
+            continue
+        owners = 0
+        for token in fields[1:]:
+            if token.startswith("#"):
+                break
+            owners += 1
+        rules.append((line_number, fields[0], owners))
+    return rules
+
+
+def translate_pattern(pattern: str) -> str:
+    """Translate a CODEOWNERS glob into a regular expression on a path"""
+    regex = []
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            regex.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("**", index):
+            regex.append(".*")
+            index += 2
+        elif pattern[index] == "*":
+            regex.append("[^/]*")
+            index += 1
+        elif pattern[index] == "?":
+            regex.append("[^/]")
+            index += 1
+        elif pattern[index] == "\\" and index + 1 < len(pattern):
+            regex.append(re.escape(pattern[index + 1]))
+            index += 2
+        else:
+            regex.append(re.escape(pattern[index]))
+            index += 1
+    return "".join(regex)
+
+
+class OwnershipMatcher:
+    """
+    Find the last CODEOWNERS rule matching each file of a repository.
+
+    Patterns without wildcards are looked up in dictionaries, by full path
+    when they contain a slash and by name otherwise, and so are the names
+    ending in an extension, like *.js. The other wildcard patterns are
+    compiled into regular expressions whose alternatives are ordered from
+    the last rule to the first, so the first alternative that matches is
+    the rule that wins. Anchored patterns starting with a literal directory
+    get a regular expression per directory, so a path is only tried against
+    the rules of its top directory. Files are evaluated against the rules
+    once, directories once for all the files below them.
+    """
+
+    def __init__(self, patterns):
+        # Rules are keyed by kind and whether they are anchored to the root.
+        # "any" rules match files and directories and own everything under a
+        # matched directory, "dir" rules only match directories (a trailing /)
+        # and "file" rules only own the files they name, like docs/* which
+        # does not own the files of nested directories
+        literals: dict[tuple[str, bool], dict[str, int]] = {}
+        extensions: dict[str, dict[str, int]] = {}
+        alternatives: dict[tuple[str, bool, str], list[str]] = {}
+        for index, pattern in enumerate(patterns):
+            kind = "dir" if pattern.endswith("/") else "any"
+            pattern = pattern.rstrip("/")
+            if pattern.startswith("**/") and "/" not in pattern[3:]:
+                # **/name matches the name in any directory, like name alone
+                pattern = pattern[3:]
+            anchored = "/" in pattern
+            pattern = pattern.lstrip("/")
+            if not pattern:
+                # The root directory itself, ie. /, owns everything
+                pattern, anchored, kind = "**", True, "any"
+            if anchored and pattern.rpartition("/")[2] == "*":
+                kind = "file"
+            if not any(character in pattern for character in "*?\\"):
+                literals.setdefault((kind, anchored), {})[pattern] = index
+            elif (
+                not anchored
+                and pattern.startswith("*.")
+                and not any(character in pattern[1:] for character in "*?\\")
+            ):
+                extensions.setdefault(kind, {})[pattern[1:]] = index
+            else:
+                top = pattern.partition("/")[0] if anchored else ""
+                if any(character in top for character in "*?\\"):
+                    top = ""
+                alternatives.setdefault((kind, anchored, top), []).insert(
+                    0, f"(?P<r{index}>{translate_pattern(pattern)})"
+                )
+        globs = {
+            key: re.compile("|".join(regexes)) for key, regexes in alternatives.items()
+        }
+        # The lookups of each kind: literal paths, literal names, extensions,
+        # anchored wildcards, anchored wildcards by top directory and
+        # unanchored wildcards
+        self._tables = {
+            kind: (
+                literals.get((kind, True), {}),
+                literals.get((kind, False), {}),
+                extensions.get(kind, {}),
+                globs.get((kind, True, "")),
+                {
+                    top: regex
+                    for (key_kind, anchored, top), regex in globs.items()
+                    if key_kind == kind and anchored and top
+                },
+                globs.get((kind, False, "")),
+            )
+            for kind in ("any", "dir", "file")
+        }
+
+    def match(self, path: str, is_directory: bool) -> int:
+        """
+        Find the last rule that names a file or directory, without its parents.
+
+        Returns:
+            int: the index of the rule or -1 when no rule matches
+        """
+        name = path.rpartition("/")[2]
+        best = -1
+        for kind in ("any", "dir" if is_directory else "file"):
+            paths, names, extensions, path_glob, top_globs, name_glob = self._tables[
+                kind
+            ]
+            best = max(best, paths.get(path, -1), names.get(name, -1))
+            if extensions:
+                dot = name.find(".")
+                while dot != -1:
+                    best = max(best, extensions.get(name[dot:], -1))
+                    dot = name.find(".", dot + 1)
+            for regex, key in (
+                (path_glob, path),
+                (top_globs.get(path.partition("/")[0]), path),
+                (name_glob, name),
+            ):
+                found = regex.fullmatch(key) if regex else None
+                if found and found.lastgroup:
+                    best = max(best, int(found.lastgroup[1:]))
+        return best
+
+    def winners(self, paths):
+        """
+        Find the rule owning each file, the last rule matching it or its directories.
+
+        Args:
+            paths: The paths of the files of the repository
+
+        Yields:
+            tuple[str, int]: each path and the index of its rule, -1 for unmatched files
+        """
+        directories: dict[str, int] = {"": -1}
+        for path in paths:
+            directory = path.rpartition("/")[0]
+            pending = []
+            while directory not in directories:
+                pending.append(directory)
+                directory = directory.rpartition("/")[0]
+            inherited = directories[directory]
+            for directory in reversed(pending):
+                inherited = max(inherited, self.match(directory, True))
+                directories[directory] = inherited
+            yield path, max(inherited, self.match(path, False))
+
+    def count_files(self, paths) -> dict[int, int]:
+        """
+        Count the files owned through each rule, the last rule matching them.
+
+        Args:
+            paths: The paths of the files of the repository
+
+        Returns:
+            dict[int, int]: the number of files of each rule index, -1 for unmatched files
+        """
+        counts: dict[int, int] = {}
+        for _, rule in self.winners(paths):
+            counts[rule] = counts.get(rule, 0) + 1
+        return counts
+
+
+def get_tree_paths(repo, ref: str) -> tuple[list[str] | None, bool]:
+    """
+    List the files of a branch with a single recursive tree request.
+
+    The JSON is read directly instead of through github3 objects, which
+    stays fast on trees with hundreds of thousands of entries.
+
+    Returns:
+        tuple: the file paths or None when the request failed, and whether
+        GitHub truncated the tree
+    """
+    response = repo.session.get(
+        f"{repo.url}/git/trees/{quote(ref, safe='')}", params={"recursive": 1}
+    )
+    if response.status_code != 200:
+        print(f"Unable to list the files of {repo.full_name}: {response.status_code}")
+        return None, False
+    payload = response.json()
+    paths = [
+        entry["path"] for entry in payload.get("tree", []) if entry["type"] == "blob"
+    ]
+    return paths, bool(payload.get("truncated"))
+
+
+def find_unowned_rules(repo, codeowners_before, codeowners_after):
+    """
+    Find the rules a CODEOWNERS change leaves without owners and the files they own.
+
+    The tree is only fetched when a rule loses its last owner. The first
+    UNOWNED_PATHS_PER_RULE files of each rule are listed with the count of
+    all of them.
+
+    Returns:
+        list[tuple[int, str, int, list[str]]]: (line number, pattern, number of
+        files, first files) of each rule left without owners that still wins
+        for some files
+    """
+    rules = get_rules(codeowners_before)
+    owners_after = {line: owners for line, _, owners in get_rules(codeowners_after)}
+    emptied = [
+        index
+        for index, (line, _, owners) in enumerate(rules)
+        if owners and not owners_after.get(line)
+    ]
+    if not emptied:
+        return []
+    paths, truncated = get_tree_paths(repo, repo.default_branch)
+    if paths is None:
+        return []
+    if truncated:
+        print(f"\tThe tree of {repo.full_name} is truncated, file counts are partial")
+    matcher = OwnershipMatcher([pattern for _, pattern, _ in rules])
+    counts = dict.fromkeys(emptied, 0)
+    files: dict[int, list[str]] = {index: [] for index in emptied}
+    for path, rule in matcher.winners(paths):
+        if rule in counts:
+            counts[rule] += 1
+            if len(files[rule]) < UNOWNED_PATHS_PER_RULE:
+                files[rule].append(path)
+    unowned_rules = []
+    for index in emptied:
+        line, pattern, _ = rules[index]
+        if counts[index]:
+            print(
+                f"\tLine {line} {pattern} leaves {counts[index]} files without owners"
+            )
+            for path in files[index]:
+                print(f"\t\t{path}")
+            if counts[index] > len(files[index]):
+                print(f"\t\t...and {counts[index] - len(files[index])} more files")
+            unowned_rules.append((line, pattern, counts[index], files[index]))
+    return unowned_rules
@@ -0,0 +1,74 @@
+"""Fetch the next pages of a repository listing while the current page is processed."""
+
+import queue
+import threading
+
+# Repositories buffered ahead of the scan, two pages of the largest page size
+PREFETCH_BUFFER_SIZE = 200
+# Seconds between checks of whether the scan stopped while the buffer is full
+PUT_TIMEOUT = 0.1
+
+
+class RepositoryPrefetcher:
+    """
+    Iterate over a paginated github3 listing from a background thread.
+
+    The listing requests its next page only once every repository of the
+    current page was handed out, so without prefetching every page request
+    waits for the scan of the previous page. A bounded buffer keeps the
+    listing at most PREFETCH_BUFFER_SIZE repositories ahead of the scan.
+
+    last_url follows the page of the repository handed out last, like the
+    last_url of the listing itself, so checkpoints resume from the right page.
+    """
+
+    def __init__(self, repositories, buffer_size=PREFETCH_BUFFER_SIZE):
+        self._repositories = repositories
+        self._queue: queue.Queue = queue.Queue(maxsize=buffer_size)
+        self._stopped = threading.Event()
+        self.last_url = getattr(repositories, "last_url", None)
+        self._thread = threading.Thread(target=self._fetch, daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        """Add an item to the buffer unless the scan stopped first"""
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fetch(self) -> None:
+        try:
+            for repository in self._repositories:
+                page_url = getattr(self._repositories, "last_url", None)
+                if not self._put(("repository", repository, page_url)):
+                    return
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            # Raised again by the scan, which records it as an error of the organization
+            self._put(("error", error, None))
+            return
+        self._put(("end", None, None))
+
+    def __iter__(self):
+        while True:
+            kind, value, page_url = self._queue.get()
+            if kind == "end":
+                return
+            if kind == "error":
+                raise value
+            self.last_url = page_url
+            yield value
+
+    def close(self) -> None:
+        """Stop fetching, ie. when the scan stops before the end of the listing"""
+        self._stopped.set()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc_info):
+        self.close()
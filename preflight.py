@@ -0,0 +1,226 @@
+"""Estimate the API calls of a run and check that they fit the rate limit budget."""
+
+import math
+from dataclasses import dataclass
+
+from github_graphql import graphql_query
+
+# Repositories returned by each page of the organization repository listing
+LISTING_PAGE_SIZE = 100
+# Requests to find the CODEOWNERS file of a repository in the worst case
+CODEOWNERS_READS_PER_REPO = 3
+# Requests to open a pull request: read the default branch and the file
+PULL_REQUEST_READS = 2
+# Requests to open a pull request: create the branch, commit, open it
+PULL_REQUEST_WRITES = 3
+# Secondary rate limit of GitHub on requests that create content
+CONTENT_CREATION_LIMIT_PER_HOUR = 500
+# Organizations counted by each GraphQL query
+ORGANIZATIONS_PER_QUERY = 50
+# GraphQL queries of BRANCHES per repository: list the branches, read their blobs
+BRANCH_QUERIES_PER_REPO = 2
+
+
+@dataclass
+class PreflightEstimate:  # pylint: disable=too-many-instance-attributes
+    """The expected API calls of a run and the budget available to it"""
+
+    repositories: int
+    listing_reads: int
+    codeowners_reads: int
+    membership_reads: int
+    pull_requests: int
+    remaining: int | None
+    limit: int | None
+    from_history: bool = False
+    # Collaborator listings of CHECK_WRITE_ACCESS
+    collaborator_reads: int = 0
+    # Recursive tree listings of UNOWNED_PATHS
+    tree_reads: int = 0
+    # GraphQL queries of BRANCHES and the budget of the graphql resource
+    graphql_queries: int = 0
+    graphql_remaining: int | None = None
+
+    @property
+    def reads(self) -> int:
+        """Return the estimated read requests"""
+        return (
+            self.listing_reads
+            + self.codeowners_reads
+            + self.membership_reads
+            + self.collaborator_reads
+            + self.tree_reads
+            + self.pull_requests * PULL_REQUEST_READS
+        )
+
+    @property
+    def writes(self) -> int:
+        """Return the estimated write requests"""
+        return self.pull_requests * PULL_REQUEST_WRITES
+
+    @property
+    def fits(self) -> bool:
+        """Return True when the run fits in the remaining budget"""
+        if self.graphql_queries and (
+            self.graphql_remaining is None
+            or self.graphql_queries > self.graphql_remaining
+        ):
+            return False
+        if self.remaining is None:
+            return self.reads + self.writes == 0
+        return self.reads + self.writes <= self.remaining
+
+
+def count_repositories(github_connection, organization_list) -> dict[str, tuple]:
+    """
+    Count the repositories of each organization with GraphQL totalCount.
+
+    Returns:
+        dict: (all repositories, repositories that are not archived) of each organization
+    """
+    counts = {}
+    for start in range(0, len(organization_list), ORGANIZATIONS_PER_QUERY):
+        batch = organization_list[start:][:ORGANIZATIONS_PER_QUERY]
+        fields = "\n".join(f"""org{index}: organization(login: $org{index}) {{
+              all: repositories {{ totalCount }}
+              active: repositories(isArchived: false) {{ totalCount }}
+            }}""" for index in range(len(batch)))
+        parameters = ", ".join(f"$org{index}: String!" for index in range(len(batch)))
+        data = graphql_query(
+            github_connection,
+            f"query({parameters}) {{\n{fields}\n}}",
+            {f"org{index}": organization for index, organization in enumerate(batch)},
+        )
+        for index, organization in enumerate(batch):
+            node = data[f"org{index}"]
+            counts[organization] = (
+                node["all"]["totalCount"],
+                node["active"]["totalCount"],
+            )
+    return counts
+
+
+def estimate_run(
+    github_connection,
+    organization_list,
+    repository_list,
+    budget,
+    exempt_count=0,
+    shard_count=1,
+    dry_run=False,
+    snapshot_organizations=(),
+    history=None,
+    check_write_access=False,
+    branches=False,
+    unowned_paths=False,
+) -> PreflightEstimate:
+    """
+    Estimate the API calls of a run from cheap counts of its repositories.
+
+    Membership checks and pull requests are scaled from the latest run in the
+    history database when there is one. Otherwise one new handle to check and
+    one pull request per repository are assumed, which makes the membership
+    checks a lower bound since a repository can list many handles.
+
+    CHECK_WRITE_ACCESS adds one collaborators listing per repository, BRANCHES
+    its GraphQL queries, checked against the graphql budget, and UNOWNED_PATHS
+    one tree listing per repository that loses owners, even in a dry run.
+    """
+    budget.refresh(github_connection)
+    if repository_list:
+        listing_reads = len(repository_list)
+        repositories = len(repository_list)
+    else:
+        counts = count_repositories(github_connection, organization_list)
+        listing_reads = sum(
+            math.ceil(total / LISTING_PAGE_SIZE) for total, _ in counts.values()
+        )
+        repositories = sum(active for _, active in counts.values())
+    # Every shard lists all repositories but only processes its own
+    repositories = math.ceil(max(repositories - exempt_count, 0) / shard_count)
+
+    totals = history.latest_run_totals() if history else (0, 0, 0)
+    last_repositories, last_handles, last_changes = totals
+    from_history = last_repositories > 0
+    if from_history:
+        membership_reads = math.ceil(last_handles * repositories / last_repositories)
+        pull_requests = math.ceil(last_changes * repositories / last_repositories)
+    else:
+        membership_reads = repositories
+        pull_requests = repositories
+    scanned_organizations = organization_list or {
+        repository.split("/")[0] for repository in repository_list
+    }
+    if all(
+        organization.lower() in snapshot_organizations
+        for organization in scanned_organizations
+    ):
+        membership_reads = 0
+
+    return PreflightEstimate(
+        repositories=repositories,
+        listing_reads=listing_reads,
+        codeowners_reads=repositories * CODEOWNERS_READS_PER_REPO,
+        membership_reads=membership_reads,
+        pull_requests=0 if dry_run else pull_requests,
+        collaborator_reads=repositories if check_write_access else 0,
+        tree_reads=pull_requests if unowned_paths else 0,
+        graphql_queries=repositories * BRANCH_QUERIES_PER_REPO if branches else 0,
+        graphql_remaining=(
+            None
+            if budget.remaining("graphql") is None
+            else max(budget.remaining("graphql") - budget.reserve, 0)
+        ),
+        remaining=(
+            None
+            if budget.remaining() is None
+            else max(budget.remaining() - budget.reserve, 0)
+        ),
+        limit=budget.limit(),
+        from_history=from_history,
+    )
+
+
+def report_preflight(estimate: PreflightEstimate) -> bool:
+    """Print the estimate and whether the run fits, and return whether it fits"""
+    source = (
+        "the latest run in HISTORY_DB"
+        if estimate.from_history
+        else "one handle and one pull request per repository, "
+        "membership checks may be higher"
+    )
+    print(f"Preflight: {estimate.repositories} repositories to scan")
+    print(
+        f"Estimated read requests: {estimate.reads} "
+        f"({estimate.listing_reads} listing, {estimate.codeowners_reads} CODEOWNERS, "
+        f"{estimate.membership_reads} membership, "
+        f"{estimate.collaborator_reads} collaborators, {estimate.tree_reads} trees, "
+        f"{estimate.pull_requests * PULL_REQUEST_READS} pull requests)"
+    )
+    if estimate.graphql_queries:
+        print(
+            f"Estimated GraphQL queries for BRANCHES: {estimate.graphql_queries}, "
+            f"remaining GraphQL budget: {estimate.graphql_remaining}"
+        )
+    print(
+        f"Estimated write requests: {estimate.writes} "
+        f"for {estimate.pull_requests} pull requests"
+    )
+    print(f"Membership checks and pull requests are estimated from {source}")
+    print(f"Remaining rate limit budget: {estimate.remaining}")
+    if estimate.writes > CONTENT_CREATION_LIMIT_PER_HOUR:
+        print(
+            f"Warning: more than {CONTENT_CREATION_LIMIT_PER_HOUR} write requests "
+            "may hit the secondary rate limit on content creation"
+        )
+    if estimate.fits:
+        print("The run fits in the remaining rate limit budget")
+        return True
+    print("The run does not fit in the remaining rate limit budget")
+    if estimate.limit:
+        hours = math.ceil((estimate.reads + estimate.writes) / estimate.limit)
+        print(
+            f"It needs about {hours} hours of rate limit, consider MAX_RUNTIME "
+            "with CHECKPOINT_FILE or SHARD_COUNT with several tokens"
+        )
+    return False
@@ -0,0 +1,54 @@
+"""Order the repositories of a run so the most important ones are scanned first."""
+
+# Scan the most recently pushed repositories first
+PRIORITY_PUSHED = "pushed"
+# Scan the repositories that were not scanned for the longest time first
+PRIORITY_STALE = "stale"
+# Scan the repositories with the most handles in their latest scan first
+PRIORITY_HANDLES = "handles"
+PRIORITIES = (PRIORITY_PUSHED, PRIORITY_STALE, PRIORITY_HANDLES)
+# Priorities computed from the results of previous runs
+HISTORY_PRIORITIES = (PRIORITY_STALE, PRIORITY_HANDLES)
+
+
+def get_pushed_at(repo) -> str:
+    """Return the ISO 8601 time of the last push to a repository or an empty string."""
+    as_dict = getattr(repo, "as_dict", None)
+    pushed_at = as_dict().get("pushed_at") if callable(as_dict) else None
+    return pushed_at if isinstance(pushed_at, str) else ""
+
+
+def prioritize(repos, priority: str, history=None) -> list:
+    """
+    Order the repositories of a scan by priority.
+
+    The repositories deferred by the previous run come first, in the order
+    they were deferred in, so that coverage rotates across the organization
+    when the budget cannot cover every repository.
+
+    Args:
+        repos: The repositories to scan
+        priority (str): One of PRIORITIES
+        history: The RunHistory of previous runs or None
+
+    Returns:
+        list: the repositories in the order they should be scanned
+    """
+    repos = list(repos)
+    if priority == PRIORITY_PUSHED:
+        repos.sort(key=get_pushed_at, reverse=True)
+    elif priority == PRIORITY_STALE and history:
+        last_scanned = history.last_scanned()
+        # Repositories that were never scanned sort first with an empty time
+        repos.sort(key=lambda repo: last_scanned.get(repo.full_name, ""))
+    elif priority == PRIORITY_HANDLES and history:
+        handle_counts = history.last_handle_counts()
+        repos.sort(key=lambda repo: handle_counts.get(repo.full_name, 0), reverse=True)
+
+    if history:
+        deferred = {
+            repo: position for position, repo in enumerate(history.deferred_repos())
+        }
+        if deferred:
+            repos.sort(key=lambda repo: deferred.get(repo.full_name, len(deferred)))
+    return repos
@@ -0,0 +1,71 @@
+"""Track the GitHub API rate limit budget shared by every request of a run."""
+
+import threading
+
+DEFAULT_RATE_LIMIT_RESERVE = 50
+
+
+class RateLimitBudget:
+    """
+    A thread safe view of the remaining GitHub API rate limit.
+
+    The budget is updated from the rate limit headers of every response made
+    through the sessions it is attached to, so concurrent workers share a
+    single, always current, picture of how many calls are left.
+    """
+
+    def __init__(self, reserve: int = DEFAULT_RATE_LIMIT_RESERVE):
+        self.reserve = reserve
+        self._resources: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, session) -> None:
+        """Register a response hook on a requests session to keep the budget current."""
+        session.hooks["response"].append(self.record_response)
+
+    def record_response(self, response, *_args, **_kwargs):
+        """Update the budget from the rate limit headers of a response."""
+        headers = response.headers
+        if "X-RateLimit-Remaining" not in headers:
+            return response
+        try:
+            self.update(
+                headers.get("X-RateLimit-Resource", "core"),
+                int(headers["X-RateLimit-Limit"]),
+                int(headers["X-RateLimit-Remaining"]),
+                int(headers["X-RateLimit-Reset"]),
+            )
+        except (KeyError, ValueError):
+            pass
+        return response
+
+    def refresh(self, github_connection) -> None:
+        """Load the current budget of every resource from the /rate_limit endpoint."""
+        for resource, values in github_connection.rate_limit()["resources"].items():
+            self.update(resource, values["limit"], values["remaining"], values["reset"])
+
+    def update(self, resource: str, limit: int, remaining: int, reset: int) -> None:
+        """Record the budget of a single rate limit resource."""
+        with self._lock:
+            self._resources[resource] = {
+                "limit": limit,
+                "remaining": remaining,
+                "reset": reset,
+            }
+
+    def remaining(self, resource: str = "core") -> int | None:
+        """Return the remaining calls of a resource or None if it is unknown."""
+        with self._lock:
+            values = self._resources.get(resource)
+            return values["remaining"] if values else None
+
+    def limit(self, resource: str = "core") -> int | None:
+        """Return the hourly limit of a resource or None if it is unknown."""
+        with self._lock:
+            values = self._resources.get(resource)
+            return values["limit"] if values else None
+
+    def exhausted(self, resource: str = "core") -> bool:
+        """Return True when the remaining calls of a resource reached the reserve."""
+        remaining = self.remaining(resource)
+        return remaining is not None and remaining <= self.reserve
@@ -0,0 +1,149 @@
+"""Collect the outcome of the repositories processed during a run."""
+
+import sys
+import threading
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class RepoResult:  # pylint: disable=too-many-instance-attributes
+    """The outcome of processing a single repository.
+
+    Only the full name of the repository is kept, so the github3 repository
+    object can be released as soon as the repository is processed.
+    """
+
+    full_name: str
+    status: str
+    codeowners_filepath: str | None = None
+    usernames_to_remove: list[str] = field(default_factory=list)
+    eligible_for_pr: bool = False
+    pull_request_url: str | None = None
+    codeowners_sha: str | None = None
+    usernames: list[str] = field(default_factory=list)
+    duration: float = 0.0
+    # (handle, line number, pattern) of every owner, for the owner index
+    owner_entries: list[tuple[str, int, str]] = field(default_factory=list)
+    # Owners of each category that were not checked for membership
+    owner_counts: dict[str, int] = field(default_factory=dict)
+    # Non members who are outside collaborators, flagged or removed by the policy
+    outside_collaborators: list[str] = field(default_factory=list)
+    # Branches matching BRANCHES whose CODEOWNERS file needs a pull request
+    eligible_branches: list[str] = field(default_factory=list)
+    # Pull requests opened against the branches matching BRANCHES
+    branch_pull_request_urls: list[str] = field(default_factory=list)
+    # (line number, pattern, number of files, first files) of the rules the
+    # proposed change leaves without owners
+    unowned_rules: list[tuple[int, str, int, list[str]]] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """Serialize the result with the repository replaced by its full name."""
+        return {
+            "repo": self.full_name,
+            "status": self.status,
+            "codeowners_filepath": self.codeowners_filepath,
+            "usernames_to_remove": self.usernames_to_remove,
+            "eligible_for_pr": self.eligible_for_pr,
+            "pull_request_url": self.pull_request_url,
+            "codeowners_sha": self.codeowners_sha,
+            "usernames": self.usernames,
+            "duration": self.duration,
+            "owner_counts": self.owner_counts,
+            "outside_collaborators": self.outside_collaborators,
+            "eligible_branches": self.eligible_branches,
+            "branch_pull_request_urls": self.branch_pull_request_urls,
+            "unowned_rules": self.unowned_rules,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RepoResult":
+        """Rebuild a result serialized by to_dict, keyed by the full name of the repository."""
+        return cls(
+            data["repo"],
+            data["status"],
+            data["codeowners_filepath"],
+            list(data["usernames_to_remove"]),
+            data["eligible_for_pr"],
+            data["pull_request_url"],
+            data.get("codeowners_sha"),
+            list(data.get("usernames", [])),
+            data.get("duration", 0.0),
+            owner_counts=dict(data.get("owner_counts", {})),
+            outside_collaborators=list(data.get("outside_collaborators", [])),
+            eligible_branches=list(data.get("eligible_branches", [])),
+            branch_pull_request_urls=list(data.get("branch_pull_request_urls", [])),
+            unowned_rules=[tuple(rule) for rule in data.get("unowned_rules", [])],
+        )
+
+
+class ScanResults:  # pylint: disable=too-many-instance-attributes
+    """Accumulate the outcome of every repository processed during a run.
+
+    Organizations are scanned concurrently, so every update is made under a lock
+    and the run ends with one consolidated set of statistics and reports.
+    Repositories are kept by full name with interned tuples of handles, so
+    memory stays small on organizations with tens of thousands of repositories.
+    """
+
+    def __init__(self):
+        self.counts = {
+            "pull_count": 0,
+            "eligble_for_pr_count": 0,
+            "no_codeowners_count": 0,
+            "codeowners_count": 0,
+            "users_count": 0,
+        }
+        # Team, email and invalid owners, which are not checked for membership
+        self.owner_counts = {"team": 0, "email": 0, "invalid": 0}
+        self.repo_and_users_to_remove = {}
+        self.repo_and_outside_collaborators = {}
+        self.repo_and_unowned_rules = {}
+        self.repos_missing_codeowners = []
+        self.pull_request_urls = []
+        self.errors = []
+        self.stop_reason = None
+        self._lock = threading.Lock()
+
+    def add(self, result):
+        """Add the result of a single repository to the totals."""
+        with self._lock:
+            if result.status == "present":
+                self.counts["codeowners_count"] += 1
+            else:
+                self.counts["no_codeowners_count"] += 1
+                self.repos_missing_codeowners.append(result.full_name)
+            for category, count in result.owner_counts.items():
+                self.owner_counts[category] = self.owner_counts.get(category, 0) + count
+            if result.usernames_to_remove:
+                self.counts["users_count"] += len(result.usernames_to_remove)
+                self.repo_and_users_to_remove[result.full_name] = tuple(
+                    sys.intern(username) for username in result.usernames_to_remove
+                )
+            if result.outside_collaborators:
+                self.repo_and_outside_collaborators[result.full_name] = tuple(
+                    sys.intern(username) for username in result.outside_collaborators
+                )
+            if result.unowned_rules:
+                self.repo_and_unowned_rules[result.full_name] = tuple(
+                    tuple(rule) for rule in result.unowned_rules
+                )
+            if result.eligible_for_pr:
+                self.counts["eligble_for_pr_count"] += 1
+            # Each branch is a pull request of its own, eligible like the default branch
+            self.counts["eligble_for_pr_count"] += len(result.eligible_branches)
+            if result.pull_request_url:
+                self.counts["pull_count"] += 1
+                self.pull_request_urls.append(result.pull_request_url)
+            self.counts["pull_count"] += len(result.branch_pull_request_urls)
+            self.pull_request_urls.extend(result.branch_pull_request_urls)
+
+    def add_error(self, message):
+        """Record an error that interrupted part of the run."""
+        with self._lock:
+            self.errors.append(message)
+
+    def stop(self, reason):
+        """Record why the run stopped before every repository was processed."""
+        with self._lock:
+            if self.stop_reason is None:
+                self.stop_reason = reason
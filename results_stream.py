@@ -0,0 +1,69 @@
+"""Stream the result of each repository to an NDJSON file as soon as it is processed."""
+
+import json
+import threading
+
+from results import RepoResult, ScanResults
+
+
+class ResultsStream:
+    """
+    Append one JSON record per processed repository to a file.
+
+    Every record is flushed as soon as it is written, so the results of the
+    repositories processed before a crash or cancellation are not lost.
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        # The file stays open for the whole run and is closed by close()
+        self._file = open(  # pylint: disable=consider-using-with
+            path, "a" if append else "w", encoding="utf-8"
+        )
+        self._lock = threading.Lock()
+
+    def write(self, result: RepoResult) -> None:
+        """Append the result of a repository to the stream."""
+        line = json.dumps(result.to_dict()) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        """Close the stream file."""
+        with self._lock:
+            self._file.close()
+
+
+def read_results_stream(path: str, results: ScanResults | None = None) -> ScanResults:
+    """
+    Rebuild the results of a run from its NDJSON stream.
+
+    A resumed run processes again the repositories completed after the last
+    checkpoint save, so a repository can have several records. Only the
+    last record of each repository is kept. A record cut short by a crash
+    at the end of the file is ignored.
+
+    Args:
+        path (str): The path of the NDJSON stream
+        results (ScanResults | None): Results to add the records to, or None for new results
+
+    Returns:
+        ScanResults: the results with the latest record of every repository added
+    """
+    if results is None:
+        results = ScanResults()
+    records: dict[str, RepoResult] = {}
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Ignoring an incomplete record in {path}")
+                continue
+            result = RepoResult.from_dict(record)
+            records.pop(result.full_name, None)
+            records[result.full_name] = result
+    for result in records.values():
+        results.add(result)
+    return results
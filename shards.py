@@ -0,0 +1,122 @@
+"""Split the repositories of a run across shards and merge their partial results."""
+
+import hashlib
+import json
+
+from results import ScanResults
+
+PARTIAL_RESULTS_VERSION = 1
+
+
+def get_shard(full_name: str, shard_count: int) -> int:
+    """
+    Get the shard a repository belongs to.
+
+    The shard is derived from a SHA-256 digest of the lower case full name so
+    that every runner, on every run, assigns a repository to the same shard.
+
+    Args:
+        full_name (str): The full name of the repository, ie. org/repo
+        shard_count (int): The total number of shards
+
+    Returns:
+        int: the index of the shard
+    """
+    digest = hashlib.sha256(full_name.lower().encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def in_shard(full_name: str, shard_index: int, shard_count: int) -> bool:
+    """Check whether a repository belongs to the given shard."""
+    return shard_count <= 1 or get_shard(full_name, shard_count) == shard_index
+
+
+def get_partial_results_path(shard_index: int, shard_count: int) -> str:
+    """Get the file name of the partial results of a shard."""
+    return f"cleanowners-shard-{shard_index}-of-{shard_count}.json"
+
+
+def write_partial_results(path, results, shard_index, shard_count):
+    """Write the results of a shard to a JSON file for a later merge"""
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "version": PARTIAL_RESULTS_VERSION,
+                "shard_index": shard_index,
+                "shard_count": shard_count,
+                "counts": results.counts,
+                "owner_counts": results.owner_counts,
+                "repo_and_users_to_remove": results.repo_and_users_to_remove,
+                "repo_and_outside_collaborators": (
+                    results.repo_and_outside_collaborators
+                ),
+                "repo_and_unowned_rules": results.repo_and_unowned_rules,
+                "repos_missing_codeowners": results.repos_missing_codeowners,
+                "pull_request_urls": results.pull_request_urls,
+                "errors": results.errors,
+                "stop_reason": results.stop_reason,
+            },
+            file,
+            indent=2,
+        )
+
+
+def merge_partial_results(paths):
+    """
+    Merge the partial results written by each shard into one set of results.
+
+    Args:
+        paths: The paths of the partial result files
+
+    Returns:
+        ScanResults: the combined results
+
+    Raises:
+        ValueError: if a file has an unknown version or the shards do not match
+    """
+    merged = ScanResults()
+    seen_shards = set()
+    shard_counts = set()
+    stop_reasons = []
+    for path in sorted(paths):
+        with open(path, "r", encoding="utf-8") as file:
+            partial = json.load(file)
+        if partial.get("version") != PARTIAL_RESULTS_VERSION:
+            raise ValueError(f"{path} is not a cleanowners partial results file")
+        shard = partial["shard_index"]
+        if shard in seen_shards:
+            raise ValueError(f"Shard {shard} is included more than once")
+        seen_shards.add(shard)
+        shard_counts.add(partial["shard_count"])
+
+        for name, value in partial["counts"].items():
+            merged.counts[name] += value
+        for category, value in partial.get("owner_counts", {}).items():
+            merged.owner_counts[category] = merged.owner_counts.get(category, 0) + value
+        merged.repo_and_users_to_remove.update(
+            (repo, tuple(users))
+            for repo, users in partial["repo_and_users_to_remove"].items()
+        )
+        merged.repo_and_outside_collaborators.update(
+            (repo, tuple(users))
+            for repo, users in partial.get("repo_and_outside_collaborators", {}).items()
+        )
+        merged.repo_and_unowned_rules.update(
+            (repo, tuple(tuple(rule) for rule in rules))
+            for repo, rules in partial.get("repo_and_unowned_rules", {}).items()
+        )
+        merged.repos_missing_codeowners.extend(partial["repos_missing_codeowners"])
+        merged.pull_request_urls.extend(partial["pull_request_urls"])
+        merged.errors.extend(partial["errors"])
+        if partial.get("stop_reason"):
+            stop_reasons.append(f"shard {shard}: {partial['stop_reason']}")
+
+    if len(shard_counts) > 1:
+        raise ValueError("Partial results come from runs with different SHARD_COUNT")
+    if shard_counts and len(seen_shards) != next(iter(shard_counts)):
+        missing = sorted(set(range(next(iter(shard_counts)))) - seen_shards)
+        merged.errors.append(f"Partial results are missing for shards {missing}")
+    if stop_reasons:
+        # A shard that stopped early leaves the merged results partial too
+        merged.stop("; ".join(stop_reasons))
+    return merged
@@ -1,9 +1,19 @@
 """Test cases for the auth module."""
 
+import datetime
+import threading
 import unittest
 from unittest.mock import MagicMock, patch
 
 import auth
+import requests
+from github3.session import AppInstallationTokenAuth
+
+
+def make_token_auth(token, expires_in):
+    """Build an installation token expiring in the given timedelta."""
+    expires_at = datetime.datetime.now(datetime.timezone.utc) + expires_in
+    return AppInstallationTokenAuth(token, expires_at.isoformat())
 
 
 class TestAuth(unittest.TestCase):
@@ -11,6 +21,26 @@ class TestAuth(unittest.TestCase):
     Test case for the auth module.
     """
 
+    @patch("github3.github.GitHubEnterprise")
+    @patch("github3.github.GitHub")
+    def test_get_installation_account(self, mock_gh, mock_ghe):
+        """Test that the account of an installation is read as the app."""
+        for mock in (mock_gh.return_value, mock_ghe.return_value):
+            mock.app_installation.return_value.account = {"login": "org"}
+
+        self.assertEqual(
+            auth.get_installation_account(123, 456, b"key", "", False), "org"
+        )
+        mock_gh.return_value.login_as_app.assert_called_once_with(b"key", "123")
+        mock_gh.return_value.app_installation.assert_called_once_with(456)
+        self.assertEqual(
+            auth.get_installation_account(
+                123, 456, b"key", "https://github.example.com", True
+            ),
+            "org",
+        )
+        mock_ghe.assert_called_once_with(url="https://github.example.com")
+
     @patch("github3.login")
     def test_auth_to_github_with_token(self, mock_login):
         """
@@ -104,5 +134,68 @@ class TestAuth(unittest.TestCase):
         )
 
 
+class TestInstallationTokenBroker(unittest.TestCase):
+    """Test the InstallationTokenBroker class"""
+
+    def make_broker(self, expires_in):
+        """Build a broker whose renewals return a token valid for an hour."""
+        login = MagicMock()
+        login.return_value.session.auth = make_token_auth(
+            "renewed", datetime.timedelta(hours=1)
+        )
+        return auth.InstallationTokenBroker(
+            login, make_token_auth("initial", expires_in)
+        )
+
+    def test_valid_token_is_used(self):
+        """Test that a token far from its expiry is not renewed."""
+        broker = self.make_broker(datetime.timedelta(minutes=30))
+
+        request = broker(requests.Request("GET", "https://api.github.com").prepare())
+
+        self.assertEqual(request.headers["Authorization"], "token initial")
+        broker._login.assert_not_called()  # pylint: disable=protected-access
+
+    def test_expiring_token_is_renewed_once(self):
+        """Test that concurrent workers renew an expiring token only once."""
+        broker = self.make_broker(datetime.timedelta(minutes=2))
+        requests_sent = [
+            requests.Request("GET", "https://api.github.com").prepare()
+            for _ in range(8)
+        ]
+        threads = [
+            threading.Thread(target=broker, args=(request,))
+            for request in requests_sent
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(
+            {request.headers["Authorization"] for request in requests_sent},
+            {"token renewed"},
+        )
+        broker._login.assert_called_once()  # pylint: disable=protected-access
+
+    def test_token_without_expiry_is_not_renewed(self):
+        """Test that a token without an expiry time is used as is."""
+        token_auth = MagicMock(side_effect=lambda request: request)
+        broker = auth.InstallationTokenBroker(MagicMock(), token_auth)
+
+        broker("request")
+
+        token_auth.assert_called_once_with("request")
+
+    @patch("github3.github.GitHub")
+    def test_auth_to_github_with_app_uses_broker(self, mock_gh):
+        """Test that an app connection renews its own installation token."""
+        result = auth.auth_to_github("", 123, 456, b"private_key", "", False)
+
+        self.assertIsInstance(result.session.auth, auth.InstallationTokenBroker)
+        result.session.auth._login()  # pylint: disable=protected-access
+        self.assertEqual(mock_gh.return_value.login_as_app_installation.call_count, 2)
+
+
 if __name__ == "__main__":
     unittest.main()
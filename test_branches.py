@@ -0,0 +1,246 @@
+"""Test the branches module and the scan of the branches matching BRANCHES."""
+
+import unittest
+import uuid
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from branches import get_blob_contents, get_branch_codeowners, matches_branch
+from cleanowners import (
+    ScanContext,
+    commit_changes,
+    get_stop_reason,
+    print_stats,
+    process_repo,
+)
+from rate_limit import RateLimitBudget
+from results import ScanResults
+
+
+def make_node(name, files, protected=False):
+    """Build a branch of the refs query with the given CODEOWNERS locations."""
+    return {
+        "name": name,
+        "branchProtectionRule": {"id": "rule"} if protected else None,
+        "target": files,
+    }
+
+
+class TestMatchesBranch(unittest.TestCase):
+    """Test the matches_branch function"""
+
+    def test_matches_patterns_and_protected_branches(self):
+        """Test shell-style patterns and the protected keyword."""
+        self.assertTrue(matches_branch("release/1.0", ["release/*"], False))
+        self.assertFalse(matches_branch("Release/1.0", ["release/*"], False))
+        self.assertTrue(matches_branch("stable", ["release/*", "protected"], True))
+        self.assertFalse(matches_branch("stable", ["release/*", "protected"], False))
+
+
+class TestGetBranchCodeowners(unittest.TestCase):
+    """Test the get_branch_codeowners function"""
+
+    @patch("branches.graphql_query")
+    def test_lists_the_codeowners_of_matching_branches(self, mock_query):
+        """Test that every page is read and the first CODEOWNERS location wins."""
+        mock_query.side_effect = [
+            {
+                "repository": {
+                    "refs": {
+                        "nodes": [
+                            make_node("main", {"path0": {"oid": "a", "size": 1}}),
+                            make_node(
+                                "release/1",
+                                {
+                                    "path0": {"oid": "b", "size": 1},
+                                    "path1": {"oid": "c", "size": 1},
+                                },
+                            ),
+                            make_node("release/2", {"path1": {"oid": "b", "size": 1}}),
+                            make_node("feature", {"path0": {"oid": "d", "size": 1}}),
+                        ],
+                        "pageInfo": {"hasNextPage": True, "endCursor": "next"},
+                    }
+                }
+            },
+            {
+                "repository": {
+                    "refs": {
+                        "nodes": [
+                            make_node("release/3", {"path0": None, "path1": None}),
+                            make_node("release/4", {"path2": {"oid": "e", "size": 0}}),
+                            make_node(
+                                "stable", {"path2": {"oid": "f", "size": 1}}, True
+                            ),
+                        ],
+                        "pageInfo": {"hasNextPage": False, "endCursor": None},
+                    }
+                }
+            },
+        ]
+
+        branches = get_branch_codeowners(
+            MagicMock(), "org/repo", ["release/*", "protected"], "main"
+        )
+
+        self.assertEqual(
+            branches,
+            [
+                ("release/1", ".github/CODEOWNERS", "b"),
+                ("release/2", "CODEOWNERS", "b"),
+                ("stable", "docs/CODEOWNERS", "f"),
+            ],
+        )
+        self.assertEqual(
+            mock_query.call_args.args[2],
+            {"owner": "org", "name": "repo", "cursor": "next"},
+        )
+
+
+class TestGetBlobContents(unittest.TestCase):
+    """Test the get_blob_contents function"""
+
+    @patch("branches.BLOB_BATCH_SIZE", 1)
+    @patch("branches.graphql_query")
+    def test_fetches_blobs_in_batches(self, mock_query):
+        """Test that blobs are batched and truncated blobs use the REST API."""
+        repo = MagicMock(full_name="org/repo")
+        repo.blob.return_value.decode_content.return_value = b"* @large\n"
+        mock_query.side_effect = [
+            {"repository": {"blob0": {"text": "* @alice\n", "isTruncated": False}}},
+            {"repository": {"blob0": {"text": "* @lar", "isTruncated": True}}},
+        ]
+
+        contents = get_blob_contents(MagicMock(), repo, ["a", "b"])
+
+        self.assertEqual(contents, {"a": b"* @alice\n", "b": b"* @large\n"})
+        repo.blob.assert_called_once_with("b")
+        self.assertEqual(mock_query.call_count, 2)
+        self.assertIn("$oid0: GitObjectID!", mock_query.call_args.args[1])
+        self.assertEqual(mock_query.call_args.args[2]["oid0"], "b")
+
+
+class TestProcessBranches(unittest.TestCase):
+    """Test the scan of the branches matching BRANCHES in process_repo"""
+
+    def make_context(self):
+        """Build a ScanContext where bob is the only non member."""
+        membership = MagicMock()
+        membership.is_member.side_effect = lambda org, user: user != "bob"
+        return ScanContext(
+            github_connection=MagicMock(),
+            membership=membership,
+            results=ScanResults(),
+            budget=None,
+            exempt_repositories_list=[],
+            dry_run=False,
+            pull_request={"title": "Title", "body": "Body", "commit_message": "Msg"},
+            branches=["release/*"],
+        )
+
+    @patch("cleanowners.commit_changes")
+    @patch("cleanowners.get_blob_contents")
+    @patch("cleanowners.get_branch_codeowners")
+    def test_branches_sharing_a_blob_are_checked_once(
+        self, mock_branches, mock_blobs, mock_commit
+    ):
+        """Test that each blob is checked once and each branch gets a pull request."""
+        mock_branches.return_value = [
+            ("release/1", "CODEOWNERS", "shared"),
+            ("release/2", "CODEOWNERS", "shared"),
+            ("release/3", "CODEOWNERS", "clean"),
+        ]
+        mock_blobs.return_value = {"shared": b"* @alice @bob\n", "clean": b"* @alice\n"}
+        mock_commit.return_value.html_url = "https://github.com/org/repo/pull/9"
+        context = self.make_context()
+        context.check_write_access = True
+        repo = MagicMock(full_name="org/repo", archived=False, default_branch="main")
+        repo.collaborators.return_value = [
+            MagicMock(login="alice", permissions={"push": True})
+        ]
+        repo.file_contents.return_value = MagicMock(
+            size=14, content="encoded", decoded=b"* @alice @bob\n", sha="default"
+        )
+
+        result = process_repo(repo, "org", context)
+
+        mock_branches.assert_called_once_with(
+            context.github_connection, "org/repo", ["release/*"], "main"
+        )
+        mock_blobs.assert_called_once_with(
+            context.github_connection, repo, ["clean", "shared"]
+        )
+        self.assertEqual(result.usernames_to_remove, ["bob"])
+        self.assertEqual(
+            [call.kwargs.get("base_branch") for call in mock_commit.call_args_list],
+            [None, "release/1", "release/2"],
+        )
+        self.assertEqual(mock_commit.call_args.args[3], b"* @alice\n")
+        self.assertEqual(len(result.branch_pull_request_urls), 2)
+        self.assertEqual(set(context.parsed_codeowners), {"default", "shared", "clean"})
+
+        self.assertEqual(result.eligible_branches, ["release/1", "release/2"])
+        context.results.add(result)
+        self.assertEqual(context.results.counts["pull_count"], 3)
+        self.assertEqual(context.results.counts["eligble_for_pr_count"], 3)
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            print_stats(**context.results.counts)
+        self.assertIn(
+            "100.0% of eligible repositories had pull requests created",
+            mock_stdout.getvalue(),
+        )
+
+    @patch("cleanowners.get_branch_codeowners")
+    def test_failed_branch_query_keeps_the_default_branch(self, mock_branches):
+        """Test that a failed GraphQL query is recorded and the scan goes on."""
+        mock_branches.side_effect = ValueError("GraphQL query failed: 502")
+        context = self.make_context()
+        context.dry_run = True
+        repo = MagicMock(full_name="org/repo", archived=False, default_branch="main")
+        repo.file_contents.return_value = MagicMock(
+            size=14, content="encoded", decoded=b"* @alice @bob\n", sha="default"
+        )
+
+        result = process_repo(repo, "org", context)
+
+        self.assertEqual(result.usernames_to_remove, ["bob"])
+        self.assertEqual(
+            context.results.errors, ["org/repo branches: GraphQL query failed: 502"]
+        )
+
+    def test_scan_stops_when_graphql_budget_exhausted(self):
+        """Test that BRANCHES stops the run once the GraphQL budget is exhausted."""
+        budget = RateLimitBudget(reserve=10)
+        budget.update("core", 5000, 4000, 0)
+        budget.update("graphql", 5000, 5, 0)
+        context = self.make_context()
+        context.budget = budget
+
+        self.assertEqual(
+            get_stop_reason(context), "GraphQL rate limit budget exhausted"
+        )
+        context.branches = []
+        self.assertIsNone(get_stop_reason(context))
+
+
+class TestCommitChangesToBranch(unittest.TestCase):
+    """Test the pull requests against a branch other than the default branch"""
+
+    @patch("uuid.uuid4")
+    def test_commit_changes_to_base_branch(self, mock_uuid):
+        """Test that the branch, file and pull request are based on the branch."""
+        mock_uuid.return_value = uuid.UUID("12345678123456781234567812345678")
+        repo = MagicMock(default_branch="main")
+        repo.ref.return_value.object.sha = "abc123"
+
+        commit_changes(
+            "Title", "Body", repo, b"* @alice\n", "Msg", "CODEOWNERS", base_branch="v1"
+        )
+
+        repo.ref.assert_called_once_with("heads/v1")
+        repo.file_contents.assert_called_once_with("CODEOWNERS", ref="v1")
+        self.assertEqual(repo.create_pull.call_args.kwargs["base"], "v1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""Test the Checkpoint and RunDeadline classes in the checkpoint module."""
+
+import json
+import os
+import signal
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import checkpoint
+from checkpoint import Checkpoint, RunDeadline, get_fingerprint
+from results import RepoResult, ScanResults
+
+
+class TestGetFingerprint(unittest.TestCase):
+    """Test the get_fingerprint function"""
+
+    def test_get_fingerprint_depends_on_configuration(self):
+        """Test that the fingerprint is stable and changes with the configuration."""
+        self.assertEqual(
+            get_fingerprint(organizations=["a"], shard=[0, 1]),
+            get_fingerprint(shard=[0, 1], organizations=["a"]),
+        )
+        self.assertNotEqual(
+            get_fingerprint(organizations=["a"]), get_fingerprint(organizations=["b"])
+        )
+
+
+class TestCheckpoint(unittest.TestCase):
+    """Test the Checkpoint class"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "checkpoint.json")
+
+    def test_load_without_file_starts_fresh(self):
+        """Test that a missing checkpoint file starts a new checkpoint."""
+        loaded = Checkpoint.load(self.path, "fingerprint")
+
+        self.assertEqual(loaded.completed, {})
+        self.assertIsNone(loaded.get_cursor("org"))
+
+    def test_save_and_resume(self):
+        """Test that a saved checkpoint is resumed with its outcomes and cursors."""
+        saved = Checkpoint(self.path, "fingerprint")
+        saved.record(
+            "org/repo1",
+            RepoResult("org/repo1", "present", "CODEOWNERS", ["alice"], True, "url"),
+        )
+        saved.record("org/repo2", None)
+        saved.set_cursor("org", "https://api.github.com/page=2")
+        saved.set_cursor("other", None)
+        saved.save()
+
+        with patch("sys.stdout"):
+            loaded = Checkpoint.load(self.path, "fingerprint")
+        results = ScanResults()
+        loaded.restore(results)
+
+        self.assertTrue(loaded.is_completed("org/repo1"))
+        self.assertTrue(loaded.is_completed("org/repo2"))
+        self.assertFalse(loaded.is_completed("org/repo3"))
+        self.assertEqual(loaded.get_cursor("org"), "https://api.github.com/page=2")
+        self.assertIsNone(loaded.get_cursor("other"))
+        self.assertEqual(results.counts["users_count"], 1)
+        self.assertEqual(results.repo_and_users_to_remove, {"org/repo1": ("alice",)})
+        self.assertEqual(results.pull_request_urls, ["url"])
+
+    def test_load_ignores_other_configuration(self):
+        """Test that a checkpoint of another configuration is not resumed."""
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "version": checkpoint.CHECKPOINT_VERSION,
+                    "fingerprint": "other",
+                    "completed": {"org/repo": None},
+                    "cursors": {},
+                },
+                file,
+            )
+
+        with patch("sys.stdout"):
+            loaded = Checkpoint.load(self.path, "fingerprint")
+
+        self.assertFalse(loaded.is_completed("org/repo"))
+
+    @patch("checkpoint.CHECKPOINT_SAVE_INTERVAL", 2)
+    def test_record_saves_periodically(self):
+        """Test that the checkpoint is written every CHECKPOINT_SAVE_INTERVAL repositories."""
+        saved = Checkpoint(self.path, "fingerprint")
+
+        saved.record("org/repo1", None)
+        self.assertFalse(os.path.exists(self.path))
+        saved.record("org/repo2", None)
+
+        self.assertTrue(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(f"{self.path}.tmp"))
+
+    def test_clear_removes_file(self):
+        """Test that clear removes the checkpoint file, if any."""
+        saved = Checkpoint(self.path, "fingerprint")
+        saved.clear()
+        saved.save()
+
+        saved.clear()
+
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestRunDeadline(unittest.TestCase):
+    """Test the RunDeadline class"""
+
+    def test_deadline_without_budget_never_expires(self):
+        """Test that a run without MAX_RUNTIME only stops when cancelled."""
+        deadline = RunDeadline(None)
+
+        self.assertIsNone(deadline.stop_reason())
+        deadline.cancel()
+        self.assertEqual(deadline.stop_reason(), "the run was cancelled")
+
+    @patch("checkpoint.time.monotonic")
+    def test_deadline_keeps_a_reserve(self, mock_monotonic):
+        """Test that the deadline expires before the budget runs out."""
+        mock_monotonic.return_value = 1000.0
+        deadline = RunDeadline(600)
+
+        mock_monotonic.return_value = 1539.0
+        self.assertIsNone(deadline.stop_reason())
+        mock_monotonic.return_value = 1540.0
+        self.assertEqual(deadline.stop_reason(), "MAX_RUNTIME was reached")
+
+    @patch("checkpoint.signal.signal")
+    def test_signal_handlers_cancel_the_run(self, mock_signal):
+        """Test that SIGINT and SIGTERM cancel the run."""
+        deadline = RunDeadline(None)
+
+        deadline.install_signal_handlers()
+        handler = mock_signal.call_args.args[1]
+        with patch("sys.stdout"):
+            handler(signal.SIGTERM, MagicMock())
+
+        self.assertEqual(
+            [call.args[0] for call in mock_signal.call_args_list],
+            [signal.SIGINT, signal.SIGTERM],
+        )
+        self.assertEqual(deadline.stop_reason(), "the run was cancelled")
+
+
+if __name__ == "__main__":
+    unittest.main()
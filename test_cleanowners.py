@@ -6,17 +6,62 @@ from io import StringIO
 from unittest.mock import MagicMock, patch
 
 import github3
+from checkpoint import Checkpoint, RunDeadline
 from cleanowners import (
+    ScanContext,
     build_default_codeowners,
-    cleanup_whitespace,
     commit_changes,
+    configure_connection_pool,
     get_codeowners_file,
-    get_org,
+    get_enterprise_organizations,
     get_repos_iterator,
     get_usernames_from_codeowners,
     print_stats,
-    remove_username_from_content,
+    process_repo,
+    report_results,
+    scan_organizations,
+    scan_repositories,
 )
+from metrics import RunMetrics
+from owners import cleanup_whitespace, remove_usernames_from_content
+from rate_limit import RateLimitBudget
+from results import ScanResults
+from shards import in_shard
+
+
+def make_context(
+    dry_run=False, exempt_repositories_list=None, budget=None, membership=None
+):
+    """Build a ScanContext with mocked GitHub access for tests."""
+    if membership is None:
+        membership = MagicMock()
+        membership.is_member.return_value = True
+    return ScanContext(
+        github_connection=MagicMock(),
+        membership=membership,
+        results=ScanResults(),
+        budget=budget,
+        exempt_repositories_list=exempt_repositories_list or [],
+        dry_run=dry_run,
+        pull_request={"title": "Title", "body": "Body", "commit_message": "Message"},
+    )
+
+
+def make_repo(full_name="org/repo", codeowners=None):
+    """Build a mocked repository with an optional CODEOWNERS file."""
+    repo = MagicMock()
+    repo.full_name = full_name
+    repo.archived = False
+    repo.owner.login = full_name.split("/")[0]
+    if codeowners is None:
+        repo.file_contents.side_effect = github3.exceptions.NotFoundError(
+            resp=MagicMock(status_code=404)
+        )
+    else:
+        repo.file_contents.return_value = MagicMock(
+            size=len(codeowners), content="encoded", decoded=codeowners
+        )
+    return repo
 
 
 class TestCommitChanges(unittest.TestCase):
@@ -103,6 +148,16 @@ class TestCommitChanges(unittest.TestCase):
 class TestGetUsernamesFromCodeowners(unittest.TestCase):
     """Test the get_usernames_from_codeowners function in cleanowners.py"""
 
+    def test_emails_and_comments_are_not_usernames(self):
+        """Test that emails, inline comments and bad tokens never become usernames."""
+        codeowners = (
+            b"* dev@example.com @alice\n"
+            b"/docs/ @bob # reviewed by @carol\n"
+            b"/src/ @bad!name @org/team\n"
+        )
+
+        self.assertEqual(get_usernames_from_codeowners(codeowners), ["alice", "bob"])
+
     def test_get_usernames_from_codeowners_ignore_teams(self):
         """Test the get_usernames_from_codeowners function."""
         codeowners_file_contents = """
@@ -153,18 +208,16 @@ class TestGetUsernamesFromCodeowners(unittest.TestCase):
         """Test that removing multiple usernames preserves all removals.
 
         Regression test for https://github.com/github-community-projects/cleanowners/issues/380
-        The removal loop must accumulate changes rather than replacing from the
-        original content each time, otherwise only the last removal survives.
+        The removal must accumulate changes rather than replacing from the
+        original content for each username, otherwise only the last removal survives.
         """
         codeowners_decoded = b"* @alice @bob @charlie\ndocs/* @alice\n"
         usernames_to_remove = ["alice", "bob"]
 
-        codeowners_file_contents_new = codeowners_decoded
         changed_lines: set[int] = set()
-        for username in usernames_to_remove:
-            codeowners_file_contents_new = remove_username_from_content(
-                codeowners_file_contents_new, username, changed_lines
-            )
+        codeowners_file_contents_new = remove_usernames_from_content(
+            codeowners_decoded, usernames_to_remove, changed_lines
+        )
         codeowners_file_contents_new = cleanup_whitespace(
             codeowners_file_contents_new, changed_lines
         )
@@ -183,12 +236,10 @@ class TestGetUsernamesFromCodeowners(unittest.TestCase):
         codeowners_decoded = b"* @bobsmith @bob @charlie\n"
         usernames_to_remove = ["bob"]
 
-        codeowners_file_contents_new = codeowners_decoded
         changed_lines: set[int] = set()
-        for username in usernames_to_remove:
-            codeowners_file_contents_new = remove_username_from_content(
-                codeowners_file_contents_new, username, changed_lines
-            )
+        codeowners_file_contents_new = remove_usernames_from_content(
+            codeowners_decoded, usernames_to_remove, changed_lines
+        )
         codeowners_file_contents_new = cleanup_whitespace(
             codeowners_file_contents_new, changed_lines
         )
@@ -208,12 +259,10 @@ class TestGetUsernamesFromCodeowners(unittest.TestCase):
         codeowners_decoded = b"* @alice @bob @charlie\n"
         usernames_to_remove = ["bob"]
 
-        codeowners_file_contents_new = codeowners_decoded
         changed_lines: set[int] = set()
-        for username in usernames_to_remove:
-            codeowners_file_contents_new = remove_username_from_content(
-                codeowners_file_contents_new, username, changed_lines
-            )
+        codeowners_file_contents_new = remove_usernames_from_content(
+            codeowners_decoded, usernames_to_remove, changed_lines
+        )
         codeowners_file_contents_new = cleanup_whitespace(
             codeowners_file_contents_new, changed_lines
         )
@@ -229,12 +278,10 @@ class TestGetUsernamesFromCodeowners(unittest.TestCase):
         codeowners_decoded = b"* @alice @bob @charlie\r\n"
         usernames_to_remove = ["bob"]
 
-        codeowners_file_contents_new = codeowners_decoded
         changed_lines: set[int] = set()
-        for username in usernames_to_remove:
-            codeowners_file_contents_new = remove_username_from_content(
-                codeowners_file_contents_new, username, changed_lines
-            )
+        codeowners_file_contents_new = remove_usernames_from_content(
+            codeowners_decoded, usernames_to_remove, changed_lines
+        )
         codeowners_file_contents_new = cleanup_whitespace(
             codeowners_file_contents_new, changed_lines
         )
@@ -250,12 +297,10 @@ class TestGetUsernamesFromCodeowners(unittest.TestCase):
         codeowners_decoded = b"src/**    @alice @bob @charlie\ndocs/**   @dave\n"
         usernames_to_remove = ["bob"]
 
-        codeowners_file_contents_new = codeowners_decoded
         changed_lines: set[int] = set()
-        for username in usernames_to_remove:
-            codeowners_file_contents_new = remove_username_from_content(
-                codeowners_file_contents_new, username, changed_lines
-            )
+        codeowners_file_contents_new = remove_usernames_from_content(
+            codeowners_decoded, usernames_to_remove, changed_lines
+        )
         codeowners_file_contents_new = cleanup_whitespace(
             codeowners_file_contents_new, changed_lines
         )
@@ -266,38 +311,6 @@ class TestGetUsernamesFromCodeowners(unittest.TestCase):
         self.assertIn(b"docs/**   @dave", codeowners_file_contents_new)
 
 
-class TestGetOrganization(unittest.TestCase):
-    """Test the get_org function in cleanowners.py"""
-
-    @patch("github3.login")
-    def test_get_organization_succeeds(self, mock_github):
-        """Test the organization is valid."""
-        organization = "my_organization"
-        github_connection = mock_github.return_value
-
-        mock_organization = MagicMock()
-        github_connection.organization.return_value = mock_organization
-
-        result = get_org(github_connection, organization)
-
-        github_connection.organization.assert_called_once_with(organization)
-        self.assertEqual(result, mock_organization)
-
-    @patch("github3.login")
-    def test_get_organization_fails(self, mock_github):
-        """Test the organization is not valid."""
-        organization = "my_organization"
-        github_connection = mock_github.return_value
-
-        github_connection.organization.side_effect = github3.exceptions.NotFoundError(
-            resp=MagicMock(status_code=404)
-        )
-        result = get_org(github_connection, organization)
-
-        github_connection.organization.assert_called_once_with(organization)
-        self.assertIsNone(result)
-
-
 class TestGetReposIterator(unittest.TestCase):
     """Test the get_repos_iterator function in evergreen.py"""
 
@@ -472,3 +485,471 @@ class TestBuildDefaultCodeowners(unittest.TestCase):
         result = build_default_codeowners(repo)
 
         self.assertIn(b"@my-user", result)
+
+
+class TestProcessRepo(unittest.TestCase):
+    """Test the process_repo function in cleanowners.py"""
+
+    def test_process_repo_skips_exempt_repository(self):
+        """Test that exempt repositories are skipped."""
+        context = make_context(exempt_repositories_list=["org/repo"])
+
+        self.assertIsNone(process_repo(make_repo(), "org", context))
+
+    def test_process_repo_skips_archived_repository(self):
+        """Test that archived repositories are skipped."""
+        repo = make_repo()
+        repo.archived = True
+
+        self.assertIsNone(process_repo(repo, "org", make_context()))
+
+    def test_process_repo_missing_codeowners_dry_run(self):
+        """Test that a missing CODEOWNERS file is reported without a pull request."""
+        result = process_repo(make_repo(), "org", make_context(dry_run=True))
+
+        self.assertEqual(result.status, "missing")
+        self.assertFalse(result.eligible_for_pr)
+
+    @patch("cleanowners.commit_changes")
+    def test_process_repo_missing_codeowners_opens_pull_request(self, mock_commit):
+        """Test that a placeholder CODEOWNERS file is proposed when it is missing."""
+        mock_commit.return_value.html_url = "https://github.com/org/repo/pull/1"
+        repo = make_repo()
+
+        result = process_repo(repo, "org", make_context())
+
+        self.assertTrue(result.eligible_for_pr)
+        self.assertEqual(result.pull_request_url, "https://github.com/org/repo/pull/1")
+        self.assertEqual(mock_commit.call_args.args[5], ".github/CODEOWNERS")
+        self.assertTrue(mock_commit.call_args.kwargs["create_new"])
+
+    def test_process_repo_empty_codeowners(self):
+        """Test that an empty CODEOWNERS file is reported as empty."""
+        result = process_repo(
+            make_repo(codeowners=b""), "org", make_context(dry_run=True)
+        )
+
+        self.assertEqual(result.status, "empty")
+
+    @patch("cleanowners.commit_changes")
+    def test_process_repo_removes_non_members(self, mock_commit):
+        """Test that non members are removed and a pull request is opened."""
+        mock_commit.return_value.html_url = "https://github.com/org/repo/pull/2"
+        membership = MagicMock()
+        membership.is_member.side_effect = lambda org, user: user != "bob"
+        context = make_context(membership=membership)
+        context.history = MagicMock()
+        repo = make_repo(codeowners=b"* @alice @bob\n")
+
+        result = process_repo(repo, "org", context)
+
+        self.assertEqual(result.status, "present")
+        self.assertEqual(result.usernames, ["alice", "bob"])
+        self.assertEqual(result.owner_entries, [("alice", 1, "*"), ("bob", 1, "*")])
+        self.assertEqual(result.owner_counts, {"team": 0, "email": 0, "invalid": 0})
+        self.assertEqual(result.usernames_to_remove, ["bob"])
+        self.assertEqual(result.pull_request_url, "https://github.com/org/repo/pull/2")
+        self.assertEqual(mock_commit.call_args.args[3], b"* @alice\n")
+        membership.is_member.assert_any_call("org", "bob")
+
+    @patch("cleanowners.commit_changes")
+    def test_process_repo_warns_when_all_users_removed(self, mock_commit):
+        """Test the warning when every username is removed."""
+        mock_commit.side_effect = github3.exceptions.NotFoundError(
+            resp=MagicMock(status_code=404)
+        )
+        context = make_context()
+        context.membership.is_member.return_value = False
+
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            result = process_repo(make_repo(codeowners=b"* @bob\n"), "org", context)
+
+        self.assertIn("All usernames removed", mock_stdout.getvalue())
+        self.assertIn("Failed to create pull request", mock_stdout.getvalue())
+        self.assertTrue(result.eligible_for_pr)
+        self.assertIsNone(result.pull_request_url)
+
+    def test_process_repo_uses_repository_owner_without_organization(self):
+        """Test that the repository owner is used for membership checks."""
+        membership = MagicMock()
+        membership.is_member.return_value = None
+        context = make_context(dry_run=True, membership=membership)
+
+        result = process_repo(make_repo("owner/repo", b"* @alice\n"), None, context)
+
+        membership.is_member.assert_called_once_with("owner", "alice")
+        self.assertEqual(result.usernames_to_remove, [])
+
+    def test_process_repo_downloads_large_file(self):
+        """Test that large CODEOWNERS files are downloaded through the blob API."""
+        repo = make_repo(codeowners=b"ignored")
+        repo.file_contents.return_value.content = None
+        repo.blob.return_value.decode_content.return_value = b"* @alice\n"
+        context = make_context(dry_run=True)
+        context.membership.is_member.return_value = False
+
+        result = process_repo(repo, "org", context)
+
+        self.assertEqual(result.usernames_to_remove, ["alice"])
+        self.assertFalse(result.eligible_for_pr)
+
+    @patch("cleanowners.commit_changes")
+    def test_process_repo_only_removes_departed_users(self, mock_commit):
+        """Test that an event only checks and removes the users it departed."""
+        mock_commit.return_value.html_url = "https://github.com/org/repo/pull/3"
+        membership = MagicMock()
+        membership.is_member.return_value = False
+        context = make_context(membership=membership)
+        context.target_usernames = {"bob"}
+
+        result = process_repo(make_repo(codeowners=b"* @alice @Bob\n"), "org", context)
+
+        membership.is_member.assert_called_once_with("org", "Bob")
+        self.assertEqual(result.usernames, ["alice", "Bob"])
+        self.assertEqual(result.usernames_to_remove, ["Bob"])
+        self.assertEqual(mock_commit.call_args.args[3], b"* @alice\n")
+
+    def test_process_repo_removes_owners_without_write_access(self):
+        """Test that members without write access are removed like non members."""
+        context = make_context(dry_run=True)
+        context.check_write_access = True
+        repo = make_repo(codeowners=b"* @alice @Bob\n")
+        repo.collaborators.return_value = [
+            MagicMock(login="Alice", permissions={"push": True}),
+            MagicMock(login="bob", permissions={"pull": True}),
+        ]
+
+        result = process_repo(repo, "org", context)
+
+        repo.collaborators.assert_called_once_with()
+        self.assertEqual(result.usernames_to_remove, ["Bob"])
+
+    @patch("cleanowners.commit_changes")
+    def test_process_repo_event_does_not_add_codeowners(self, mock_commit):
+        """Test that an event does not propose a missing CODEOWNERS file."""
+        context = make_context()
+        context.target_usernames = {"bob"}
+
+        result = process_repo(make_repo(), "org", context)
+
+        self.assertEqual(result.status, "missing")
+        mock_commit.assert_not_called()
+
+
+class TestScanRepositories(unittest.TestCase):
+    """Test the scan_repositories function in cleanowners.py"""
+
+    def test_scan_repositories_adds_results(self):
+        """Test that processed repositories are added to the results."""
+        context = make_context(dry_run=True, exempt_repositories_list=["org/skip"])
+
+        repos = [make_repo("org/repo"), make_repo("org/skip")]
+
+        scan_repositories(repos, "org", context)
+
+        self.assertEqual(context.results.repos_missing_codeowners, ["org/repo"])
+        # Processed repository objects are released from the listing
+        self.assertEqual(repos, [None, None])
+
+    def test_scan_repositories_records_metrics(self):
+        """Test that repository durations and parse cache lookups are recorded."""
+        context = make_context(dry_run=True)
+        context.metrics = RunMetrics()
+        repos = [make_repo(f"org/repo{index}", b"* @alice\n") for index in range(2)]
+        for repo in repos:
+            repo.file_contents.return_value.sha = "same-blob"
+
+        scan_repositories(repos, "org", context)
+
+        self.assertEqual(len(context.metrics.repository_durations), 2)
+        self.assertEqual(context.metrics.caches["codeowners_parse"], [1, 1])
+
+    def test_scan_repositories_streams_results(self):
+        """Test that each result is written to the results stream and history."""
+        context = make_context(dry_run=True)
+        context.stream = MagicMock()
+        context.history = MagicMock()
+
+        scan_repositories([make_repo("org/repo")], "org", context)
+
+        self.assertEqual(context.stream.write.call_args.args[0].full_name, "org/repo")
+        result = context.history.record.call_args.args[0]
+        self.assertEqual(result.full_name, "org/repo")
+        self.assertGreaterEqual(result.duration, 0)
+
+    def test_scan_repositories_skips_other_shards(self):
+        """Test that only the repositories of the shard are processed."""
+        context = make_context(dry_run=True)
+        context.shard_count = 2
+        names = [f"org/repo{i}" for i in range(10)]
+
+        scan_repositories([make_repo(name) for name in names], "org", context)
+
+        self.assertEqual(
+            context.results.repos_missing_codeowners,
+            [name for name in names if in_shard(name, 0, 2)],
+        )
+        self.assertNotEqual(len(context.results.repos_missing_codeowners), 10)
+
+    def test_scan_repositories_stops_when_budget_exhausted(self):
+        """Test that the scan stops once the rate limit budget is exhausted."""
+        budget = RateLimitBudget(reserve=10)
+        budget.update("core", 5000, 5, 0)
+        context = make_context(dry_run=True, budget=budget)
+
+        scan_repositories([make_repo()], "org", context)
+
+        self.assertEqual(context.results.repos_missing_codeowners, [])
+        self.assertEqual(context.results.stop_reason, "rate limit budget exhausted")
+
+    def test_scan_repositories_stops_when_deadline_expires(self):
+        """Test that the scan stops cleanly once the deadline expires."""
+        context = make_context(dry_run=True)
+        context.deadline = RunDeadline(None)
+        context.deadline.cancel()
+
+        scan_repositories([make_repo()], "org", context)
+
+        self.assertEqual(context.results.repos_missing_codeowners, [])
+        self.assertEqual(context.results.stop_reason, "the run was cancelled")
+
+    def test_scan_repositories_records_checkpoint(self):
+        """Test that completed repositories are skipped and recorded."""
+        context = make_context(dry_run=True, exempt_repositories_list=["org/exempt"])
+        context.deadline = RunDeadline(60)
+        context.checkpoint = Checkpoint("unused.json", "fingerprint")
+        context.checkpoint.record("org/done", None)
+        repos = MagicMock()
+        repos.__iter__.return_value = iter(
+            [make_repo("org/done"), make_repo("org/exempt"), make_repo("org/new")]
+        )
+        repos.last_url = "https://api.github.com/orgs/org/repos?page=2"
+
+        scan_repositories(repos, "org", context)
+
+        self.assertEqual(context.results.repos_missing_codeowners, ["org/new"])
+        self.assertEqual(
+            set(context.checkpoint.completed), {"org/done", "org/exempt", "org/new"}
+        )
+        self.assertIsNone(context.checkpoint.completed["org/exempt"])
+        self.assertEqual(
+            context.checkpoint.get_cursor("org"),
+            "https://api.github.com/orgs/org/repos?page=2",
+        )
+
+    def test_scan_repositories_records_deferred_repositories(self):
+        """Test that the unprocessed repositories of a prioritized scan are deferred."""
+        budget = RateLimitBudget(reserve=10)
+        context = make_context(dry_run=True, budget=budget)
+        context.history = MagicMock()
+        context.checkpoint = Checkpoint("unused.json", "fingerprint")
+        context.checkpoint.record("org/done", None)
+        repos = [make_repo("org/first"), make_repo("org/done"), make_repo("org/last")]
+        context.history.record.side_effect = lambda _result: budget.update(
+            "core", 5000, 5, 0
+        )
+
+        scan_repositories(repos, "org", context)
+
+        self.assertEqual(context.results.repos_missing_codeowners, ["org/first"])
+        context.history.record_deferred.assert_called_once_with(["org/last"])
+
+
+class TestScanOrganizations(unittest.TestCase):
+    """Test the scan_organizations function in cleanowners.py"""
+
+    @patch("cleanowners.get_repos_iterator")
+    def test_scan_organizations_with_repository_list(self, mock_repos):
+        """Test that a repository list is scanned against the single organization."""
+        mock_repos.return_value = [make_repo("org/repo")]
+        context = make_context(dry_run=True)
+
+        scan_organizations(["org"], ["org/repo"], context, 2)
+
+        mock_repos.assert_called_once_with(
+            "org", ["org/repo"], context.github_connection, ""
+        )
+        self.assertEqual(context.results.repos_missing_codeowners, ["org/repo"])
+
+    @patch("cleanowners.get_repos_iterator")
+    def test_scan_organizations_fetches_the_shard_only(self, mock_repos):
+        """Test that only the repositories of the shard are fetched."""
+        mock_repos.return_value = []
+        names = [f"org/repo{i}" for i in range(10)]
+        context = make_context(dry_run=True)
+        context.shard_count = 2
+
+        scan_organizations(["org"], names, context, 1)
+        scan_organizations(["org"], names[1:2], context, 1)
+
+        mock_repos.assert_called_once_with(
+            "org",
+            [name for name in names if in_shard(name, 0, 2)],
+            context.github_connection,
+            "",
+        )
+
+    @patch("cleanowners.get_repos_iterator")
+    def test_scan_organizations_concurrently(self, mock_repos):
+        """Test that every organization is scanned and errors are isolated."""
+
+        def repos_for(
+            organization, _repository_list, _github_connection, _local_checkouts
+        ):
+            if organization == "broken":
+                raise ValueError("listing failed")
+            return [make_repo(f"{organization}/repo")]
+
+        mock_repos.side_effect = repos_for
+        context = make_context(dry_run=True)
+
+        scan_organizations(["org1", "org2", "broken"], [], context, 2)
+
+        self.assertEqual(
+            sorted(context.results.repos_missing_codeowners),
+            ["org1/repo", "org2/repo"],
+        )
+        self.assertEqual(context.results.errors, ["broken: listing failed"])
+
+    @patch("cleanowners.get_repos_iterator")
+    def test_scan_organizations_resumes_from_cursor(self, mock_repos):
+        """Test that the listing resumes from the page saved in the checkpoint."""
+        repos = MagicMock()
+        repos.__iter__.return_value = iter([])
+        mock_repos.return_value = repos
+        context = make_context(dry_run=True)
+        context.checkpoint = Checkpoint("unused.json", "fingerprint")
+        context.checkpoint.set_cursor("org", "https://api.github.com/page=3")
+
+        scan_organizations(["org"], [], context, 1)
+
+        self.assertEqual(repos.url, "https://api.github.com/page=3")
+
+    @patch("cleanowners.get_repos_iterator")
+    def test_scan_organizations_with_priority(self, mock_repos):
+        """Test that repositories are scanned in priority order."""
+        for repository_list in ([], ["org/old", "org/new"]):
+            old, new = make_repo("org/old"), make_repo("org/new")
+            old.as_dict.return_value = {"pushed_at": "2024-01-01T00:00:00Z"}
+            new.as_dict.return_value = {"pushed_at": "2024-06-01T00:00:00Z"}
+            mock_repos.return_value = [old, new]
+            context = make_context(dry_run=True)
+            context.priority = "pushed"
+
+            scan_organizations(["org"], repository_list, context, 1)
+
+            self.assertEqual(
+                context.results.repos_missing_codeowners, ["org/new", "org/old"]
+            )
+
+
+class TestGetEnterpriseOrganizations(unittest.TestCase):
+    """Test the get_enterprise_organizations function in cleanowners.py"""
+
+    @patch("cleanowners.graphql_query")
+    def test_get_enterprise_organizations_paginates(self, mock_query):
+        """Test that every page of organizations is collected."""
+        mock_query.side_effect = [
+            {
+                "enterprise": {
+                    "organizations": {
+                        "nodes": [{"login": "org1"}],
+                        "pageInfo": {"hasNextPage": True, "endCursor": "c1"},
+                    }
+                }
+            },
+            {
+                "enterprise": {
+                    "organizations": {
+                        "nodes": [{"login": "org2"}],
+                        "pageInfo": {"hasNextPage": False, "endCursor": None},
+                    }
+                }
+            },
+        ]
+
+        result = get_enterprise_organizations(MagicMock(), "my-enterprise")
+
+        self.assertEqual(result, ["org1", "org2"])
+        self.assertEqual(
+            mock_query.call_args.args[2], {"slug": "my-enterprise", "cursor": "c1"}
+        )
+
+    @patch("cleanowners.graphql_query")
+    def test_get_enterprise_organizations_not_found(self, mock_query):
+        """Test that an unknown enterprise raises a ValueError."""
+        mock_query.return_value = {"enterprise": None}
+
+        with self.assertRaises(ValueError):
+            get_enterprise_organizations(MagicMock(), "missing")
+
+
+class TestConfigureConnectionPool(unittest.TestCase):
+    """Test the configure_connection_pool function in cleanowners.py"""
+
+    def test_configure_connection_pool_mounts_adapter(self):
+        """Test that a pooled adapter is mounted for both schemes."""
+        github_connection = MagicMock()
+
+        configure_connection_pool(github_connection, 4)
+
+        self.assertEqual(github_connection.session.mount.call_count, 2)
+        adapter = github_connection.session.mount.call_args.args[1]
+        self.assertEqual(adapter._pool_maxsize, 8)  # pylint: disable=protected-access
+
+
+class TestReportResults(unittest.TestCase):
+    """Test the report_results function in cleanowners.py"""
+
+    @patch("cleanowners.write_to_markdown")
+    @patch("cleanowners.write_step_summary")
+    def test_report_results_writes_reports(self, mock_summary, mock_markdown):
+        """Test that every report is written and the error message returned."""
+        results = ScanResults()
+        results.add_error("first")
+        results.add_error("second")
+        results.stop("MAX_RUNTIME was reached")
+        results.owner_counts["email"] = 2
+
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            error_message = report_results(
+                results, True, True, full_results_location="results.ndjson"
+            )
+
+        self.assertEqual(error_message, "first\nsecond")
+        self.assertIn("Error: first", mock_stdout.getvalue())
+        self.assertIn("Stopped before every repository", mock_stdout.getvalue())
+        self.assertIn(
+            "Skipped the membership check of 0 team, 2 email and 0 invalid owners",
+            mock_stdout.getvalue(),
+        )
+        self.assertEqual(mock_summary.call_args.kwargs["error"], "first\nsecond")
+        self.assertEqual(
+            mock_summary.call_args.kwargs["stop_reason"], "MAX_RUNTIME was reached"
+        )
+        self.assertEqual(
+            mock_summary.call_args.kwargs["full_results_location"], "results.ndjson"
+        )
+        mock_markdown.assert_called_once_with(
+            0,
+            0,
+            0,
+            0,
+            {},
+            [],
+            stop_reason="MAX_RUNTIME was reached",
+            owner_counts={"team": 0, "email": 2, "invalid": 0},
+            repo_and_outside_collaborators={},
+            repo_and_unowned_rules={},
+        )
+
+    @patch("cleanowners.write_to_markdown")
+    @patch("cleanowners.write_step_summary")
+    def test_report_results_without_issue_report(self, mock_summary, mock_markdown):
+        """Test that report.md is only written when requested."""
+        with patch("sys.stdout", new_callable=StringIO):
+            error_message = report_results(ScanResults(), False, False)
+
+        self.assertIsNone(error_message)
+        mock_summary.assert_called_once()
+        mock_markdown.assert_not_called()
@@ -0,0 +1,77 @@
+"""Test the code_search module."""
+
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from code_search import search_codeowners_repositories
+
+
+def make_response(status_code=200, items=(), total_count=None, incomplete=False):
+    """Build a code search response."""
+    response = MagicMock(status_code=status_code)
+    response.json.return_value = {
+        "total_count": len(items) if total_count is None else total_count,
+        "incomplete_results": incomplete,
+        "items": [
+            {"path": path, "repository": {"full_name": repository}}
+            for repository, path in items
+        ],
+    }
+    return response
+
+
+class TestSearchCodeownersRepositories(unittest.TestCase):
+    """Test the search_codeowners_repositories function"""
+
+    def setUp(self):
+        self.github_connection = MagicMock()
+        self.github_connection.session.base_url = "https://api.github.com"
+
+    @patch("code_search.SEARCH_PAGE_SIZE", 2)
+    def test_matches_of_every_login_and_page(self):
+        """Test that the CODEOWNERS matches of every page and login are merged."""
+        self.github_connection.session.get.side_effect = [
+            make_response(
+                items=[("org/a", ".github/CODEOWNERS"), ("org/b", "src/CODEOWNERS")],
+                total_count=3,
+            ),
+            make_response(items=[("org/c", "CODEOWNERS")], total_count=3),
+            make_response(items=[("org/a", "docs/CODEOWNERS")]),
+        ]
+
+        repositories = search_codeowners_repositories(
+            self.github_connection, ["org"], ["alice", "bob"]
+        )
+
+        self.assertEqual(repositories, ["org/a", "org/c"])
+        first_call = self.github_connection.session.get.call_args_list[0]
+        self.assertEqual(first_call.args[0], "https://api.github.com/search/code")
+        self.assertEqual(
+            first_call.kwargs["params"]["q"], '"@alice" org:org filename:CODEOWNERS'
+        )
+        self.assertEqual(
+            self.github_connection.session.get.call_args_list[1].kwargs["params"][
+                "page"
+            ],
+            2,
+        )
+
+    def test_incomplete_results(self):
+        """Test that incomplete or truncated results fall back to a full scan."""
+        for response in (
+            make_response(incomplete=True),
+            make_response(total_count=1001),
+            make_response(status_code=403),
+        ):
+            self.github_connection.session.get.side_effect = [response]
+            with patch("sys.stdout", new_callable=StringIO):
+                self.assertIsNone(
+                    search_codeowners_repositories(
+                        self.github_connection, ["org"], ["alice"]
+                    )
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Test the functions of the collaborators module."""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import github3
+from collaborators import get_removal_reason, get_writers
+from results import RepoResult, ScanResults
+
+
+class TestGetWriters(unittest.TestCase):
+    """Test the get_writers function"""
+
+    def test_get_writers_keeps_write_permissions(self):
+        """Test that only collaborators who can push are returned."""
+        repo = MagicMock()
+        repo.collaborators.return_value = [
+            MagicMock(login="Admin", permissions={"admin": True, "push": True}),
+            MagicMock(login="maintainer", permissions={"maintain": True}),
+            MagicMock(login="writer", permissions={"push": True}),
+            MagicMock(login="triager", permissions={"triage": True, "pull": True}),
+            MagicMock(login="unknown", permissions=None),
+        ]
+
+        self.assertEqual(
+            get_writers(repo, ScanResults()), {"admin", "maintainer", "writer"}
+        )
+
+    def test_get_writers_without_access_to_the_listing(self):
+        """Test that None is returned when the collaborators cannot be listed."""
+        repo = MagicMock(full_name="org/repo")
+        repo.collaborators.side_effect = github3.exceptions.ForbiddenError(
+            MagicMock(status_code=403)
+        )
+
+        results = ScanResults()
+
+        with patch("builtins.print") as mock_print:
+            self.assertIsNone(get_writers(repo, results))
+
+        mock_print.assert_called_once()
+        self.assertEqual(len(results.errors), 1)
+        self.assertTrue(
+            results.errors[0].startswith("Unable to list the collaborators of org/repo")
+        )
+
+
+class TestGetRemovalReason(unittest.TestCase):
+    """Test the get_removal_reason function"""
+
+    def decide(self, policy, is_member=False, writers=None):
+        """Decide on alice, an outside collaborator of org, with a policy."""
+        context = MagicMock(outside_collaborators=policy)
+        context.membership.outside_collaborators.return_value = {"alice"}
+        result = RepoResult("org/repo", "present")
+        with patch("builtins.print"):
+            reason = get_removal_reason(
+                context, "org", "Alice", is_member, writers, result
+            )
+        return reason, result.outside_collaborators, context
+
+    def test_members_are_kept_with_write_access(self):
+        """Test that members are only removed without write access."""
+        self.assertIsNone(self.decide("", is_member=True)[0])
+        self.assertIsNone(self.decide("", is_member=True, writers={"alice"})[0])
+        self.assertEqual(
+            self.decide("", is_member=True, writers=set())[0],
+            "does not have write access to org/repo",
+        )
+
+    def test_outside_collaborators_are_not_looked_up_without_policy(self):
+        """Test that no policy removes every non member without a lookup."""
+        reason, outside, context = self.decide("")
+
+        self.assertEqual(reason, "is not a member of org")
+        self.assertEqual(outside, [])
+        context.membership.outside_collaborators.assert_not_called()
+
+    def test_outside_collaborator_policies(self):
+        """Test that outside collaborators are kept, flagged or removed."""
+        self.assertEqual(self.decide("keep")[:2], (None, []))
+        self.assertEqual(self.decide("flag")[:2], (None, ["Alice"]))
+        self.assertEqual(
+            self.decide("remove")[:2],
+            ("is an outside collaborator of org", ["Alice"]),
+        )
+
+    def test_other_non_members_are_removed(self):
+        """Test that a non member who is not an outside collaborator is removed."""
+        context = MagicMock(outside_collaborators="keep")
+        context.membership.outside_collaborators.return_value = set()
+        result = RepoResult("org/repo", "present")
+
+        self.assertEqual(
+            get_removal_reason(context, "org", "bob", False, None, result),
+            "is not a member of org",
+        )
+
+    def test_unknown_outside_collaborators_are_kept(self):
+        """Test that non members are kept when the listing was forbidden."""
+        for policy in ("keep", "flag", "remove"):
+            context = MagicMock(outside_collaborators=policy)
+            context.membership.outside_collaborators.return_value = None
+            result = RepoResult("org/repo", "present")
+
+            with patch("builtins.print") as mock_print:
+                reason = get_removal_reason(context, "org", "bob", False, None, result)
+
+            self.assertIsNone(reason)
+            self.assertEqual(result.outside_collaborators, [])
+            mock_print.assert_called_once_with(
+                "\tThe outside collaborators of org are unknown. Keeping bob in org/repo"
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
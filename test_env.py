@@ -4,7 +4,13 @@ import os
 import unittest
 from unittest.mock import patch
 
-from env import get_env_vars, get_int_env_var
+from env import (
+    EnvVars,
+    get_auth_env_vars,
+    get_credential_pool_env_vars,
+    get_env_vars,
+    get_int_env_var,
+)
 
 BODY = "Consider these updates to the CODEOWNERS file to remove users no longer in this organization."
 COMMIT_MESSAGE = "Remove users no longer in this organization from CODEOWNERS file"
@@ -19,6 +25,9 @@ class TestEnv(unittest.TestCase):
     def setUp(self):
         env_keys = [
             "BODY",
+            "BRANCHES",
+            "CHECK_WRITE_ACCESS",
+            "CHECKPOINT_FILE",
             "COMMIT_MESSAGE",
             "DRY_RUN",
             "ENABLE_GITHUB_ACTIONS_STEP_SUMMARY",
@@ -28,10 +37,26 @@ class TestEnv(unittest.TestCase):
             "GH_APP_INSTALLATION_ID",
             "GH_APP_PRIVATE_KEY",
             "GH_TOKEN",
+            "DEPARTED_USERS",
+            "ENTERPRISE",
+            "EVENT_PATH",
+            "MAX_WORKERS",
+            "LOCAL_CHECKOUTS",
+            "MEMBERSHIP_SNAPSHOT",
+            "METRICS_FILE",
             "ORGANIZATION",
+            "OUTSIDE_COLLABORATORS",
+            "PATCH_DIR",
+            "PREFLIGHT",
+            "PRIORITY",
             "REPOSITORY",
+            "RESULTS_FILE",
+            "SHARD_COUNT",
+            "SHARD_INDEX",
             "TITLE",
+            "UNOWNED_PATHS",
             "ISSUE_REPORT",
+            "MAX_RUNTIME",
         ]
         for key in env_keys:
             if key in os.environ:
@@ -56,22 +81,42 @@ class TestEnv(unittest.TestCase):
     )
     def test_get_env_vars_with_org(self):
         """Test that all environment variables are set correctly using an organization"""
-        expected_result = (
-            ORGANIZATION,
-            ["org/repo1", "org2/repo2"],
-            None,
-            None,
-            b"",
-            False,
-            TOKEN,
-            "",
-            ["repo4", "repo5"],
-            False,
-            TITLE,
-            BODY,
-            COMMIT_MESSAGE,
-            False,
-            True,
+        expected_result = EnvVars(
+            organization_list=[ORGANIZATION],
+            repository_list=["org/repo1", "org2/repo2"],
+            gh_app_id=None,
+            gh_app_installation_id=None,
+            gh_app_private_key_bytes=b"",
+            gh_app_enterprise_only=False,
+            token=TOKEN,
+            ghe="",
+            exempt_repositories_list=["repo4", "repo5"],
+            dry_run=False,
+            title=TITLE,
+            body=BODY,
+            commit_message=COMMIT_MESSAGE,
+            issue_report=False,
+            enable_github_actions_step_summary=True,
+            enterprise="",
+            max_workers=4,
+            shard_index=0,
+            shard_count=1,
+            max_runtime=None,
+            checkpoint_file="",
+            results_file="",
+            history_db="",
+            membership_snapshot_list=[],
+            local_checkouts="",
+            patch_dir="",
+            preflight=False,
+            priority="",
+            event_path="",
+            departed_user_list=[],
+            metrics_file="",
+            check_write_access=False,
+            outside_collaborators="",
+            branch_list=[],
+            unowned_paths=False,
         )
         result = get_env_vars(True)
         self.assertEqual(result, expected_result)
@@ -96,22 +141,42 @@ class TestEnv(unittest.TestCase):
     )
     def test_get_env_vars_with_github_app_and_repos(self):
         """Test that all environment variables are set correctly using a list of repositories"""
-        expected_result = (
-            "",
-            ["org/repo1", "org2/repo2"],
-            12345,
-            678910,
-            b"hello",
-            False,
-            "",
-            "",
-            ["repo4", "repo5"],
-            True,
-            TITLE,
-            BODY,
-            COMMIT_MESSAGE,
-            False,
-            True,
+        expected_result = EnvVars(
+            organization_list=[],
+            repository_list=["org/repo1", "org2/repo2"],
+            gh_app_id=12345,
+            gh_app_installation_id=678910,
+            gh_app_private_key_bytes=b"hello",
+            gh_app_enterprise_only=False,
+            token="",
+            ghe="",
+            exempt_repositories_list=["repo4", "repo5"],
+            dry_run=True,
+            title=TITLE,
+            body=BODY,
+            commit_message=COMMIT_MESSAGE,
+            issue_report=False,
+            enable_github_actions_step_summary=True,
+            enterprise="",
+            max_workers=4,
+            shard_index=0,
+            shard_count=1,
+            max_runtime=None,
+            checkpoint_file="",
+            results_file="",
+            history_db="",
+            membership_snapshot_list=[],
+            local_checkouts="",
+            patch_dir="",
+            preflight=False,
+            priority="",
+            event_path="",
+            departed_user_list=[],
+            metrics_file="",
+            check_write_access=False,
+            outside_collaborators="",
+            branch_list=[],
+            unowned_paths=False,
         )
         result = get_env_vars(True)
         self.assertEqual(result, expected_result)
@@ -157,22 +222,42 @@ class TestEnv(unittest.TestCase):
     )
     def test_get_env_vars_with_token_and_repos(self):
         """Test that all environment variables are set correctly using a list of repositories"""
-        expected_result = (
-            "",
-            ["org/repo1", "org2/repo2"],
-            None,
-            None,
-            b"",
-            False,
-            TOKEN,
-            "",
-            ["repo4", "repo5"],
-            True,
-            TITLE,
-            BODY,
-            COMMIT_MESSAGE,
-            False,
-            True,
+        expected_result = EnvVars(
+            organization_list=[],
+            repository_list=["org/repo1", "org2/repo2"],
+            gh_app_id=None,
+            gh_app_installation_id=None,
+            gh_app_private_key_bytes=b"",
+            gh_app_enterprise_only=False,
+            token=TOKEN,
+            ghe="",
+            exempt_repositories_list=["repo4", "repo5"],
+            dry_run=True,
+            title=TITLE,
+            body=BODY,
+            commit_message=COMMIT_MESSAGE,
+            issue_report=False,
+            enable_github_actions_step_summary=True,
+            enterprise="",
+            max_workers=4,
+            shard_index=0,
+            shard_count=1,
+            max_runtime=None,
+            checkpoint_file="",
+            results_file="",
+            history_db="",
+            membership_snapshot_list=[],
+            local_checkouts="",
+            patch_dir="",
+            preflight=False,
+            priority="",
+            event_path="",
+            departed_user_list=[],
+            metrics_file="",
+            check_write_access=False,
+            outside_collaborators="",
+            branch_list=[],
+            unowned_paths=False,
         )
         result = get_env_vars(True)
         self.assertEqual(result, expected_result)
@@ -193,22 +278,42 @@ class TestEnv(unittest.TestCase):
     )
     def test_get_env_vars_optional_values(self):
         """Test that optional values are set to their default values if not provided"""
-        expected_result = (
-            ORGANIZATION,
-            [],
-            None,
-            None,
-            b"",
-            False,
-            TOKEN,
-            "",
-            [],
-            False,
-            TITLE,
-            BODY,
-            COMMIT_MESSAGE,
-            True,
-            True,
+        expected_result = EnvVars(
+            organization_list=[ORGANIZATION],
+            repository_list=[],
+            gh_app_id=None,
+            gh_app_installation_id=None,
+            gh_app_private_key_bytes=b"",
+            gh_app_enterprise_only=False,
+            token=TOKEN,
+            ghe="",
+            exempt_repositories_list=[],
+            dry_run=False,
+            title=TITLE,
+            body=BODY,
+            commit_message=COMMIT_MESSAGE,
+            issue_report=True,
+            enable_github_actions_step_summary=True,
+            enterprise="",
+            max_workers=4,
+            shard_index=0,
+            shard_count=1,
+            max_runtime=None,
+            checkpoint_file="",
+            results_file="",
+            history_db="",
+            membership_snapshot_list=[],
+            local_checkouts="",
+            patch_dir="",
+            preflight=False,
+            priority="",
+            event_path="",
+            departed_user_list=[],
+            metrics_file="",
+            check_write_access=False,
+            outside_collaborators="",
+            branch_list=[],
+            unowned_paths=False,
         )
         result = get_env_vars(True)
         self.assertEqual(result, expected_result)
@@ -227,22 +332,42 @@ class TestEnv(unittest.TestCase):
     )
     def test_get_env_vars_with_step_summary_disabled(self):
         """Test that ENABLE_GITHUB_ACTIONS_STEP_SUMMARY can be explicitly disabled"""
-        expected_result = (
-            ORGANIZATION,
-            [],
-            None,
-            None,
-            b"",
-            False,
-            TOKEN,
-            "",
-            [],
-            False,
-            "Clean up CODEOWNERS file",
-            "Consider these updates to the CODEOWNERS file to remove users no longer in this organization.",
-            "Remove users no longer in this organization from CODEOWNERS file",
-            False,
-            False,
+        expected_result = EnvVars(
+            organization_list=[ORGANIZATION],
+            repository_list=[],
+            gh_app_id=None,
+            gh_app_installation_id=None,
+            gh_app_private_key_bytes=b"",
+            gh_app_enterprise_only=False,
+            token=TOKEN,
+            ghe="",
+            exempt_repositories_list=[],
+            dry_run=False,
+            title="Clean up CODEOWNERS file",
+            body="Consider these updates to the CODEOWNERS file to remove users no longer in this organization.",
+            commit_message="Remove users no longer in this organization from CODEOWNERS file",
+            issue_report=False,
+            enable_github_actions_step_summary=False,
+            enterprise="",
+            max_workers=4,
+            shard_index=0,
+            shard_count=1,
+            max_runtime=None,
+            checkpoint_file="",
+            results_file="",
+            history_db="",
+            membership_snapshot_list=[],
+            local_checkouts="",
+            patch_dir="",
+            preflight=False,
+            priority="",
+            event_path="",
+            departed_user_list=[],
+            metrics_file="",
+            check_write_access=False,
+            outside_collaborators="",
+            branch_list=[],
+            unowned_paths=False,
         )
         result = get_env_vars(True)
         self.assertEqual(result, expected_result)
@@ -278,22 +403,42 @@ class TestEnv(unittest.TestCase):
     )
     def test_get_env_vars_with_repos_no_dry_run(self):
         """Test that all environment variables are set correctly when DRY_RUN is false"""
-        expected_result = (
-            ORGANIZATION,
-            [],
-            None,
-            None,
-            b"",
-            False,
-            TOKEN,
-            "",
-            [],
-            False,
-            "Clean up CODEOWNERS file",
-            "Consider these updates to the CODEOWNERS file to remove users no longer in this organization.",
-            "Remove users no longer in this organization from CODEOWNERS file",
-            False,
-            True,
+        expected_result = EnvVars(
+            organization_list=[ORGANIZATION],
+            repository_list=[],
+            gh_app_id=None,
+            gh_app_installation_id=None,
+            gh_app_private_key_bytes=b"",
+            gh_app_enterprise_only=False,
+            token=TOKEN,
+            ghe="",
+            exempt_repositories_list=[],
+            dry_run=False,
+            title="Clean up CODEOWNERS file",
+            body="Consider these updates to the CODEOWNERS file to remove users no longer in this organization.",
+            commit_message="Remove users no longer in this organization from CODEOWNERS file",
+            issue_report=False,
+            enable_github_actions_step_summary=True,
+            enterprise="",
+            max_workers=4,
+            shard_index=0,
+            shard_count=1,
+            max_runtime=None,
+            checkpoint_file="",
+            results_file="",
+            history_db="",
+            membership_snapshot_list=[],
+            local_checkouts="",
+            patch_dir="",
+            preflight=False,
+            priority="",
+            event_path="",
+            departed_user_list=[],
+            metrics_file="",
+            check_write_access=False,
+            outside_collaborators="",
+            branch_list=[],
+            unowned_paths=False,
         )
         result = get_env_vars(True)
         self.assertEqual(result, expected_result)
@@ -316,7 +461,7 @@ class TestEnv(unittest.TestCase):
     def test_get_env_vars_loads_dotenv_when_not_test(self, mock_load_dotenv):
         """Test that get_env_vars loads from .env file when test=False."""
         result = get_env_vars(False)
-        self.assertEqual(result[0], ORGANIZATION)
+        self.assertEqual(result.organization_list, [ORGANIZATION])
         mock_load_dotenv.assert_called_once()
 
     @patch.dict(
@@ -375,5 +520,451 @@ class TestEnv(unittest.TestCase):
             get_env_vars(True)
 
 
+class TestEnvScanScope(unittest.TestCase):
+    """Test the environment variables that select what a run scans"""
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ORGANIZATION": "org1, org2,,org3",
+            "MAX_WORKERS": "8",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_multiple_organizations(self):
+        """Test that ORGANIZATION accepts a comma separated list of organizations."""
+        result = get_env_vars(True)
+        self.assertEqual(result.organization_list, ["org1", "org2", "org3"])
+        self.assertEqual(result.max_workers, 8)
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ENTERPRISE": " my-enterprise ",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_enterprise_only(self):
+        """Test that ENTERPRISE alone satisfies the organization/repository requirement."""
+        result = get_env_vars(True)
+        self.assertEqual(result.organization_list, [])
+        self.assertEqual(result.enterprise, "my-enterprise")
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ORGANIZATION": ORGANIZATION,
+            "MAX_WORKERS": "0",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_raises_for_max_workers_below_one(self):
+        """Test that MAX_WORKERS lower than 1 raises ValueError."""
+        with self.assertRaises(ValueError):
+            get_env_vars(True)
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ORGANIZATION": ORGANIZATION,
+            "SHARD_INDEX": "2",
+            "SHARD_COUNT": "4",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_shards(self):
+        """Test that SHARD_INDEX and SHARD_COUNT are read."""
+        result = get_env_vars(True)
+        self.assertEqual((result.shard_index, result.shard_count), (2, 4))
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ORGANIZATION": ORGANIZATION,
+            "SHARD_INDEX": "4",
+            "SHARD_COUNT": "4",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_raises_for_shard_index_out_of_range(self):
+        """Test that SHARD_INDEX must be lower than SHARD_COUNT."""
+        with self.assertRaises(ValueError):
+            get_env_vars(True)
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ORGANIZATION": ORGANIZATION,
+            "SHARD_COUNT": "-2",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_raises_for_shard_count_below_one(self):
+        """Test that SHARD_COUNT lower than 1 raises ValueError."""
+        with self.assertRaises(ValueError):
+            get_env_vars(True)
+
+
+class TestEnvCheckpoint(unittest.TestCase):
+    """Test the environment variables that control checkpoints and the time budget"""
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ORGANIZATION": ORGANIZATION,
+            "MAX_RUNTIME": "300",
+            "CHECKPOINT_FILE": " cleanowners-checkpoint.json ",
+            "RESULTS_FILE": "results.ndjson",
+            "HISTORY_DB": "history.db",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_checkpoint(self):
+        """Test that MAX_RUNTIME, CHECKPOINT_FILE, RESULTS_FILE and HISTORY_DB are read."""
+        result = get_env_vars(True)
+        self.assertEqual(
+            (
+                result.max_runtime,
+                result.checkpoint_file,
+                result.results_file,
+                result.history_db,
+            ),
+            (300, "cleanowners-checkpoint.json", "results.ndjson", "history.db"),
+        )
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ORGANIZATION": ORGANIZATION,
+            "MAX_RUNTIME": "0",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_raises_for_max_runtime_below_one(self):
+        """Test that MAX_RUNTIME lower than 1 raises ValueError."""
+        with self.assertRaises(ValueError):
+            get_env_vars(True)
+
+
+class TestEnvMembershipSnapshot(unittest.TestCase):
+    """Test the environment variable that points to membership snapshots"""
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ORGANIZATION": ORGANIZATION,
+            "MEMBERSHIP_SNAPSHOT": "org1.members, org2.members,",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_membership_snapshots(self):
+        """Test that MEMBERSHIP_SNAPSHOT is split into a list of files."""
+        result = get_env_vars(True)
+        self.assertEqual(
+            result.membership_snapshot_list, ["org1.members", "org2.members"]
+        )
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ORGANIZATION": ORGANIZATION,
+            "PREFLIGHT": "true",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_preflight(self):
+        """Test that PREFLIGHT is read."""
+        self.assertTrue(get_env_vars(True).preflight)
+
+
+class TestEnvPriority(unittest.TestCase):
+    """Test the environment variable that orders the scan"""
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ORGANIZATION": ORGANIZATION,
+            "PRIORITY": " Stale ",
+            "HISTORY_DB": "history.db",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_priority(self):
+        """Test that PRIORITY is read."""
+        self.assertEqual(get_env_vars(True).priority, "stale")
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ORGANIZATION": ORGANIZATION,
+            "PRIORITY": "random",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_unknown_priority(self):
+        """Test that an unknown PRIORITY raises ValueError."""
+        with self.assertRaises(ValueError):
+            get_env_vars(True)
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ORGANIZATION": ORGANIZATION,
+            "PRIORITY": "handles",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_history_priority_requires_history(self):
+        """Test that PRIORITY handles without HISTORY_DB raises ValueError."""
+        with self.assertRaises(ValueError):
+            get_env_vars(True)
+
+
+class TestEnvEvent(unittest.TestCase):
+    """Test the environment variable of the event mode"""
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "EVENT_PATH": " /github/workflow/event.json ",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_event_path_only(self):
+        """Test that an event payload can stand in for the organization."""
+        result = get_env_vars(True)
+
+        self.assertEqual(result.organization_list, [])
+        self.assertEqual(result.event_path, "/github/workflow/event.json")
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "ORGANIZATION": ORGANIZATION,
+            "DEPARTED_USERS": "alice, @bob,,",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_departed_users(self):
+        """Test that DEPARTED_USERS is read as a list of logins."""
+        self.assertEqual(get_env_vars(True).departed_user_list, ["alice", "bob"])
+
+
+class TestEnvLocalCheckouts(unittest.TestCase):
+    """Test the environment variables of the local checkout scan mode"""
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": ORGANIZATION,
+            "LOCAL_CHECKOUTS": " /srv/checkouts ",
+            "MEMBERSHIP_SNAPSHOT": "org.members",
+            "PATCH_DIR": "patches",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_local_checkouts(self):
+        """Test that local checkouts need no token and read PATCH_DIR."""
+        result = get_env_vars(True)
+        self.assertIsNone(result.token)
+        self.assertEqual(
+            (result.local_checkouts, result.patch_dir), ("/srv/checkouts", "patches")
+        )
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": ORGANIZATION,
+            "LOCAL_CHECKOUTS": "/srv/checkouts",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_local_checkouts_require_snapshot(self):
+        """Test that LOCAL_CHECKOUTS without MEMBERSHIP_SNAPSHOT raises ValueError."""
+        with self.assertRaises(ValueError):
+            get_env_vars(True)
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": "org1,org2",
+            "LOCAL_CHECKOUTS": "/srv/checkouts",
+            "MEMBERSHIP_SNAPSHOT": "org.members",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_local_checkouts_with_several_organizations(self):
+        """Test that LOCAL_CHECKOUTS with several organizations raises ValueError."""
+        with self.assertRaises(ValueError):
+            get_env_vars(True)
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": ORGANIZATION,
+            "LOCAL_CHECKOUTS": "/srv/checkouts",
+            "MEMBERSHIP_SNAPSHOT": "org.members",
+            "CHECK_WRITE_ACCESS": "true",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_local_checkouts_with_write_access_check(self):
+        """Test that LOCAL_CHECKOUTS with CHECK_WRITE_ACCESS raises ValueError."""
+        with self.assertRaises(ValueError):
+            get_env_vars(True)
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": ORGANIZATION,
+            "GH_TOKEN": TOKEN,
+            "CHECK_WRITE_ACCESS": "true",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_write_access_check(self):
+        """Test that CHECK_WRITE_ACCESS is read as a boolean."""
+        self.assertTrue(get_env_vars(True).check_write_access)
+
+    def test_get_env_vars_with_unowned_paths(self):
+        """Test that UNOWNED_PATHS is read as a boolean and needs the GitHub API."""
+        with patch.dict(
+            os.environ,
+            {"ORGANIZATION": ORGANIZATION, "GH_TOKEN": TOKEN, "UNOWNED_PATHS": "true"},
+            clear=True,
+        ):
+            self.assertTrue(get_env_vars(True).unowned_paths)
+        with patch.dict(
+            os.environ,
+            {
+                "ORGANIZATION": ORGANIZATION,
+                "LOCAL_CHECKOUTS": "/srv/checkouts",
+                "MEMBERSHIP_SNAPSHOT": "org.members",
+                "UNOWNED_PATHS": "true",
+            },
+            clear=True,
+        ):
+            with self.assertRaises(ValueError):
+                get_env_vars(True)
+
+    def test_get_env_vars_with_branches(self):
+        """Test that BRANCHES is read as a list of patterns."""
+        with patch.dict(
+            os.environ,
+            {
+                "ORGANIZATION": ORGANIZATION,
+                "GH_TOKEN": TOKEN,
+                "BRANCHES": " release/*, protected ,",
+            },
+            clear=True,
+        ):
+            self.assertEqual(get_env_vars(True).branch_list, ["release/*", "protected"])
+        with patch.dict(
+            os.environ,
+            {
+                "ORGANIZATION": ORGANIZATION,
+                "LOCAL_CHECKOUTS": "/srv/checkouts",
+                "MEMBERSHIP_SNAPSHOT": "org.members",
+                "BRANCHES": "release/*",
+            },
+            clear=True,
+        ):
+            with self.assertRaises(ValueError):
+                get_env_vars(True)
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": ORGANIZATION,
+            "GH_TOKEN": TOKEN,
+            "OUTSIDE_COLLABORATORS": " Flag ",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_outside_collaborators(self):
+        """Test that the OUTSIDE_COLLABORATORS policy is normalized."""
+        self.assertEqual(get_env_vars(True).outside_collaborators, "flag")
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": ORGANIZATION,
+            "GH_TOKEN": TOKEN,
+            "OUTSIDE_COLLABORATORS": "ignore",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_with_invalid_outside_collaborators(self):
+        """Test that an unknown OUTSIDE_COLLABORATORS policy raises ValueError."""
+        with self.assertRaises(ValueError):
+            get_env_vars(True)
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": ORGANIZATION,
+            "LOCAL_CHECKOUTS": "/srv/checkouts",
+            "MEMBERSHIP_SNAPSHOT": "org.members",
+            "OUTSIDE_COLLABORATORS": "keep",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_local_checkouts_with_outside_collaborators(self):
+        """Test that LOCAL_CHECKOUTS with OUTSIDE_COLLABORATORS raises ValueError."""
+        with self.assertRaises(ValueError):
+            get_env_vars(True)
+
+
+class TestGetAuthEnvVars(unittest.TestCase):
+    """Test the get_auth_env_vars function"""
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": " token1, token2 ,",
+            "GH_APP_ID": "1",
+            "GH_APP_INSTALLATION_ID": "11,12,invalid",
+            "GH_APP_PRIVATE_KEY": "key",
+        },
+        clear=True,
+    )
+    def test_get_credential_pool_env_vars(self):
+        """Test that GH_TOKEN and GH_APP_INSTALLATION_ID accept lists."""
+        self.assertEqual(
+            get_credential_pool_env_vars(), (["token1", "token2"], [11, 12])
+        )
+        self.assertEqual(get_auth_env_vars(), (1, 11, b"key", False, "token1", ""))
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_TOKEN": TOKEN,
+            "GH_ENTERPRISE_URL": " https://ghe.example.com ",
+        },
+        clear=True,
+    )
+    def test_get_auth_env_vars_without_scope(self):
+        """Test that authentication does not require ORGANIZATION or REPOSITORY."""
+        self.assertEqual(
+            get_auth_env_vars(),
+            (None, None, b"", False, TOKEN, "https://ghe.example.com"),
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,172 @@
+"""Test the events module."""
+
+import json
+import os
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from events import discover_repositories, get_candidate_repositories, read_event
+from history import RunHistory
+from results import RepoResult
+
+
+class TestReadEvent(unittest.TestCase):
+    """Test the read_event function"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "event.json")
+
+    def write_event(self, payload):
+        """Write an event payload to the test file."""
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump(payload, file)
+
+    def test_member_removed_webhook(self):
+        """Test that the removed member and organization are read."""
+        self.write_event(
+            {
+                "action": "member_removed",
+                "membership": {"user": {"login": "Alice"}, "role": "member"},
+                "organization": {"login": "org"},
+            }
+        )
+
+        self.assertEqual(read_event(self.path), ("org", ["Alice"]))
+
+    def test_other_organization_action(self):
+        """Test that other organization events have no departed users."""
+        self.write_event(
+            {
+                "action": "member_added",
+                "membership": {"user": {"login": "alice"}},
+                "organization": {"login": "org"},
+            }
+        )
+
+        self.assertEqual(read_event(self.path), ("org", []))
+
+    def test_repository_dispatch(self):
+        """Test that the logins of a repository_dispatch payload are deduplicated."""
+        self.write_event(
+            {
+                "action": "offboarding",
+                "client_payload": {
+                    "logins": ["alice", "@bob", "Alice"],
+                    "login": "carol",
+                    "organization": "org",
+                },
+            }
+        )
+
+        self.assertEqual(read_event(self.path), ("org", ["alice", "bob", "carol"]))
+
+    def test_repository_dispatch_without_organization(self):
+        """Test a repository_dispatch payload of a single login."""
+        self.write_event({"action": "offboarding", "client_payload": {"login": "bob"}})
+
+        self.assertEqual(read_event(self.path), (None, ["bob"]))
+
+
+class TestGetCandidateRepositories(unittest.TestCase):
+    """Test the get_candidate_repositories function"""
+
+    def test_repositories_of_the_organizations(self):
+        """Test that the repositories mentioning any login are merged and filtered."""
+        history = MagicMock()
+        history.covers_organization.return_value = True
+        history.repos_mentioning.side_effect = lambda login: {
+            "alice": ["org/b", "other/c"],
+            "bob": ["Org/a", "org/b"],
+        }[login]
+        history.last_scanned.return_value = {"Org/a": "", "org/b": "", "org/d": ""}
+        github_connection = MagicMock()
+        github_connection.organization.return_value.repositories.return_value = [
+            MagicMock(full_name=name) for name in ["Org/a", "org/d", "org/new"]
+        ]
+
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            candidates = get_candidate_repositories(
+                history, github_connection, ["alice", "bob"], ["org"]
+            )
+
+        self.assertEqual(candidates, ["Org/a", "org/b", "org/new"])
+        self.assertIn(
+            "1 repositories of org were never scanned", mock_stdout.getvalue()
+        )
+
+    def test_without_complete_previous_scan(self):
+        """Test that there are no candidates unless every organization was fully scanned."""
+        history = MagicMock()
+        history.covers_organization.side_effect = lambda org: org == "org"
+
+        self.assertIsNone(
+            get_candidate_repositories(history, MagicMock(), ["alice"], ["org", "b"])
+        )
+        self.assertIsNone(get_candidate_repositories(history, MagicMock(), ["a"], []))
+        history.repos_mentioning.assert_not_called()
+
+
+class TestDiscoverRepositories(unittest.TestCase):
+    """Test the discover_repositories function"""
+
+    @patch("events.search_codeowners_repositories")
+    def test_history_is_used_first(self, mock_search):
+        """Test that the latest scan answers without a code search."""
+        history = MagicMock()
+        history.covers_organization.return_value = True
+        history.repos_mentioning.return_value = ["org/a"]
+        history.last_scanned.return_value = {"org/a": ""}
+
+        with patch("sys.stdout", new_callable=StringIO):
+            repositories = discover_repositories(
+                history, MagicMock(), ["alice"], ["org"]
+            )
+
+        self.assertEqual(repositories, ["org/a"])
+        mock_search.assert_not_called()
+
+    @patch("events.search_codeowners_repositories")
+    def test_stopped_previous_run(self, mock_search):
+        """Test that the history of a stopped run is not trusted."""
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        history = RunHistory(os.path.join(tmpdir.name, "history.db"))
+        self.addCleanup(history.close)
+        history.start_run("org", False, full_scan=True)
+        history.record(RepoResult("org/a", "present", usernames=["alice"]))
+        history.finish_run("Stopped after reaching MAX_RUNTIME", [])
+        history.start_run("org", False)
+        mock_search.return_value = ["org/a", "org/b"]
+
+        with patch("sys.stdout", new_callable=StringIO):
+            repositories = discover_repositories(
+                history, MagicMock(), ["alice"], ["org"]
+            )
+
+        self.assertEqual(repositories, ["org/a", "org/b"])
+        mock_search.assert_called_once()
+
+    @patch("events.search_codeowners_repositories")
+    def test_code_search_without_history(self, mock_search):
+        """Test that code search is used without history, and its fallback."""
+        mock_search.return_value = ["org/b"]
+
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertEqual(
+                discover_repositories(None, MagicMock(), ["alice"], ["org"]),
+                ["org/b"],
+            )
+            mock_search.return_value = None
+            self.assertIsNone(
+                discover_repositories(None, MagicMock(), ["alice"], ["org"])
+            )
+
+        self.assertIn("Scanning every repository", mock_stdout.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
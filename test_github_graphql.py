@@ -0,0 +1,78 @@
+"""Test the functions in the github_graphql module."""
+
+import unittest
+from unittest.mock import MagicMock
+
+from github_graphql import get_graphql_url, graphql_query
+
+
+class TestGetGraphqlUrl(unittest.TestCase):
+    """Test the get_graphql_url function"""
+
+    def test_get_graphql_url_for_github_com(self):
+        """Test that github.com uses the /graphql endpoint."""
+        github_connection = MagicMock()
+        github_connection.session.base_url = "https://api.github.com"
+
+        self.assertEqual(
+            get_graphql_url(github_connection), "https://api.github.com/graphql"
+        )
+
+    def test_get_graphql_url_for_github_enterprise_server(self):
+        """Test that GitHub Enterprise Server uses the /api/graphql endpoint."""
+        github_connection = MagicMock()
+        github_connection.session.base_url = "https://github.example.com/api/v3"
+
+        self.assertEqual(
+            get_graphql_url(github_connection),
+            "https://github.example.com/api/graphql",
+        )
+
+
+class TestGraphqlQuery(unittest.TestCase):
+    """Test the graphql_query function"""
+
+    def setUp(self):
+        self.github_connection = MagicMock()
+        self.github_connection.session.base_url = "https://api.github.com"
+
+    def test_graphql_query_returns_data(self):
+        """Test that the data of a successful response is returned."""
+        response = self.github_connection.session.post.return_value
+        response.status_code = 200
+        response.json.return_value = {"data": {"viewer": {"login": "octocat"}}}
+
+        result = graphql_query(self.github_connection, "query", {"a": 1})
+
+        self.assertEqual(result, {"viewer": {"login": "octocat"}})
+        self.github_connection.session.post.assert_called_once_with(
+            "https://api.github.com/graphql",
+            json={"query": "query", "variables": {"a": 1}},
+        )
+
+    def test_graphql_query_raises_on_http_error(self):
+        """Test that a non 200 response raises a ValueError."""
+        self.github_connection.session.post.return_value.status_code = 502
+
+        with self.assertRaises(ValueError):
+            graphql_query(self.github_connection, "query")
+
+    def test_graphql_query_raises_on_errors(self):
+        """Test that errors in the response raise a ValueError."""
+        response = self.github_connection.session.post.return_value
+        response.status_code = 200
+        response.json.return_value = {
+            "data": None,
+            "errors": [{"message": "first"}, {"message": "second"}],
+        }
+
+        with self.assertRaises(ValueError) as context_manager:
+            graphql_query(self.github_connection, "query")
+        self.assertEqual(
+            str(context_manager.exception),
+            "GraphQL query returned errors: first; second",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
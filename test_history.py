@@ -0,0 +1,320 @@
+"""Test the RunHistory class and the query command of the history module."""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+import history
+from history import RunHistory
+from results import RepoResult
+
+
+def make_result(repo, usernames, removed, duration=1.0, pull_request_url=None):
+    """Build a RepoResult with the given handles."""
+    return RepoResult(
+        repo,
+        "present",
+        "CODEOWNERS",
+        list(removed),
+        bool(removed),
+        pull_request_url,
+        codeowners_sha="abc123",
+        usernames=list(usernames),
+        duration=duration,
+    )
+
+
+class TestRunHistory(unittest.TestCase):
+    """Test the RunHistory class"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "history.db")
+
+    def record_run(self, when, results):
+        """Record a complete run at the given time."""
+        with patch("history._now", return_value=when):
+            run_history = RunHistory(self.path)
+            run_history.start_run("org", False)
+            for result in results:
+                run_history.record(result)
+            run_history.finish_run(None, [])
+            run_history.close()
+
+    def test_repos_where_user_removed(self):
+        """Test that every removal of a user is returned, newest first."""
+        self.record_run(
+            "2024-01-01T00:00:00+00:00",
+            [make_result("org/a", ["Alice", "bob"], ["Alice"], pull_request_url="pr1")],
+        )
+        self.record_run(
+            "2024-01-08T00:00:00+00:00",
+            [
+                make_result("org/b", ["alice"], ["alice"]),
+                make_result("org/c", ["alice"], []),
+            ],
+        )
+        run_history = RunHistory(self.path)
+        self.addCleanup(run_history.close)
+
+        self.assertEqual(
+            run_history.repos_where_user_removed("ALICE"),
+            [
+                ("org/b", "2024-01-08T00:00:00+00:00", None),
+                ("org/a", "2024-01-01T00:00:00+00:00", "pr1"),
+            ],
+        )
+
+    def test_repos_clean_since(self):
+        """Test that only repositories that went from dirty to clean are returned."""
+        self.record_run(
+            "2024-01-01T00:00:00+00:00",
+            [
+                make_result("org/fixed", ["alice"], ["alice"]),
+                make_result("org/still-dirty", ["bob"], ["bob"]),
+                make_result("org/always-clean", ["carol"], []),
+            ],
+        )
+        self.record_run(
+            "2024-01-08T00:00:00+00:00",
+            [
+                make_result("org/fixed", [], []),
+                make_result("org/still-dirty", ["bob"], ["bob"]),
+                make_result("org/always-clean", ["carol"], []),
+            ],
+        )
+        run_history = RunHistory(self.path)
+        self.addCleanup(run_history.close)
+
+        self.assertEqual(
+            run_history.repos_clean_since("2024-01-05"),
+            [("org/fixed", "2024-01-08T00:00:00+00:00")],
+        )
+
+    def test_slowest_repos_of_latest_run(self):
+        """Test that the slowest repositories of the latest run are returned."""
+        self.record_run(
+            "2024-01-01T00:00:00+00:00", [make_result("org/old", [], [], 99)]
+        )
+        self.record_run(
+            "2024-01-08T00:00:00+00:00",
+            [
+                make_result("org/a", [], [], 1.5),
+                make_result("org/b", [], [], 3.0),
+                make_result("org/c", [], [], 0.5),
+            ],
+        )
+        run_history = RunHistory(self.path)
+        self.addCleanup(run_history.close)
+
+        self.assertEqual(run_history.slowest_repos(2), [("org/b", 3.0), ("org/a", 1.5)])
+
+    def test_latest_run_totals(self):
+        """Test the totals of the latest run used to estimate the next one."""
+        run_history = RunHistory(self.path)
+        self.addCleanup(run_history.close)
+        self.assertEqual(run_history.latest_run_totals(), (0, 0, 0))
+
+        self.record_run(
+            "2024-01-08T00:00:00+00:00",
+            [
+                make_result("org/a", ["alice", "bob"], ["bob"]),
+                make_result("org/b", ["alice"], []),
+                RepoResult("org/c", "missing"),
+            ],
+        )
+
+        self.assertEqual(run_history.latest_run_totals(), (3, 2, 2))
+
+    def test_covers_organization(self):
+        """Test that only a full scan that finished cleanly covers an organization."""
+        run_history = RunHistory(self.path)
+        self.addCleanup(run_history.close)
+        self.assertFalse(run_history.covers_organization("org"))
+        run_history.start_run("org", False, full_scan=True)
+        run_history.record(make_result("Org/a", [], []))
+        run_history.finish_run(None, [])
+        # The runs of a shard or of departed users do not change the answer
+        run_history.start_run("org", False)
+        run_history.record(make_result("org/b", [], []))
+        run_history.finish_run("Stopped after reaching MAX_RUNTIME", [])
+        run_history.start_run("org", False, full_scan=True)
+
+        self.assertTrue(run_history.covers_organization("org"))
+        self.assertFalse(run_history.covers_organization("other"))
+        run_history.record(make_result("org/a", [], []))
+        run_history.finish_run(None, ["org/c: Server Error"])
+        run_history.start_run("org", False)
+        self.assertFalse(run_history.covers_organization("org"))
+
+    def test_database_without_full_scan_column(self):
+        """Test that databases of earlier versions gain the full_scan column."""
+        connection = sqlite3.connect(self.path)
+        connection.execute(
+            "CREATE TABLE runs (id INTEGER PRIMARY KEY AUTOINCREMENT, scope TEXT "
+            "NOT NULL, dry_run INTEGER NOT NULL, started_at TEXT NOT NULL, "
+            "finished_at TEXT, stop_reason TEXT, errors TEXT)"
+        )
+        connection.execute(
+            "INSERT INTO runs (scope, dry_run, started_at) VALUES ('org', 0, '')"
+        )
+        connection.commit()
+        connection.close()
+
+        run_history = RunHistory(self.path)
+        self.addCleanup(run_history.close)
+        run_history.start_run("org", False, full_scan=True)
+        self.assertEqual(
+            run_history._query(  # pylint: disable=protected-access
+                "SELECT full_scan FROM runs ORDER BY id", ()
+            ),
+            [(0,), (1,)],
+        )
+
+    def test_deferred_repos_of_previous_run(self):
+        """Test that the repositories deferred by the previous finished run are returned."""
+        run_history = RunHistory(self.path)
+        self.addCleanup(run_history.close)
+        run_history.start_run("org", False, full_scan=True)
+        run_history.record_deferred(["org/b", "org/a"])
+        run_history.record_deferred(["org/c", "org/a"])
+        run_history.finish_run("rate limit budget exhausted", [])
+        # Runs of another kind or scope finishing in between keep the rotation
+        for scope, full_scan in [("org", False), ("org shard 0 of 2", False)]:
+            run_history.start_run(scope, False, full_scan=full_scan)
+            run_history.record_deferred(["org/z"])
+            run_history.finish_run(None, [])
+
+        run_history.start_run("org", False, full_scan=True)
+
+        self.assertEqual(run_history.deferred_repos(), ["org/b", "org/a", "org/c"])
+        run_history.finish_run(None, [])
+        run_history.start_run("org", False, full_scan=True)
+        self.assertEqual(run_history.deferred_repos(), [])
+
+    def test_last_scanned_and_handle_counts(self):
+        """Test the latest scan time and handle count of each repository."""
+        self.record_run(
+            "2024-01-01T00:00:00+00:00",
+            [
+                make_result("org/a", ["alice", "bob"], []),
+                make_result("org/b", ["alice"], []),
+            ],
+        )
+        self.record_run(
+            "2024-01-08T00:00:00+00:00", [make_result("org/a", ["alice"], [])]
+        )
+        run_history = RunHistory(self.path)
+        self.addCleanup(run_history.close)
+
+        self.assertEqual(
+            run_history.last_scanned(),
+            {
+                "org/a": "2024-01-08T00:00:00+00:00",
+                "org/b": "2024-01-01T00:00:00+00:00",
+            },
+        )
+        self.assertEqual(run_history.last_handle_counts(), {"org/a": 1, "org/b": 1})
+
+    def test_repos_mentioning_handle_in_latest_scan(self):
+        """Test that only the latest scan of each repository is searched."""
+        self.record_run(
+            "2024-01-01T00:00:00+00:00",
+            [
+                make_result("org/a", ["alice", "bob"], []),
+                make_result("org/b", ["bob"], []),
+            ],
+        )
+        self.record_run(
+            "2024-01-08T00:00:00+00:00", [make_result("org/a", ["alice"], [])]
+        )
+        run_history = RunHistory(self.path)
+        self.addCleanup(run_history.close)
+
+        self.assertEqual(run_history.repos_mentioning("Bob"), ["org/b"])
+        self.assertEqual(run_history.repos_mentioning("alice"), ["org/a"])
+        self.assertEqual(run_history.repos_mentioning("carol"), [])
+
+    def test_owner_index_keeps_latest_codeowners(self):
+        """Test that the owner index is replaced by the latest scan of a repository."""
+        first = make_result("org/a", ["alice"], [])
+        first.owner_entries = [("alice", 1, "*"), ("org/team", 2, "/docs/")]
+        second = make_result("org/b", ["alice"], [])
+        second.owner_entries = [("alice", 3, "*.py")]
+        self.record_run("2024-01-01T00:00:00+00:00", [first, second])
+        rescanned = make_result("org/a", [], [])
+        rescanned.owner_entries = [("org/team", 1, "*")]
+        self.record_run("2024-01-08T00:00:00+00:00", [rescanned])
+        run_history = RunHistory(self.path)
+        self.addCleanup(run_history.close)
+
+        self.assertEqual(
+            run_history.owned_by("@Alice"), [("org/b", "CODEOWNERS", 3, "*.py")]
+        )
+        self.assertEqual(
+            run_history.owned_by("org/team"), [("org/a", "CODEOWNERS", 1, "*")]
+        )
+        self.assertEqual(
+            run_history.top_owners(), [("alice", 1, 1), ("org/team", 1, 1)]
+        )
+
+
+class TestHistoryMain(unittest.TestCase):
+    """Test the query command of the history module"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "history.db")
+        run_history = RunHistory(self.path)
+        run_history.start_run("org", True)
+        result = make_result("org/a", ["alice"], ["alice"], 2.0)
+        result.owner_entries = [("alice", 1, "*")]
+        run_history.record(result)
+        run_history.finish_run("MAX_RUNTIME was reached", ["boom"])
+        run_history.close()
+
+    def test_main_removed(self):
+        """Test the removed query."""
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            rows = history.main(["--db", self.path, "removed", "@alice"])
+
+        self.assertEqual(len(rows), 1)
+        self.assertTrue(mock_stdout.getvalue().startswith("org/a\t"))
+        self.assertTrue(mock_stdout.getvalue().endswith("\t\n"))
+
+    def test_main_clean_since(self):
+        """Test the clean-since query."""
+        with patch("sys.stdout", new_callable=StringIO):
+            rows = history.main(["--db", self.path, "clean-since", "2000-01-01"])
+
+        self.assertEqual(rows, [])
+
+    def test_main_slowest(self):
+        """Test the slowest query."""
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            history.main(["--db", self.path, "slowest", "--limit", "1"])
+
+        self.assertEqual(mock_stdout.getvalue(), "org/a\t2.0\n")
+
+    def test_main_owns(self):
+        """Test the owns query."""
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            history.main(["--db", self.path, "owns", "@alice"])
+
+        self.assertEqual(mock_stdout.getvalue(), "org/a\tCODEOWNERS\t1\t*\n")
+
+    def test_main_top_owners(self):
+        """Test the top-owners query."""
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            history.main(["--db", self.path, "top-owners", "--limit", "5"])
+
+        self.assertEqual(mock_stdout.getvalue(), "alice\t1\t1\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,344 @@
+"""Test the local_checkouts module."""
+
+import os
+import subprocess
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from cleanowners import ScanContext, get_repos_iterator, scan_repositories
+from local_checkouts import (
+    CatFileBatch,
+    LocalContents,
+    LocalRepository,
+    MirrorRepository,
+    get_local_repositories,
+)
+from membership import MembershipCache
+from membership_snapshot import MembershipSnapshot, write_snapshot
+from metrics import RunMetrics
+from results import ScanResults
+
+
+def write_file(path, contents):
+    """Write a file and create its parent directories."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(contents)
+
+
+class TestLocalRepository(unittest.TestCase):
+    """Test the LocalRepository class"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        self.root = tmpdir.name
+        self.repo = LocalRepository(os.path.join(self.root, "repo"), "org")
+
+    def test_identity(self):
+        """Test that the repository is named after its directory."""
+        self.assertEqual(self.repo.full_name, "org/repo")
+        self.assertEqual(str(self.repo), "org/repo")
+        self.assertEqual(self.repo.owner.login, "org")
+        self.assertEqual(self.repo.owner.type, "Organization")
+        self.assertFalse(self.repo.archived)
+
+    def test_file_contents(self):
+        """Test that file contents match the API, including the blob SHA."""
+        write_file(os.path.join(self.root, "repo", "CODEOWNERS"), b"* @alice\n")
+
+        contents = self.repo.file_contents("CODEOWNERS")
+
+        self.assertEqual(contents.decoded, b"* @alice\n")
+        self.assertEqual(contents.content, b"* @alice\n")
+        self.assertEqual(contents.size, 9)
+        self.assertEqual(
+            contents.sha,
+            subprocess.run(
+                ["git", "hash-object", "--stdin"],
+                input=b"* @alice\n",
+                capture_output=True,
+                check=True,
+            )
+            .stdout.decode()
+            .strip(),
+        )
+
+    def test_missing_file(self):
+        """Test that a missing file returns None."""
+        self.assertIsNone(self.repo.file_contents(".github/CODEOWNERS"))
+
+    def test_write_patch_applies_with_git(self):
+        """Test that the patch applies to the checkout with git apply."""
+        write_file(
+            os.path.join(self.root, "repo", ".github", "CODEOWNERS"),
+            b"* @alice @bob\n/docs @bob",
+        )
+        patch_dir = os.path.join(self.root, "patches")
+
+        patch_path = self.repo.write_patch(
+            patch_dir, ".github/CODEOWNERS", b"* @alice\n/docs"
+        )
+
+        self.assertEqual(patch_path, os.path.join(patch_dir, "repo.patch"))
+        subprocess.run(
+            ["git", "apply", patch_path],
+            cwd=os.path.join(self.root, "repo"),
+            check=True,
+        )
+        self.assertEqual(
+            self.repo.file_contents(".github/CODEOWNERS").decoded, b"* @alice\n/docs"
+        )
+
+    def test_write_patch_for_new_file(self):
+        """Test that a patch creating a CODEOWNERS file applies with git apply."""
+        os.makedirs(os.path.join(self.root, "repo"))
+
+        patch_path = self.repo.write_patch(
+            os.path.join(self.root, "patches"), ".github/CODEOWNERS", b"* @org/team\n"
+        )
+
+        subprocess.run(
+            ["git", "apply", patch_path],
+            cwd=os.path.join(self.root, "repo"),
+            check=True,
+        )
+        self.assertEqual(
+            self.repo.file_contents(".github/CODEOWNERS").decoded, b"* @org/team\n"
+        )
+
+
+class TestGetLocalRepositories(unittest.TestCase):
+    """Test the get_local_repositories function"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        self.root = tmpdir.name
+        for name in ("b", "a", ".cache"):
+            os.makedirs(os.path.join(self.root, name))
+        write_file(os.path.join(self.root, "notes.txt"), b"")
+
+    def test_every_checkout(self):
+        """Test that every checkout directory is listed, sorted by name."""
+        repos = get_local_repositories(self.root, "org", [])
+
+        self.assertEqual([repo.full_name for repo in repos], ["org/a", "org/b"])
+
+    def test_repository_list(self):
+        """Test that only the checkouts of the repository list are listed."""
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            repos = get_local_repositories(self.root, None, ["other/b", "org/c"])
+
+        self.assertEqual([repo.full_name for repo in repos], ["other/b"])
+        self.assertIn("No local checkout of org/c", mock_stdout.getvalue())
+
+    def test_get_repos_iterator_reads_local_checkouts(self):
+        """Test that get_repos_iterator makes no API call with local checkouts."""
+        repos = get_repos_iterator("org", [], None, self.root)
+
+        self.assertEqual([repo.full_name for repo in repos], ["org/a", "org/b"])
+
+
+def make_mirror(root, name, files):
+    """Commit files to a repository and clone it as a bare mirror."""
+    source = os.path.join(root, "source", name)
+    for path, contents in files.items():
+        write_file(os.path.join(source, path), contents)
+    git = ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+    subprocess.run(git + ["init", "-q", source], check=True)
+    if files:
+        subprocess.run(git + ["-C", source, "add", "-A"], check=True)
+        subprocess.run(git + ["-C", source, "commit", "-q", "-m", "init"], check=True)
+    mirror = os.path.join(root, "mirrors", f"{name}.git")
+    subprocess.run(
+        ["git", "clone", "-q", "--mirror", source, mirror],
+        check=True,
+        capture_output=True,
+    )
+    return mirror
+
+
+class TestMirrorRepository(unittest.TestCase):
+    """Test reading bare mirrors with git cat-file --batch"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        self.root = tmpdir.name
+        self.mirrors = os.path.join(self.root, "mirrors")
+
+    def test_mirrors_are_detected(self):
+        """Test that bare mirrors are listed next to checkouts without .git."""
+        make_mirror(self.root, "app", {"CODEOWNERS": b"* @alice\n"})
+        os.makedirs(os.path.join(self.mirrors, "checkout"))
+
+        repos = get_local_repositories(self.mirrors, "org", [])
+
+        self.assertEqual(
+            [repo.full_name for repo in repos], ["org/app", "org/checkout"]
+        )
+        self.assertIsInstance(repos[0], MirrorRepository)
+        self.assertNotIsInstance(repos[1], MirrorRepository)
+
+    def test_repository_list_finds_mirrors(self):
+        """Test that a repository of the list is found as name.git."""
+        make_mirror(self.root, "app", {"CODEOWNERS": b"* @alice\n"})
+
+        repos = get_local_repositories(self.mirrors, None, ["org/app"])
+
+        self.assertEqual([repo.full_name for repo in repos], ["org/app"])
+
+    @patch("local_checkouts.subprocess.Popen", wraps=subprocess.Popen)
+    def test_one_process_answers_every_lookup(self, mock_popen):
+        """Test that one git process answers every lookup until the mirror is released."""
+        path = make_mirror(
+            self.root,
+            "app",
+            {
+                "docs/CODEOWNERS": b"* @bob\n",
+                "CODEOWNERS/README": b"not a file\n",
+                "README.md": b"readme",
+            },
+        )
+        mock_popen.reset_mock()
+        repo = MirrorRepository(path, "org")
+
+        self.assertIsNone(repo.file_contents(".github/CODEOWNERS"))
+        self.assertIsNone(repo.file_contents("CODEOWNERS"))
+        contents = repo.file_contents("docs/CODEOWNERS")
+        self.assertEqual(contents.decoded, b"* @bob\n")
+        self.assertEqual(repo.file_contents("README.md").decoded, b"readme")
+        self.assertEqual(mock_popen.call_count, 1)
+        # The SHA comes from git and matches the one hashed for checkouts
+        self.assertEqual(contents.sha, LocalContents(b"* @bob\n").sha)
+        with patch("local_checkouts.hashlib.sha1") as mock_sha1:
+            repo.file_contents("README.md")
+            repo.file_contents("docs/CODEOWNERS")
+        mock_sha1.assert_not_called()
+
+        process = repo._batch._process  # pylint: disable=protected-access
+        del repo
+        self.assertEqual(process.returncode, 0)
+
+    def test_close_stops_the_process(self):
+        """Test that a closed batch process has exited."""
+        batch = CatFileBatch(make_mirror(self.root, "app", {"CODEOWNERS": b"*\n"}))
+        self.assertEqual(
+            batch.read_head_files(["CODEOWNERS"])["CODEOWNERS"].decoded, b"*\n"
+        )
+
+        batch.close()
+        batch.close()
+
+        process = batch._process  # pylint: disable=protected-access
+        self.assertEqual(process.returncode, 0)
+
+    def test_empty_mirror(self):
+        """Test that a mirror without commits has no CODEOWNERS file."""
+        repo = MirrorRepository(make_mirror(self.root, "empty", {}), "org")
+
+        self.assertIsNone(repo.file_contents("CODEOWNERS"))
+
+
+class TestLocalScan(unittest.TestCase):
+    """Test a scan of local checkouts against a membership snapshot"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        self.root = os.path.join(tmpdir.name, "checkouts")
+        self.patch_dir = os.path.join(tmpdir.name, "patches")
+        write_file(
+            os.path.join(self.root, "app", ".github", "CODEOWNERS"),
+            b"* @alice @bob\n",
+        )
+        write_file(os.path.join(self.root, "lib", "CODEOWNERS"), b"* @alice\n")
+        write_file(
+            os.path.join(self.root, "web", "docs", "CODEOWNERS"), b"* @org/team\n"
+        )
+        os.makedirs(os.path.join(self.root, "empty"))
+        snapshot_path = os.path.join(tmpdir.name, "org.members")
+        write_snapshot(snapshot_path, "org", ["alice"])
+        snapshot = MembershipSnapshot(snapshot_path)
+        self.addCleanup(snapshot.close)
+        self.membership = MembershipCache(None, {"org": snapshot})
+
+    def scan(self, dry_run, patch_dir="", metrics=None):
+        """Scan the local checkouts and return the results."""
+        context = ScanContext(
+            github_connection=None,
+            membership=self.membership,
+            results=ScanResults(),
+            budget=None,
+            exempt_repositories_list=[],
+            dry_run=dry_run,
+            pull_request={"title": "", "body": "", "commit_message": ""},
+            local_checkouts=self.root,
+            patch_dir=patch_dir,
+            metrics=metrics,
+        )
+        repos = get_repos_iterator("org", [], None, self.root)
+        with patch("sys.stdout", new_callable=StringIO):
+            scan_repositories(repos, "org", context)
+        return context.results
+
+    def test_dry_run_reports(self):
+        """Test that a dry run reports the same results as an API scan."""
+        results = self.scan(dry_run=True)
+
+        self.assertEqual(
+            results.repo_and_users_to_remove,
+            {"org/app": ("bob",)},
+        )
+        self.assertEqual(results.repos_missing_codeowners, ["org/empty"])
+        self.assertEqual(results.counts["codeowners_count"], 3)
+        self.assertFalse(os.path.exists(self.patch_dir))
+
+    @patch("cleanowners.get_usernames_from_codeowners", return_value=["alice"])
+    def test_identical_files_are_parsed_once(self, mock_parse):
+        """Test that CODEOWNERS files with the same blob SHA are parsed once."""
+        write_file(os.path.join(self.root, "app", "CODEOWNERS"), b"* @alice\n")
+        os.remove(os.path.join(self.root, "app", ".github", "CODEOWNERS"))
+
+        results = self.scan(dry_run=True)
+
+        self.assertEqual(results.counts["codeowners_count"], 3)
+        self.assertEqual(mock_parse.call_count, 2)
+
+    def test_identical_files_are_edited_once(self):
+        """Test that CODEOWNERS files with the same blob SHA and removals are edited once."""
+        write_file(os.path.join(self.root, "lib", "CODEOWNERS"), b"* @alice @bob\n")
+        metrics = RunMetrics()
+
+        with patch(
+            "cleanowners.remove_owners_from_content", return_value=b"* @alice\n"
+        ) as mock_edit:
+            results = self.scan(
+                dry_run=False, patch_dir=self.patch_dir, metrics=metrics
+            )
+
+        mock_edit.assert_called_once_with(b"* @alice @bob\n", ["bob"])
+        self.assertEqual(
+            results.repo_and_users_to_remove,
+            {"org/app": ("bob",), "org/lib": ("bob",)},
+        )
+        self.assertIn("lib.patch", os.listdir(self.patch_dir))
+        self.assertEqual(metrics.caches["codeowners_edit"], [1, 1])
+
+    def test_patch_files(self):
+        """Test that patch files replace pull requests."""
+        results = self.scan(dry_run=False, patch_dir=self.patch_dir)
+
+        self.assertEqual(
+            sorted(os.listdir(self.patch_dir)), ["app.patch", "empty.patch"]
+        )
+        self.assertEqual(results.pull_request_urls, [])
+        with open(os.path.join(self.patch_dir, "app.patch"), encoding="utf-8") as file:
+            self.assertIn("-* @alice @bob\n+* @alice\n", file.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+"""Test the lru module."""
+
+import unittest
+
+from lru import LruCache
+
+
+class TestLruCache(unittest.TestCase):
+    """Test the LruCache class"""
+
+    def test_least_recently_used_entry_is_dropped(self):
+        """Test that the cache keeps the most recently used entries."""
+        cache = LruCache(2)
+        cache["a"] = 1
+        cache["b"] = 2
+
+        self.assertEqual(cache.get("a"), 1)
+        cache["c"] = 3
+
+        self.assertEqual(list(cache), ["a", "c"])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+
+    def test_replaced_entry_is_most_recently_used(self):
+        """Test that setting an existing key moves it to the end."""
+        cache = LruCache(2)
+        cache["a"] = 1
+        cache["b"] = 2
+        cache["a"] = 3
+        cache["c"] = 4
+
+        self.assertEqual(list(cache), ["a", "c"])
+        self.assertEqual(cache.get("a"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
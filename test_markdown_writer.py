@@ -464,6 +464,275 @@ class TestWriteStepSummary(unittest.TestCase):
             written = "".join(c.args[0] for c in mock_file().write.call_args_list)
             self.assertIn("## Error :x:", written)
 
+    @patch.dict(os.environ, {"GITHUB_STEP_SUMMARY": "/tmp/test_summary.md"})
+    def test_partial_run_note_when_stopped(self):
+        """Test that a partial run is called out in the step summary"""
+        mock_file = mock_open()
+        with patch("builtins.open", mock_file):
+            write_step_summary(
+                pull_count=0,
+                eligble_for_pr_count=0,
+                no_codeowners_count=0,
+                codeowners_count=1,
+                users_count=0,
+                repo_and_users_to_remove={},
+                repos_missing_codeowners=[],
+                enable_github_actions_step_summary=True,
+                stop_reason="MAX_RUNTIME was reached",
+            )
+            written = "".join(c.args[0] for c in mock_file().write.call_args_list)
+            self.assertIn("## Partial Run :hourglass:", written)
+            self.assertIn("MAX_RUNTIME was reached", written)
+
+
+class TestStepSummarySizeLimit(unittest.TestCase):
+    """Test that write_step_summary stays under the step summary size limit"""
+
+    def write_summary(self, **kwargs):
+        """Write a step summary with the given lists and return its content."""
+        mock_file = mock_open()
+        with patch("builtins.open", mock_file):
+            write_step_summary(
+                pull_count=0,
+                eligble_for_pr_count=0,
+                no_codeowners_count=0,
+                codeowners_count=1,
+                users_count=0,
+                enable_github_actions_step_summary=True,
+                **kwargs,
+            )
+        return "".join(c.args[0] for c in mock_file().write.call_args_list)
+
+    @patch.dict(os.environ, {"GITHUB_STEP_SUMMARY": "/tmp/test_summary.md"})
+    @patch("markdown_writer.STEP_SUMMARY_MAX_BYTES", 10000)
+    @patch("markdown_writer.STEP_SUMMARY_TOP_N", 2)
+    def test_small_summary_is_complete(self):
+        """Test that a summary under the limit lists every entry"""
+        written = self.write_summary(
+            repo_and_users_to_remove={"org/a": ["u1"], "org/b": ["u2"], "org/c": []},
+            repos_missing_codeowners=["org/x", "org/y", "org/z"],
+            pull_request_urls=["url1", "url2", "url3"],
+        )
+        self.assertNotIn("more", written)
+        self.assertNotIn("shortened", written)
+        self.assertIn("- org/z\n", written)
+
+    @patch.dict(os.environ, {"GITHUB_STEP_SUMMARY": "/tmp/test_summary.md"})
+    @patch("markdown_writer.STEP_SUMMARY_MAX_BYTES", 800)
+    @patch("markdown_writer.STEP_SUMMARY_TOP_N", 2)
+    def test_large_summary_keeps_top_entries(self):
+        """Test that a summary over the limit keeps the top entries of each list"""
+        written = self.write_summary(
+            repo_and_users_to_remove={
+                "org/one": ["u1"],
+                "org/three": ["u1", "u2", "u3"],
+                "org/two": ["u1", "u2"],
+            },
+            repos_missing_codeowners=["org/x", "org/y", "org/z"],
+            pull_request_urls=[f"url{index}" for index in range(1, 40)],
+            full_results_location="results.ndjson",
+        )
+        self.assertIn(
+            "Showing the 2 repositories with the most users to remove", written
+        )
+        self.assertIn("org/three\n", written)
+        self.assertIn("org/two\n", written)
+        self.assertNotIn("org/one\n", written)
+        self.assertIn("- ...and 1 more repositories\n", written)
+        self.assertNotIn("- org/z\n", written)
+        self.assertIn("- ...and 37 more pull requests\n", written)
+        self.assertIn("The full results are in results.ndjson.", written)
+
+    @patch.dict(os.environ, {"GITHUB_STEP_SUMMARY": "/tmp/test_summary.md"})
+    @patch("markdown_writer.STEP_SUMMARY_MAX_BYTES", 10)
+    def test_large_summary_without_location(self):
+        """Test the shortened note when there is no full results location"""
+        written = self.write_summary(
+            repo_and_users_to_remove={}, repos_missing_codeowners=["org/x"]
+        )
+        self.assertIn("size limit._", written)
+
+    @patch.dict(os.environ, {"GITHUB_STEP_SUMMARY": "/tmp/test_summary.md"})
+    @patch("markdown_writer.STEP_SUMMARY_MAX_BYTES", 1000)
+    def test_long_error_and_user_list_are_truncated(self):
+        """Test that parts the top entries do not shorten are cut at the limit"""
+        written = self.write_summary(
+            repo_and_users_to_remove={"org/a": [f"user{i}" for i in range(100)]},
+            repos_missing_codeowners=[],
+            error="é" * 2000,
+        )
+        self.assertLessEqual(len(written.encode("utf-8")), 1000)
+        self.assertTrue(
+            written.endswith(
+                "_This summary was truncated at the GitHub step summary size limit._\n"
+            )
+        )
+        self.assertIn("org/a\n- user0\n", written)
+
+
+class TestWriteToMarkdownPartialRun(unittest.TestCase):
+    """Test the partial run note of the write_to_markdown function"""
+
+    def test_write_with_stop_reason(self):
+        """Test that a partial run is called out in report.md"""
+        mock_file = mock_open()
+        with patch("builtins.open", mock_file):
+            write_to_markdown(0, 0, 0, 1, {}, [], stop_reason="the run was cancelled")
+            written = "".join(c.args[0] for c in mock_file().write.call_args_list)
+            self.assertIn(
+                "## Partial Run :hourglass:\n"
+                "The run stopped before every repository was processed: the run was cancelled.\n",
+                written,
+            )
+
+
+class TestWriteOwnerCounts(unittest.TestCase):
+    """Test the owners that were not checked for membership in the reports"""
+
+    def test_write_to_markdown_with_owner_counts(self):
+        """Test that skipped owners are counted in report.md"""
+        mock_file = mock_open()
+        with patch("builtins.open", mock_file):
+            write_to_markdown(
+                0, 0, 0, 1, {}, [], owner_counts={"team": 2, "email": 1, "invalid": 0}
+            )
+            written = "".join(c.args[0] for c in mock_file().write.call_args_list)
+            self.assertIn(
+                "2 team, 1 email and 0 invalid owners not checked for membership\n",
+                written,
+            )
+
+    @patch.dict(os.environ, {"GITHUB_STEP_SUMMARY": "/tmp/test_summary.md"})
+    def test_step_summary_with_owner_counts(self):
+        """Test that skipped owners are counted in the step summary"""
+        mock_file = mock_open()
+        with patch("builtins.open", mock_file):
+            write_step_summary(
+                pull_count=0,
+                eligble_for_pr_count=0,
+                no_codeowners_count=0,
+                codeowners_count=1,
+                users_count=0,
+                repo_and_users_to_remove={},
+                repos_missing_codeowners=[],
+                enable_github_actions_step_summary=True,
+                owner_counts={"team": 0, "email": 0, "invalid": 3},
+            )
+            written = "".join(c.args[0] for c in mock_file().write.call_args_list)
+            self.assertIn(
+                "- 0 team, 0 email and 3 invalid owners not checked for membership\n",
+                written,
+            )
+
+
+class TestWriteOutsideCollaborators(unittest.TestCase):
+    """Test the outside collaborators section of the reports"""
+
+    def test_write_to_markdown_with_outside_collaborators(self):
+        """Test that outside collaborators get their own section in report.md"""
+        mock_file = mock_open()
+        with patch("builtins.open", mock_file):
+            write_to_markdown(
+                0,
+                0,
+                0,
+                1,
+                {},
+                [],
+                repo_and_outside_collaborators={"org/repo": ("alice", "bob")},
+            )
+            written = "".join(c.args[0] for c in mock_file().write.call_args_list)
+            self.assertIn(
+                "## Outside Collaborators in CODEOWNERS :bust_in_silhouette:\n"
+                "These owners are outside collaborators of the organization, not members.\n\n"
+                "org/repo\n- alice\n- bob\n\n",
+                written,
+            )
+
+    @patch.dict(os.environ, {"GITHUB_STEP_SUMMARY": "/tmp/test_summary.md"})
+    @patch("markdown_writer.STEP_SUMMARY_MAX_BYTES", 600)
+    @patch("markdown_writer.STEP_SUMMARY_TOP_N", 1)
+    def test_large_step_summary_with_outside_collaborators(self):
+        """Test that a shortened step summary keeps the first repositories"""
+        mock_file = mock_open()
+        with patch("builtins.open", mock_file):
+            write_step_summary(
+                pull_count=0,
+                eligble_for_pr_count=0,
+                no_codeowners_count=0,
+                codeowners_count=2,
+                users_count=0,
+                repo_and_users_to_remove={},
+                repos_missing_codeowners=[],
+                enable_github_actions_step_summary=True,
+                repo_and_outside_collaborators={
+                    "org/a": ("alice",),
+                    **{f"org/b{index}": ("bob",) for index in range(20)},
+                },
+            )
+            written = "".join(c.args[0] for c in mock_file().write.call_args_list)
+            self.assertIn("org/a\n- alice\n\n- ...and 20 more repositories\n", written)
+            self.assertNotIn("org/b", written)
+
+
+class TestWriteUnownedRules(unittest.TestCase):
+    """Test the paths left without owners section of the reports"""
+
+    def test_write_to_markdown_with_unowned_rules(self):
+        """Test that the rules left without owners get their own section in report.md"""
+        mock_file = mock_open()
+        with patch("builtins.open", mock_file):
+            write_to_markdown(
+                1,
+                0,
+                0,
+                1,
+                {"org/repo": ("bob",)},
+                [],
+                repo_and_unowned_rules={
+                    "org/repo": ((3, "/docs/", 12, ["docs/a.md", "docs/b.md"]),)
+                },
+            )
+            written = "".join(c.args[0] for c in mock_file().write.call_args_list)
+            self.assertIn(
+                "## Paths Left Without Owners :warning:\n"
+                "These rules lose all of their owners with the proposed changes.\n\n"
+                "org/repo\n- line 3 `/docs/`: 12 files\n"
+                "  - docs/a.md\n  - docs/b.md\n  - ...and 10 more files\n\n",
+                written,
+            )
+
+    @patch.dict(os.environ, {"GITHUB_STEP_SUMMARY": "/tmp/test_summary.md"})
+    @patch("markdown_writer.STEP_SUMMARY_MAX_BYTES", 600)
+    @patch("markdown_writer.STEP_SUMMARY_TOP_N", 1)
+    def test_large_step_summary_with_unowned_rules(self):
+        """Test that a shortened step summary keeps the first repositories"""
+        mock_file = mock_open()
+        with patch("builtins.open", mock_file):
+            write_step_summary(
+                pull_count=0,
+                eligble_for_pr_count=0,
+                no_codeowners_count=0,
+                codeowners_count=2,
+                users_count=0,
+                repo_and_users_to_remove={},
+                repos_missing_codeowners=[],
+                enable_github_actions_step_summary=True,
+                repo_and_unowned_rules={
+                    "org/a": ((1, "*", 1, ["a.md"]),),
+                    **{
+                        f"org/b{index}": ((2, "/src/", 1, ["src/b.py"]),)
+                        for index in range(20)
+                    },
+                },
+            )
+            written = "".join(c.args[0] for c in mock_file().write.call_args_list)
+            self.assertIn(
+                "org/a\n- line 1 `*`: 1 files\n  - a.md\n\n- ...and 20 more repositories\n",
+                written,
+            )
+            self.assertNotIn("org/b", written)
+
 
 if __name__ == "__main__":
     unittest.main()
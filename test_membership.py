@@ -0,0 +1,122 @@
+"""Test the MembershipCache class in the membership module."""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import github3
+from membership import MembershipCache
+from metrics import RunMetrics
+
+
+class TestMembershipCache(unittest.TestCase):
+    """Test the MembershipCache class"""
+
+    def setUp(self):
+        self.github_connection = MagicMock()
+        self.cache = MembershipCache(self.github_connection)
+
+    def test_get_org_is_cached(self):
+        """Test that the organization is only requested once."""
+        first = self.cache.get_org("my-org")
+        second = self.cache.get_org("My-Org")
+
+        self.assertIs(first, second)
+        self.github_connection.organization.assert_called_once_with("my-org")
+
+    def test_get_org_not_found(self):
+        """Test that a missing organization is cached as None."""
+        self.github_connection.organization.side_effect = (
+            github3.exceptions.NotFoundError(resp=MagicMock(status_code=404))
+        )
+
+        self.assertIsNone(self.cache.get_org("user"))
+        self.assertIsNone(self.cache.get_org("user"))
+        self.github_connection.organization.assert_called_once_with("user")
+
+    def test_is_member_is_cached(self):
+        """Test that the membership of a user is only checked once."""
+        gh_org = self.github_connection.organization.return_value
+        gh_org.is_member.return_value = True
+
+        self.assertTrue(self.cache.is_member("my-org", "alice"))
+        self.assertTrue(self.cache.is_member("my-org", "Alice"))
+        gh_org.is_member.assert_called_once_with("alice")
+
+    def test_is_member_records_cache_lookups(self):
+        """Test that hits and misses of the membership cache are recorded."""
+        metrics = RunMetrics()
+        cache = MembershipCache(self.github_connection, metrics=metrics)
+
+        cache.is_member("my-org", "alice")
+        cache.is_member("my-org", "alice")
+
+        self.assertEqual(metrics.caches, {"membership": [1, 1]})
+
+    def test_is_member_is_scoped_by_organization(self):
+        """Test that membership of one organization does not leak to another."""
+        org1 = MagicMock()
+        org1.is_member.return_value = True
+        org2 = MagicMock()
+        org2.is_member.return_value = False
+        self.github_connection.organization.side_effect = lambda login: {
+            "org1": org1,
+            "org2": org2,
+        }[login]
+
+        self.assertTrue(self.cache.is_member("org1", "alice"))
+        self.assertFalse(self.cache.is_member("org2", "alice"))
+
+    def test_is_member_when_owner_is_not_an_organization(self):
+        """Test that None is returned when the owner is not an organization."""
+        self.github_connection.organization.side_effect = (
+            github3.exceptions.NotFoundError(resp=MagicMock(status_code=404))
+        )
+
+        self.assertIsNone(self.cache.is_member("user", "alice"))
+
+    def test_outside_collaborators_are_listed_once(self):
+        """Test that every page of outside collaborators is fetched once."""
+        session = self.github_connection.session
+        session.base_url = "https://api.github.com"
+        first = MagicMock(status_code=200, links={"next": {"url": "page=2"}})
+        first.json.return_value = [{"login": "Alice"}]
+        second = MagicMock(status_code=200, links={})
+        second.json.return_value = [{"login": "bob"}]
+        session.get.side_effect = [first, second]
+
+        self.assertEqual(self.cache.outside_collaborators("org"), {"alice", "bob"})
+        self.assertEqual(self.cache.outside_collaborators("ORG"), {"alice", "bob"})
+        self.assertEqual(session.get.call_count, 2)
+        session.get.assert_any_call(
+            "https://api.github.com/orgs/org/outside_collaborators",
+            params={"per_page": 100},
+        )
+        session.get.assert_called_with("page=2", params=None)
+
+    def test_outside_collaborators_listing_forbidden(self):
+        """Test that a 403 is cached as an unknown list and recorded as an error."""
+        session = self.github_connection.session
+        session.base_url = "https://api.github.com"
+        session.get.return_value = MagicMock(status_code=403)
+
+        with patch("builtins.print"):
+            self.assertIsNone(self.cache.outside_collaborators("org"))
+        self.assertIsNone(self.cache.outside_collaborators("org"))
+        session.get.assert_called_once()
+        self.assertEqual(
+            self.cache.errors,
+            ["Unable to list the outside collaborators of org: status 403"],
+        )
+
+    def test_outside_collaborators_empty_listing(self):
+        """Test that an organization without outside collaborators is an empty set."""
+        session = self.github_connection.session
+        session.get.return_value = MagicMock(status_code=200, links={})
+        session.get.return_value.json.return_value = []
+
+        self.assertEqual(self.cache.outside_collaborators("org"), set())
+        self.assertEqual(self.cache.errors, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
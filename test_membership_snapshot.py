@@ -0,0 +1,180 @@
+"""Test the membership_snapshot module."""
+
+import os
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import membership_snapshot
+from membership import MembershipCache
+from membership_snapshot import (
+    MembershipSnapshot,
+    export_snapshot,
+    load_snapshots,
+    write_snapshot,
+)
+
+
+class TestMembershipSnapshot(unittest.TestCase):
+    """Test writing and reading membership snapshot files"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "org.members")
+
+    def open_snapshot(self):
+        """Open the snapshot and close it at the end of the test."""
+        snapshot = MembershipSnapshot(self.path)
+        self.addCleanup(snapshot.close)
+        return snapshot
+
+    def test_membership_is_case_insensitive(self):
+        """Test that lookups ignore the case of logins."""
+        count = write_snapshot(self.path, "My-Org", ["Alice", "bob", "alice", "carol"])
+        snapshot = self.open_snapshot()
+
+        self.assertEqual(count, 3)
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(snapshot.organization, "my-org")
+        self.assertIn("ALICE", snapshot)
+        self.assertIn("bob", snapshot)
+        self.assertIn("carol", snapshot)
+        self.assertNotIn("al", snapshot)
+        self.assertNotIn("dave", snapshot)
+        self.assertNotIn("aaron", snapshot)
+
+    def test_large_roster(self):
+        """Test that every member of a large roster is found by binary search."""
+        logins = [f"user-{number}" for number in range(5000)]
+        write_snapshot(self.path, "org", logins)
+        snapshot = self.open_snapshot()
+
+        self.assertTrue(all(login in snapshot for login in logins))
+        self.assertNotIn("user-5000", snapshot)
+
+    def test_empty_roster(self):
+        """Test that nobody is a member of an empty snapshot."""
+        write_snapshot(self.path, "org", [])
+
+        self.assertNotIn("alice", self.open_snapshot())
+
+    def test_rejects_other_files(self):
+        """Test that files which are not snapshots are rejected."""
+        with open(self.path, "wb") as file:
+            file.write(b"alice\nbob\n" * 20)
+
+        with self.assertRaises(ValueError):
+            MembershipSnapshot(self.path)
+
+    def test_rejects_short_files(self):
+        """Test that a file shorter than the header is rejected."""
+        with open(self.path, "wb") as file:
+            file.write(b"alice")
+
+        with self.assertRaises(ValueError):
+            MembershipSnapshot(self.path)
+
+    def test_rejects_unknown_version(self):
+        """Test that a snapshot written by another version is rejected."""
+        with patch("membership_snapshot.SNAPSHOT_VERSION", 2):
+            write_snapshot(self.path, "org", ["alice"])
+
+        with self.assertRaises(ValueError):
+            MembershipSnapshot(self.path)
+
+    def test_rejects_corrupted_snapshot(self):
+        """Test that a snapshot that does not match its digest is rejected."""
+        write_snapshot(self.path, "org", ["alice"])
+        with open(self.path, "r+b") as file:
+            file.seek(-1, os.SEEK_END)
+            file.write(b"x")
+
+        with self.assertRaises(ValueError):
+            MembershipSnapshot(self.path)
+
+    def test_load_snapshots(self):
+        """Test that snapshots are keyed by organization."""
+        write_snapshot(self.path, "My-Org", ["alice"])
+
+        with patch("sys.stdout", new_callable=StringIO):
+            snapshots = load_snapshots([self.path])
+        self.addCleanup(snapshots["my-org"].close)
+
+        self.assertIn("alice", snapshots["my-org"])
+
+    def test_export_snapshot(self):
+        """Test that the members of an organization are exported."""
+        github_connection = MagicMock()
+        github_connection.organization.return_value.members.return_value = [
+            MagicMock(login="Alice"),
+            MagicMock(login="bob"),
+        ]
+
+        self.assertEqual(export_snapshot(github_connection, "org", self.path), 2)
+        self.assertIn("alice", self.open_snapshot())
+        github_connection.organization.assert_called_once_with("org")
+
+    def test_membership_cache_uses_snapshot(self):
+        """Test that organizations with a snapshot need no membership API calls."""
+        write_snapshot(self.path, "org", ["alice"])
+        github_connection = MagicMock()
+        cache = MembershipCache(github_connection, {"org": self.open_snapshot()})
+
+        self.assertTrue(cache.is_member("Org", "Alice"))
+        self.assertFalse(cache.is_member("org", "bob"))
+        github_connection.organization.assert_not_called()
+
+
+class TestMain(unittest.TestCase):
+    """Test the membership snapshot command"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "org.members")
+
+    @patch.dict(os.environ, {"GH_TOKEN": "token"}, clear=True)
+    @patch("membership_snapshot.auth.auth_to_github")
+    def test_main_export(self, mock_auth):
+        """Test that the export command authenticates and writes the snapshot."""
+        mock_auth.return_value.organization.return_value.members.return_value = [
+            MagicMock(login="alice")
+        ]
+
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            count = membership_snapshot.main(["export", "org", self.path])
+
+        self.assertEqual(count, 1)
+        self.assertIn("Exported 1 members of org", mock_stdout.getvalue())
+        mock_auth.assert_called_once_with("token", None, None, b"", "", False)
+
+    def test_main_import(self):
+        """Test that a roster file with one login per line is imported."""
+        roster_path = os.path.join(os.path.dirname(self.path), "roster.txt")
+        with open(roster_path, "w", encoding="utf-8") as file:
+            file.write("# members of org\n@Alice\n\nbob\n")
+
+        with patch("sys.stdout", new_callable=StringIO):
+            count = membership_snapshot.main(["import", "org", roster_path, self.path])
+
+        snapshot = MembershipSnapshot(self.path)
+        self.addCleanup(snapshot.close)
+        self.assertEqual(count, 2)
+        self.assertIn("alice", snapshot)
+        self.assertIn("bob", snapshot)
+
+    def test_main_check(self):
+        """Test that the check command reports the membership of each user."""
+        write_snapshot(self.path, "org", ["alice"])
+
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            members = membership_snapshot.main(["check", self.path, "@alice", "bob"])
+
+        self.assertEqual(members, {"@alice": True, "bob": False})
+        self.assertIn("bob\tnot a member", mock_stdout.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Test the main function of the merge_results module."""
+
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+import merge_results
+from results import ScanResults
+
+
+class TestMergeResults(unittest.TestCase):
+    """Test the merge_results main function"""
+
+    @patch("merge_results.glob.glob")
+    def test_main_without_matching_files(self, mock_glob):
+        """Test that a ValueError is raised when no file matches."""
+        mock_glob.return_value = []
+
+        with self.assertRaises(ValueError):
+            merge_results.main(["missing-*.json"])
+
+    @patch.dict(os.environ, {"ENABLE_GITHUB_ACTIONS_STEP_SUMMARY": "false"})
+    @patch("merge_results.report_results")
+    @patch("merge_results.merge_partial_results")
+    @patch("merge_results.glob.glob")
+    def test_main_writes_reports(self, mock_glob, mock_merge, mock_report):
+        """Test that the merged results are written to the reports."""
+        mock_glob.side_effect = lambda pattern: {
+            "a-*.json": ["a-1.json", "a-0.json"],
+            "a-0.json": ["a-0.json"],
+        }[pattern]
+        mock_merge.return_value = ScanResults()
+        mock_report.return_value = None
+
+        merge_results.main(["a-*.json", "a-0.json"])
+
+        mock_merge.assert_called_once_with(["a-0.json", "a-1.json"])
+        mock_report.assert_called_once_with(
+            mock_merge.return_value,
+            issue_report=True,
+            enable_github_actions_step_summary=False,
+        )
+
+    @patch("merge_results.report_results", MagicMock(return_value=None))
+    @patch("merge_results.read_results_stream")
+    @patch("merge_results.merge_partial_results")
+    @patch("merge_results.glob.glob")
+    def test_main_reads_results_streams(self, mock_glob, mock_merge, mock_read):
+        """Test that NDJSON streams are added to the merged results."""
+        mock_glob.return_value = ["results.ndjson", "shard-0.json"]
+
+        merge_results.main(["*"])
+
+        mock_merge.assert_called_once_with(["shard-0.json"])
+        mock_read.assert_called_once_with("results.ndjson", mock_merge.return_value)
+
+    @patch("merge_results.report_results")
+    @patch("merge_results.merge_partial_results", MagicMock())
+    @patch("merge_results.glob.glob", MagicMock(return_value=["a.json"]))
+    @patch("sys.argv", ["merge_results.py", "a.json"])
+    def test_main_exits_on_error(self, mock_report):
+        """Test that errors of any shard fail the merge."""
+        mock_report.return_value = "boom"
+
+        with self.assertRaises(SystemExit):
+            merge_results.main()
+
+
+if __name__ == "__main__":
+    unittest.main()
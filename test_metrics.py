@@ -0,0 +1,126 @@
+"""Test the metrics module."""
+
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from metrics import RunMetrics, get_endpoint, get_quantile
+from rate_limit import RateLimitBudget
+from results import RepoResult, ScanResults
+
+
+def make_response(url, seconds, method="GET"):
+    """Build a response that took the given time."""
+    response = MagicMock(url=url, elapsed=timedelta(seconds=seconds))
+    response.request.method = method
+    return response
+
+
+class TestGetEndpoint(unittest.TestCase):
+    """Test the get_endpoint function"""
+
+    def test_names_are_replaced(self):
+        """Test that repository, organization and user names are left out."""
+        cases = {
+            "https://api.github.com/repos/org/repo/contents/.github/CODEOWNERS": (
+                "GET /repos/{owner}/{repo}/contents"
+            ),
+            "https://api.github.com/repos/org/repo": "GET /repos/{owner}/{repo}",
+            "https://api.github.com/orgs/org/members/alice": (
+                "GET /orgs/{name}/members"
+            ),
+            "https://github.example.com/api/v3/orgs/org/repos?page=2": (
+                "GET /orgs/{name}/repos"
+            ),
+            "https://github.example.com/api/graphql": "GET /graphql",
+            "https://api.github.com/rate_limit": "GET /rate_limit",
+        }
+        for url, endpoint in cases.items():
+            with self.subTest(url=url):
+                self.assertEqual(get_endpoint("GET", url), endpoint)
+
+
+class TestRunMetrics(unittest.TestCase):
+    """Test the RunMetrics class"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "cleanowners.prom")
+
+    def test_get_quantile(self):
+        """Test the nearest-rank quantiles."""
+        values = [float(value) for value in range(1, 101)]
+
+        self.assertEqual(get_quantile(values, 0.5), 50.0)
+        self.assertEqual(get_quantile(values, 0.99), 99.0)
+        self.assertEqual(get_quantile([3.0], 0.9), 3.0)
+
+    def test_write_metrics(self):
+        """Test that every metric family is written in the OpenMetrics format."""
+        metrics = RunMetrics()
+        session = MagicMock(hooks={"response": []})
+        metrics.attach(session)
+        hook = session.hooks["response"][0]
+        hook(
+            make_response("https://api.github.com/repos/org/a/contents/CODEOWNERS", 0.2)
+        )
+        hook(make_response("https://api.github.com/repos/org/b/contents/CODEOWNERS", 3))
+        with metrics.phase("scan"):
+            metrics.record_repository(0.5)
+            metrics.record_repository(1.5)
+        metrics.record_cache("membership", True)
+        metrics.record_cache("membership", False)
+        results = ScanResults()
+        results.add(RepoResult("org/a", "present", owner_counts={"email": 1}))
+        budget = RateLimitBudget()
+        budget.update("core", 5000, 4200, 0)
+
+        metrics.write(self.path, results, budget)
+
+        with open(self.path, encoding="utf-8") as file:
+            written = file.read()
+        self.assertFalse(os.path.exists(f"{self.path}.tmp"))
+        self.assertIn(
+            "# TYPE cleanowners_repositories_with_codeowners gauge\n", written
+        )
+        self.assertIn("cleanowners_repositories_with_codeowners 1\n", written)
+        self.assertIn('cleanowners_owners_not_checked{category="email"} 1\n', written)
+        self.assertIn('cleanowners_phase_duration_seconds{phase="scan"} ', written)
+        endpoint = 'endpoint="GET /repos/{owner}/{repo}/contents"'
+        self.assertIn(
+            f'cleanowners_api_request_duration_seconds_bucket{{{endpoint},le="0.25"}} 1\n',
+            written,
+        )
+        self.assertIn(
+            f'cleanowners_api_request_duration_seconds_bucket{{{endpoint},le="+Inf"}} 2\n',
+            written,
+        )
+        self.assertIn(
+            f"cleanowners_api_request_duration_seconds_sum{{{endpoint}}} 3.2\n",
+            written,
+        )
+        self.assertIn(
+            'cleanowners_rate_limit_remaining{resource="core"} 4200\n', written
+        )
+        self.assertIn('cleanowners_rate_limit_limit{resource="core"} 5000\n', written)
+        self.assertIn('cleanowners_cache_hit_ratio{cache="membership"} 0.5\n', written)
+        self.assertIn(
+            'cleanowners_repository_duration_seconds{quantile="0.5"} 0.5\n', written
+        )
+        self.assertIn("cleanowners_repository_duration_seconds_count 2\n", written)
+        self.assertTrue(written.endswith("# EOF\n"))
+
+    def test_render_without_budget_or_repositories(self):
+        """Test the metrics of a run that processed nothing."""
+        written = RunMetrics().render(ScanResults())
+
+        self.assertNotIn("rate_limit", written)
+        self.assertNotIn('quantile="', written)
+        self.assertIn("cleanowners_repository_duration_seconds_count 0\n", written)
+
+
+if __name__ == "__main__":
+    unittest.main()
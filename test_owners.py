@@ -0,0 +1,99 @@
+"""Test the functions in the owners module."""
+
+import unittest
+
+from owners import (
+    classify_owner,
+    count_owner_categories,
+    get_owner_entries,
+    remove_owners_from_content,
+    remove_usernames_from_content,
+)
+
+
+class TestGetOwnerEntries(unittest.TestCase):
+    """Test the get_owner_entries function in owners.py"""
+
+    def test_get_owner_entries(self):
+        """Test that users and teams are indexed with their line and pattern."""
+        codeowners = (
+            b"# comment @ignored\n"
+            b"\n"
+            b"* @Alice @org/Team\n"
+            b"/docs/ docs@example.com @bob # @not-an-owner\n"
+            b"/empty/\n"
+        )
+
+        self.assertEqual(
+            get_owner_entries(codeowners),
+            [("alice", 3, "*"), ("org/team", 3, "*"), ("bob", 4, "/docs/")],
+        )
+
+
+class TestClassifyOwner(unittest.TestCase):
+    """Test the classification of CODEOWNERS owner tokens in owners.py"""
+
+    def test_classify_owner(self):
+        """Test each category of owner token."""
+        cases = {
+            "@alice": "user",
+            "@Alice-Smith": "user",
+            "@alice_acme": "user",
+            "@" + "a" * 39: "user",
+            "@org/team-name": "team",
+            "@org/team.name": "team",
+            "dev@example.com": "email",
+            "@-alice": "invalid",
+            "@alice-": "invalid",
+            "@al--ice": "invalid",
+            "@" + "a" * 40: "invalid",
+            "@dev@example.com": "invalid",
+            "@org/": "invalid",
+            "@": "invalid",
+            "alice": "invalid",
+        }
+        for token, category in cases.items():
+            with self.subTest(token=token):
+                self.assertEqual(classify_owner(token), category)
+
+    def test_count_owner_categories(self):
+        """Test that the owners that are not checked for membership are counted."""
+        codeowners = (
+            b"* dev@example.com @alice\n"
+            b"/docs/ @bob # reviewed by @carol\n"
+            b"/src/ @bad!name @org/team\n"
+        )
+
+        self.assertEqual(
+            count_owner_categories(codeowners), {"team": 1, "email": 1, "invalid": 1}
+        )
+
+
+class TestRemoveOwnersFromContent(unittest.TestCase):
+    """Test the removal of several owners from CODEOWNERS content"""
+
+    def test_remove_usernames_in_one_pass(self):
+        """Test that every username is removed and prefixes of them are kept."""
+        changed_lines: set[int] = set()
+
+        content = remove_usernames_from_content(
+            b"* @alice @al @bob\n/docs/ @org/team\n/src/ @bob\n",
+            ["alice", "bob"],
+            changed_lines,
+        )
+
+        self.assertEqual(content, b"*  @al \n/docs/ @org/team\n/src/ \n")
+        self.assertEqual(changed_lines, {0, 2})
+
+    def test_remove_owners_from_content(self):
+        """Test that the lines owners were removed from are cleaned up."""
+        self.assertEqual(
+            remove_owners_from_content(
+                b"* @alice  @bob @carol\r\n/docs/  @org/team\n", ["bob", "carol"]
+            ),
+            b"* @alice\r\n/docs/  @org/team\n",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
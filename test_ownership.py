@@ -0,0 +1,262 @@
+"""Test the ownership module and the report of the paths left without owners."""
+
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from cleanowners import ScanContext, process_repo
+from ownership import (
+    OwnershipMatcher,
+    find_unowned_rules,
+    get_rules,
+    get_tree_paths,
+    translate_pattern,
+)
+from results import ScanResults
+
+
+def make_repo(status_code=200, payload=None):
+    """Build a repository whose recursive tree request returns the payload."""
+    repo = MagicMock(
+        full_name="org/repo",
+        url="https://api.github.com/repos/org/repo",
+        default_branch="main",
+        archived=False,
+    )
+    repo.session.get.return_value.status_code = status_code
+    repo.session.get.return_value.json.return_value = payload or {}
+    return repo
+
+
+class TestGetRules(unittest.TestCase):
+    """Test the get_rules function"""
+
+    def test_lists_rules_with_their_owner_count(self):
+        """Test that comments and unsupported patterns are left out."""
+        contents = (
+            b"# comment\n"
+            b"* @alice @org/team # trailing comment\n"
+            b"\n"
+            b"/docs/\n"
+            b"!/negated @bob\n"
+            b"*.[ch] @bob\n"
+            b"@missing-pattern\n"
+        )
+
+        self.assertEqual(get_rules(contents), [(2, "*", 2), (4, "/docs/", 0)])
+
+
+class TestOwnershipMatcher(unittest.TestCase):
+    """Test the OwnershipMatcher class"""
+
+    def test_last_matching_rule_wins(self):
+        """Test the CODEOWNERS pattern semantics documented by GitHub."""
+        matcher = OwnershipMatcher(
+            ["*", "*.js", "/docs/", "docs/*", "build/", "apps/**/test", "/README.md"]
+            + ["**/logs", "src/a?.py"]
+        )
+        cases = {
+            "x.txt": 0,
+            "lib/a.js": 1,
+            "docs/sub/guide.md": 2,
+            "docs/index.md": 3,
+            "x/build/out.o": 4,
+            "build": 0,
+            "apps/a/b/test/case.py": 5,
+            "README.md": 6,
+            "sub/README.md": 0,
+            "deep/logs/x.log": 7,
+            "src/ab.py": 8,
+            "src/abc.py": 0,
+        }
+        for path, rule in cases.items():
+            self.assertEqual(matcher.count_files([path]), {rule: 1}, path)
+
+    def test_root_and_escaped_patterns(self):
+        """Test that / owns every file and escaped characters are literal."""
+        matcher = OwnershipMatcher(["/", "notes\\ file.txt"])
+
+        self.assertEqual(
+            matcher.count_files(["a/b.js", "notes file.txt", "notes"]), {0: 2, 1: 1}
+        )
+
+    def test_unmatched_files_are_counted_separately(self):
+        """Test that files no rule matches are counted under -1."""
+        matcher = OwnershipMatcher(["/src/"])
+
+        self.assertEqual(
+            matcher.count_files(["src/a.py", "src/b/c.py", "README.md"]),
+            {0: 2, -1: 1},
+        )
+
+    def test_translate_pattern(self):
+        """Test the translation of the wildcards."""
+        self.assertEqual(translate_pattern("a/**/b*"), "a/(?:.*/)?b[^/]*")
+        self.assertEqual(translate_pattern("a/**"), "a/.*")
+        self.assertEqual(translate_pattern("a?"), "a[^/]")
+        self.assertEqual(translate_pattern("a\\*"), "a\\*")
+
+    def test_large_trees_are_fast(self):
+        """Test that a tree of 500k files is matched against 400 rules quickly."""
+        shapes = ["/svc{}/", "*.ext{}", "**/mod{}/", "/lib{}/**/*.py"]
+        rules = [shapes[index % 4].format(index) for index in range(400)]
+        paths = [
+            f"svc{i % 400}/pkg{i % 1000}/sub{i % 37}/mod{i % 400}/"
+            f"file{i}.{'py' if i % 2 else f'ext{i % 400}'}"
+            for i in range(500000)
+        ]
+        expected: dict[int, int] = {}
+        for i in range(500000):
+            rule = i % 400
+            if rule % 4 == 3 or (rule % 4 == 1 and i % 2):
+                rule = -1
+            expected[rule] = expected.get(rule, 0) + 1
+
+        start = time.monotonic()
+        counts = OwnershipMatcher(rules).count_files(paths)
+
+        self.assertLess(time.monotonic() - start, 30)
+        self.assertEqual(counts, expected)
+
+    def test_extensions_and_anchored_directories(self):
+        """Test the indexed extension and top directory lookups."""
+        matcher = OwnershipMatcher(["*.gz", "*.tar.gz", "/src/*/test_*.py", "/*/x?"])
+
+        cases = {
+            "a.b.tar.gz": 1,
+            "c.gz": 0,
+            "src/pkg/test_a.py": 2,
+            "src/pkg/sub/test_a.py": -1,
+            "any/xy": 3,
+        }
+        for path, rule in cases.items():
+            self.assertEqual(matcher.count_files([path]), {rule: 1}, path)
+
+
+class TestGetTreePaths(unittest.TestCase):
+    """Test the get_tree_paths function"""
+
+    def test_lists_the_files_of_the_tree(self):
+        """Test that one recursive request lists the blobs of the branch."""
+        repo = make_repo(
+            payload={
+                "tree": [
+                    {"path": "src", "type": "tree"},
+                    {"path": "src/a.py", "type": "blob"},
+                    {"path": "vendor/lib", "type": "commit"},
+                ],
+                "truncated": True,
+            }
+        )
+
+        self.assertEqual(get_tree_paths(repo, "release/1"), (["src/a.py"], True))
+        repo.session.get.assert_called_once_with(
+            "https://api.github.com/repos/org/repo/git/trees/release%2F1",
+            params={"recursive": 1},
+        )
+
+    @patch("builtins.print")
+    def test_failed_request(self, mock_print):
+        """Test that a failed request is reported and returns no paths."""
+        self.assertEqual(get_tree_paths(make_repo(404), "main"), (None, False))
+        mock_print.assert_called_once_with("Unable to list the files of org/repo: 404")
+
+
+class TestFindUnownedRules(unittest.TestCase):
+    """Test the find_unowned_rules function"""
+
+    @patch("builtins.print")
+    def test_reports_the_rules_left_without_owners(self, mock_print):
+        """Test that only emptied rules that still own files are reported."""
+        repo = make_repo(
+            payload={
+                "tree": [
+                    {"path": "docs/a.md", "type": "blob"},
+                    {"path": "src/b.py", "type": "blob"},
+                    {"path": "README.md", "type": "blob"},
+                ],
+                "truncated": True,
+            }
+        )
+        before = b"* @alice\n/docs/ @bob\n/src/ @bob\n/src/ @carol\n"
+        after = b"* @alice\n/docs/\n/src/\n/src/ @carol\n"
+
+        self.assertEqual(
+            find_unowned_rules(repo, before, after), [(2, "/docs/", 1, ["docs/a.md"])]
+        )
+        mock_print.assert_any_call(
+            "\tThe tree of org/repo is truncated, file counts are partial"
+        )
+        mock_print.assert_any_call("\tLine 2 /docs/ leaves 1 files without owners")
+
+    def test_no_tree_request_when_every_rule_keeps_owners(self):
+        """Test that the tree is not fetched when no rule loses its owners."""
+        repo = make_repo()
+
+        self.assertEqual(
+            find_unowned_rules(repo, b"* @alice @bob\n", b"* @alice\n"), []
+        )
+        repo.session.get.assert_not_called()
+
+    @patch("ownership.UNOWNED_PATHS_PER_RULE", 2)
+    @patch("builtins.print")
+    def test_files_are_listed_up_to_the_limit(self, mock_print):
+        """Test that the first files of a rule are listed and the others counted."""
+        repo = make_repo(
+            payload={
+                "tree": [{"path": f"docs/{name}.md", "type": "blob"} for name in "abcd"]
+            }
+        )
+
+        self.assertEqual(
+            find_unowned_rules(repo, b"/docs/ @bob\n", b"/docs/\n"),
+            [(1, "/docs/", 4, ["docs/a.md", "docs/b.md"])],
+        )
+        mock_print.assert_any_call("\t\tdocs/b.md")
+        mock_print.assert_any_call("\t\t...and 2 more files")
+
+    @patch("builtins.print")
+    def test_failed_tree_request(self, _mock_print):
+        """Test that nothing is reported when the tree cannot be listed."""
+        self.assertEqual(find_unowned_rules(make_repo(500), b"* @bob\n", b"*\n"), [])
+
+
+class TestProcessRepoUnownedPaths(unittest.TestCase):
+    """Test the report of the paths left without owners in process_repo"""
+
+    @patch("builtins.print")
+    @patch("cleanowners.commit_changes")
+    def test_dry_run_reports_unowned_paths(self, mock_commit, _mock_print):
+        """Test that a dry run reports the files the change would leave without owners."""
+        membership = MagicMock()
+        membership.is_member.side_effect = lambda org, user: user != "bob"
+        context = ScanContext(
+            github_connection=MagicMock(),
+            membership=membership,
+            results=ScanResults(),
+            budget=None,
+            exempt_repositories_list=[],
+            dry_run=True,
+            pull_request={"title": "Title", "body": "Body", "commit_message": "Msg"},
+            unowned_paths=True,
+        )
+        repo = make_repo(payload={"tree": [{"path": "docs/a.md", "type": "blob"}]})
+        repo.file_contents.return_value = MagicMock(
+            size=24, content="encoded", decoded=b"* @alice\n/docs/ @bob\n", sha="a"
+        )
+
+        result = process_repo(repo, "org", context)
+
+        self.assertEqual(result.usernames_to_remove, ["bob"])
+        self.assertEqual(result.unowned_rules, [(2, "/docs/", 1, ["docs/a.md"])])
+        self.assertFalse(result.eligible_for_pr)
+        mock_commit.assert_not_called()
+        context.results.add(result)
+        self.assertEqual(
+            context.results.repo_and_unowned_rules,
+            {"org/repo": ((2, "/docs/", 1, ["docs/a.md"]),)},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
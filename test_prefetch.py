@@ -0,0 +1,79 @@
+"""Test the RepositoryPrefetcher class of the prefetch module."""
+
+import threading
+import time
+import unittest
+
+from prefetch import RepositoryPrefetcher
+
+
+class FakeListing:  # pylint: disable=too-few-public-methods
+    """A paginated listing that records the page of the last repository."""
+
+    def __init__(self, pages, error=None):
+        self.pages = pages
+        self.error = error
+        self.last_url = None
+
+    def __iter__(self):
+        for page_url, repositories in self.pages:
+            self.last_url = page_url
+            yield from repositories
+        if self.error:
+            raise self.error
+
+
+class TestRepositoryPrefetcher(unittest.TestCase):
+    """Test the RepositoryPrefetcher class"""
+
+    def test_iterates_in_order_with_page_urls(self):
+        """Test that repositories keep their order and the page they came from."""
+        listing = FakeListing([("page=1", ["a", "b"]), ("page=2", ["c"])])
+        seen = []
+
+        with RepositoryPrefetcher(listing, buffer_size=1) as prefetched:
+            for repository in prefetched:
+                seen.append((repository, prefetched.last_url))
+
+        self.assertEqual(seen, [("a", "page=1"), ("b", "page=1"), ("c", "page=2")])
+
+    def test_error_is_raised_by_the_iteration(self):
+        """Test that a listing error reaches the scan."""
+        listing = FakeListing([("page=1", ["a"])], error=ValueError("listing failed"))
+
+        with RepositoryPrefetcher(listing) as prefetched:
+            iterator = iter(prefetched)
+            self.assertEqual(next(iterator), "a")
+            with self.assertRaisesRegex(ValueError, "listing failed"):
+                next(iterator)
+
+    def test_close_stops_a_full_buffer(self):
+        """Test that closing before the end of the listing stops the thread."""
+        threads = threading.active_count()
+        listing = FakeListing([("page=1", [str(index) for index in range(10)])])
+        prefetcher = RepositoryPrefetcher(listing, buffer_size=2)
+
+        self.assertEqual(next(iter(prefetcher)), "0")
+        prefetcher.close()
+
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_buffer_is_bounded(self):
+        """Test that the listing stays at most the buffer size ahead of the scan."""
+        fetched = []
+
+        def listing():
+            for index in range(5):
+                fetched.append(index)
+                yield index
+
+        prefetcher = RepositoryPrefetcher(listing(), buffer_size=2)
+        self.addCleanup(prefetcher.close)
+        time.sleep(0.3)
+
+        # Two buffered repositories and one waiting for room in the buffer
+        self.assertLessEqual(len(fetched), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
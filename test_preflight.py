@@ -0,0 +1,191 @@
+"""Test the preflight module."""
+
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from preflight import (
+    PreflightEstimate,
+    count_repositories,
+    estimate_run,
+    report_preflight,
+)
+from rate_limit import RateLimitBudget
+
+
+def make_budget(remaining, limit=5000):
+    """Build a budget whose refresh reports the given remaining calls."""
+    budget = RateLimitBudget(reserve=50)
+    budget.refresh = lambda _github_connection: budget.update(
+        "core", limit, remaining, 0
+    )
+    return budget
+
+
+class TestCountRepositories(unittest.TestCase):
+    """Test the count_repositories function"""
+
+    @patch("preflight.ORGANIZATIONS_PER_QUERY", 2)
+    @patch("preflight.graphql_query")
+    def test_organizations_are_counted_in_batches(self, mock_query):
+        """Test that organizations are counted with aliased totalCount queries."""
+
+        def answer(_github_connection, _query, variables):
+            return {
+                alias: {"all": {"totalCount": 250}, "active": {"totalCount": 200}}
+                for alias in variables
+            }
+
+        mock_query.side_effect = answer
+
+        counts = count_repositories(MagicMock(), ["org1", "org2", "org3"])
+
+        self.assertEqual(counts, {org: (250, 200) for org in ("org1", "org2", "org3")})
+        self.assertEqual(mock_query.call_count, 2)
+        self.assertIn("repositories(isArchived: false)", mock_query.call_args[0][1])
+
+
+class TestEstimateRun(unittest.TestCase):
+    """Test the estimate_run function"""
+
+    @patch("preflight.count_repositories", return_value={"org": (250, 200)})
+    def test_upper_bounds_without_history(self, _mock_count):
+        """Test that every repository counts a membership check and a pull request."""
+        estimate = estimate_run(MagicMock(), ["org"], [], make_budget(4000))
+
+        self.assertEqual(estimate.repositories, 200)
+        self.assertEqual(estimate.listing_reads, 3)
+        self.assertEqual(estimate.codeowners_reads, 600)
+        self.assertEqual(estimate.membership_reads, 200)
+        self.assertEqual(estimate.pull_requests, 200)
+        self.assertEqual(estimate.reads, 3 + 600 + 200 + 400)
+        self.assertEqual(estimate.writes, 600)
+        self.assertEqual(estimate.remaining, 3950)
+        self.assertTrue(estimate.fits)
+
+    @patch("preflight.count_repositories", return_value={"org": (250, 200)})
+    def test_estimate_from_history_shards_and_snapshots(self, _mock_count):
+        """Test the estimate of a sharded dry run with history and a snapshot."""
+        history = MagicMock()
+        history.latest_run_totals.return_value = (100, 30, 10)
+
+        estimate = estimate_run(
+            MagicMock(),
+            ["org"],
+            [],
+            make_budget(100),
+            exempt_count=10,
+            shard_count=2,
+            dry_run=True,
+            history=history,
+        )
+
+        self.assertEqual(estimate.repositories, 95)
+        self.assertEqual(estimate.membership_reads, 29)
+        self.assertEqual(estimate.pull_requests, 0)
+        self.assertTrue(estimate.from_history)
+        self.assertFalse(estimate.fits)
+
+        estimate = estimate_run(
+            MagicMock(),
+            ["Org"],
+            [],
+            make_budget(100),
+            history=history,
+            snapshot_organizations={"org": MagicMock()},
+        )
+        self.assertEqual(estimate.membership_reads, 0)
+        self.assertEqual(estimate.pull_requests, 20)
+
+    def test_repository_list(self):
+        """Test that a repository list is counted without a query."""
+        estimate = estimate_run(
+            MagicMock(), [], ["org/a", "org/b"], make_budget(5000), dry_run=True
+        )
+
+        self.assertEqual(estimate.repositories, 2)
+        self.assertEqual(estimate.listing_reads, 2)
+        self.assertEqual(estimate.reads, 2 + 6 + 2)
+
+    @patch("preflight.count_repositories", return_value={"org": (100, 100)})
+    def test_options_add_their_calls(self, _mock_count):
+        """Test the calls of CHECK_WRITE_ACCESS, UNOWNED_PATHS and BRANCHES."""
+        budget = make_budget(4000)
+        budget.update("graphql", 5000, 150, 0)
+
+        estimate = estimate_run(
+            MagicMock(),
+            ["org"],
+            [],
+            budget,
+            dry_run=True,
+            check_write_access=True,
+            branches=True,
+            unowned_paths=True,
+        )
+
+        self.assertEqual(estimate.collaborator_reads, 100)
+        self.assertEqual(estimate.tree_reads, 100)
+        self.assertEqual(estimate.reads, 1 + 300 + 100 + 100 + 100)
+        self.assertEqual(estimate.graphql_queries, 200)
+        self.assertEqual(estimate.graphql_remaining, 100)
+        self.assertFalse(estimate.fits)
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            report_preflight(estimate)
+        self.assertIn("100 collaborators, 100 trees", mock_stdout.getvalue())
+        self.assertIn("GraphQL queries for BRANCHES: 200", mock_stdout.getvalue())
+
+        estimate.graphql_remaining = 200
+        self.assertTrue(estimate.fits)
+        estimate.graphql_remaining = None
+        self.assertFalse(estimate.fits)
+
+
+class TestReportPreflight(unittest.TestCase):
+    """Test the report_preflight function"""
+
+    def make_estimate(self, remaining, pull_requests=0):
+        """Build an estimate of 1000 repositories."""
+        return PreflightEstimate(
+            repositories=1000,
+            listing_reads=10,
+            codeowners_reads=3000,
+            membership_reads=500,
+            pull_requests=pull_requests,
+            remaining=remaining,
+            limit=5000,
+        )
+
+    def test_run_fits(self):
+        """Test the report of a run that fits in the budget."""
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertTrue(report_preflight(self.make_estimate(4000)))
+
+        self.assertIn("The run fits", mock_stdout.getvalue())
+        self.assertIn(
+            "estimated from one handle and one pull request per repository, "
+            "membership checks may be higher",
+            mock_stdout.getvalue(),
+        )
+
+    def test_run_does_not_fit(self):
+        """Test the report of a run that needs more than the remaining budget."""
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertFalse(report_preflight(self.make_estimate(3000, 200)))
+
+        output = mock_stdout.getvalue()
+        self.assertIn("does not fit", output)
+        self.assertIn("about 1 hours of rate limit", output)
+        self.assertIn("secondary rate limit on content creation", output)
+
+    def test_unknown_budget_does_not_fit(self):
+        """Test that a run with API calls does not fit an unknown budget."""
+        estimate = self.make_estimate(None)
+        estimate.limit = None
+
+        with patch("sys.stdout", new_callable=StringIO):
+            self.assertFalse(report_preflight(estimate))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Test the priority module."""
+
+import unittest
+from unittest.mock import MagicMock
+
+from priority import get_pushed_at, prioritize
+
+
+def make_repo(full_name, pushed_at=None):
+    """Build a repository as returned by the organization listing."""
+    repo = MagicMock()
+    repo.full_name = full_name
+    repo.as_dict.return_value = {"pushed_at": pushed_at}
+    return repo
+
+
+def names(repos):
+    """Return the full names of repositories."""
+    return [repo.full_name for repo in repos]
+
+
+class TestPrioritize(unittest.TestCase):
+    """Test the prioritize function"""
+
+    def setUp(self):
+        self.repos = [
+            make_repo("org/a", "2024-01-01T00:00:00Z"),
+            make_repo("org/b", "2024-03-01T00:00:00Z"),
+            make_repo("org/c"),
+        ]
+        self.history = MagicMock()
+        self.history.deferred_repos.return_value = []
+        self.history.last_scanned.return_value = {
+            "org/a": "2024-02-01T00:00:00+00:00",
+            "org/b": "2024-01-01T00:00:00+00:00",
+        }
+        self.history.last_handle_counts.return_value = {"org/a": 2, "org/c": 5}
+
+    def test_recently_pushed_first(self):
+        """Test that the most recently pushed repositories come first."""
+        self.assertEqual(
+            names(prioritize(iter(self.repos), "pushed")), ["org/b", "org/a", "org/c"]
+        )
+
+    def test_longest_unscanned_first(self):
+        """Test that repositories never or least recently scanned come first."""
+        self.assertEqual(
+            names(prioritize(self.repos, "stale", self.history)),
+            ["org/c", "org/b", "org/a"],
+        )
+
+    def test_most_handles_first(self):
+        """Test that repositories with the most handles last time come first."""
+        self.assertEqual(
+            names(prioritize(self.repos, "handles", self.history)),
+            ["org/c", "org/a", "org/b"],
+        )
+
+    def test_deferred_repositories_first(self):
+        """Test that the repositories deferred by the previous run come first."""
+        self.history.deferred_repos.return_value = ["org/a", "org/gone", "org/c"]
+
+        self.assertEqual(
+            names(prioritize(self.repos, "pushed", self.history)),
+            ["org/a", "org/c", "org/b"],
+        )
+
+    def test_get_pushed_at_without_data(self):
+        """Test that repositories without a push time sort last."""
+        self.assertEqual(get_pushed_at(object()), "")
+        self.assertEqual(get_pushed_at(make_repo("org/a", 1)), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Test the RateLimitBudget class in the rate_limit module."""
+
+import unittest
+from unittest.mock import MagicMock
+
+from rate_limit import RateLimitBudget
+
+
+class TestRateLimitBudget(unittest.TestCase):
+    """Test the RateLimitBudget class"""
+
+    def test_unknown_budget_is_not_exhausted(self):
+        """Test that a budget without data is neither known nor exhausted."""
+        budget = RateLimitBudget()
+
+        self.assertIsNone(budget.remaining())
+        self.assertFalse(budget.exhausted())
+
+    def test_response_hook_updates_budget(self):
+        """Test that the response hook records the rate limit headers."""
+        budget = RateLimitBudget(reserve=10)
+        session = MagicMock()
+        session.hooks = {"response": []}
+        budget.attach(session)
+        response = MagicMock()
+        response.headers = {
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "10",
+            "X-RateLimit-Reset": "1700000000",
+            "X-RateLimit-Resource": "core",
+        }
+
+        result = session.hooks["response"][0](response)
+
+        self.assertEqual(result, response)
+        self.assertEqual(budget.remaining(), 10)
+        self.assertTrue(budget.exhausted())
+
+    def test_response_hook_ignores_missing_or_invalid_headers(self):
+        """Test that responses without valid rate limit headers are ignored."""
+        budget = RateLimitBudget()
+        session = MagicMock()
+        session.hooks = {"response": []}
+        budget.attach(session)
+        without_headers = MagicMock(headers={})
+        invalid_headers = MagicMock(headers={"X-RateLimit-Remaining": "many"})
+
+        session.hooks["response"][0](without_headers)
+        session.hooks["response"][0](invalid_headers)
+
+        self.assertIsNone(budget.remaining())
+
+    def test_refresh_loads_every_resource(self):
+        """Test that refresh reads the budget of every resource from /rate_limit."""
+        budget = RateLimitBudget(reserve=0)
+        github_connection = MagicMock()
+        github_connection.rate_limit.return_value = {
+            "resources": {
+                "core": {"limit": 5000, "remaining": 4000, "reset": 1},
+                "graphql": {"limit": 5000, "remaining": 0, "reset": 1},
+            }
+        }
+
+        budget.refresh(github_connection)
+
+        self.assertEqual(budget.remaining("core"), 4000)
+        self.assertEqual(budget.limit("core"), 5000)
+        self.assertIsNone(budget.limit("search"))
+        self.assertFalse(budget.exhausted("core"))
+        self.assertTrue(budget.exhausted("graphql"))
+
+
+if __name__ == "__main__":
+    unittest.main()
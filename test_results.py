@@ -0,0 +1,59 @@
+"""Test the classes in the results module."""
+
+import unittest
+
+from results import RepoResult, ScanResults
+
+
+class TestScanResults(unittest.TestCase):
+    """Test the ScanResults class in results.py"""
+
+    def test_add_aggregates_results(self):
+        """Test that results are added to the consolidated totals."""
+        results = ScanResults()
+        results.add(
+            RepoResult(
+                "org/repo1",
+                "present",
+                "CODEOWNERS",
+                ["alice", "bob"],
+                eligible_for_pr=True,
+                pull_request_url="https://github.com/org/repo1/pull/1",
+                owner_counts={"team": 1, "email": 2, "invalid": 0},
+                outside_collaborators=["bob"],
+                unowned_rules=[(3, "/docs/", 12, ["docs/a.md"])],
+            )
+        )
+        results.add(RepoResult("org/repo2", "missing", eligible_for_pr=True))
+        results.add_error("boom")
+
+        self.assertEqual(
+            results.counts,
+            {
+                "pull_count": 1,
+                "eligble_for_pr_count": 2,
+                "no_codeowners_count": 1,
+                "codeowners_count": 1,
+                "users_count": 2,
+            },
+        )
+        self.assertEqual(results.owner_counts, {"team": 1, "email": 2, "invalid": 0})
+        self.assertEqual(
+            results.repo_and_users_to_remove, {"org/repo1": ("alice", "bob")}
+        )
+        self.assertEqual(
+            results.repo_and_outside_collaborators, {"org/repo1": ("bob",)}
+        )
+        self.assertEqual(
+            results.repo_and_unowned_rules,
+            {"org/repo1": ((3, "/docs/", 12, ["docs/a.md"]),)},
+        )
+        self.assertEqual(results.repos_missing_codeowners, ["org/repo2"])
+        self.assertEqual(
+            results.pull_request_urls, ["https://github.com/org/repo1/pull/1"]
+        )
+        self.assertEqual(results.errors, ["boom"])
+
+
+if __name__ == "__main__":
+    unittest.main()
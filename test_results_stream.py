@@ -0,0 +1,94 @@
+"""Test the ResultsStream class and read_results_stream function."""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from results import RepoResult, ScanResults
+from results_stream import ResultsStream, read_results_stream
+
+
+class TestResultsStream(unittest.TestCase):
+    """Test the ResultsStream class and read_results_stream function"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "results.ndjson")
+
+    def test_records_are_readable_before_close(self):
+        """Test that each record is flushed as soon as it is written."""
+        stream = ResultsStream(self.path)
+        self.addCleanup(stream.close)
+
+        stream.write(RepoResult("org/repo1", "missing"))
+
+        with open(self.path, "r", encoding="utf-8") as file:
+            self.assertEqual(len(file.readlines()), 1)
+
+    def test_round_trip(self):
+        """Test that the results can be rebuilt from the stream."""
+        stream = ResultsStream(self.path)
+        stream.write(RepoResult("org/repo1", "missing"))
+        stream.write(
+            RepoResult("org/repo2", "present", "CODEOWNERS", ["alice"], True, "url")
+        )
+        stream.close()
+
+        results = read_results_stream(self.path)
+
+        self.assertEqual(results.repos_missing_codeowners, ["org/repo1"])
+        self.assertEqual(results.repo_and_users_to_remove, {"org/repo2": ("alice",)})
+        self.assertEqual(results.counts["pull_count"], 1)
+
+    def test_append_keeps_previous_records(self):
+        """Test that a resumed run appends to the existing stream."""
+        stream = ResultsStream(self.path)
+        stream.write(RepoResult("org/repo1", "missing"))
+        stream.close()
+        stream = ResultsStream(self.path, append=True)
+        stream.write(RepoResult("org/repo2", "missing"))
+        stream.close()
+
+        results = ScanResults()
+        read_results_stream(self.path, results)
+
+        self.assertEqual(results.repos_missing_codeowners, ["org/repo1", "org/repo2"])
+
+    def test_last_record_of_a_repository_wins(self):
+        """Test that repositories processed again after a resume are counted once."""
+        stream = ResultsStream(self.path)
+        stream.write(RepoResult("org/repo1", "present", "CODEOWNERS", ["bob"], True))
+        stream.write(RepoResult("org/repo2", "missing"))
+        stream.close()
+        stream = ResultsStream(self.path, append=True)
+        stream.write(
+            RepoResult("org/repo1", "present", "CODEOWNERS", ["bob"], True, "url")
+        )
+        stream.close()
+
+        results = read_results_stream(self.path)
+
+        self.assertEqual(results.counts["codeowners_count"], 1)
+        self.assertEqual(results.counts["eligble_for_pr_count"], 1)
+        self.assertEqual(results.counts["pull_count"], 1)
+        self.assertEqual(results.repo_and_users_to_remove, {"org/repo1": ("bob",)})
+        self.assertEqual(results.repos_missing_codeowners, ["org/repo2"])
+
+    def test_incomplete_record_is_ignored(self):
+        """Test that a record cut short by a crash is ignored."""
+        stream = ResultsStream(self.path)
+        stream.write(RepoResult("org/repo1", "missing"))
+        stream.close()
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write('{"repo": "org/repo2", "sta')
+
+        with patch("sys.stdout"):
+            results = read_results_stream(self.path)
+
+        self.assertEqual(results.repos_missing_codeowners, ["org/repo1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
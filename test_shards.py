@@ -0,0 +1,177 @@
+"""Test the functions in the shards module."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from results import RepoResult, ScanResults
+from shards import (
+    get_partial_results_path,
+    get_shard,
+    in_shard,
+    merge_partial_results,
+    write_partial_results,
+)
+
+
+class TestGetShard(unittest.TestCase):
+    """Test the get_shard and in_shard functions"""
+
+    def test_get_shard_is_stable(self):
+        """Test that the shard only depends on the case insensitive full name."""
+        self.assertEqual(get_shard("org/repo", 7), get_shard("ORG/Repo", 7))
+        self.assertEqual(get_shard("org/repo", 7), 4)
+
+    def test_every_repository_belongs_to_exactly_one_shard(self):
+        """Test that shards partition the repositories."""
+        names = [f"org/repo{i}" for i in range(200)]
+        owners = [
+            [shard for shard in range(4) if in_shard(name, shard, 4)] for name in names
+        ]
+
+        self.assertTrue(all(len(owner) == 1 for owner in owners))
+        self.assertEqual({owner[0] for owner in owners}, {0, 1, 2, 3})
+
+    def test_in_shard_without_sharding(self):
+        """Test that every repository belongs to a single shard run."""
+        self.assertTrue(in_shard("org/repo", 0, 1))
+
+    def test_get_partial_results_path(self):
+        """Test the file name of the partial results."""
+        self.assertEqual(
+            get_partial_results_path(1, 3), "cleanowners-shard-1-of-3.json"
+        )
+
+
+class TestPartialResults(unittest.TestCase):
+    """Test the write_partial_results and merge_partial_results functions"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir
+
+    def write_shard(
+        self, shard_index, shard_count, full_name, errors=(), stop_reason=None
+    ):
+        """Write the partial results of a shard with a single repository."""
+        results = ScanResults()
+        results.add(
+            RepoResult(
+                full_name,
+                "present",
+                "CODEOWNERS",
+                ["alice"],
+                eligible_for_pr=True,
+                pull_request_url=f"https://github.com/{full_name}/pull/1",
+                owner_counts={"team": 1, "email": 0, "invalid": 2},
+                outside_collaborators=["bob"],
+                unowned_rules=[(3, "/docs/", 12, ["docs/a.md"])],
+            )
+        )
+        results.add(RepoResult(f"{full_name}-empty", "empty"))
+        for error in errors:
+            results.add_error(error)
+        if stop_reason:
+            results.stop(stop_reason)
+        path = os.path.join(self.tmpdir.name, f"shard-{shard_index}.json")
+        write_partial_results(path, results, shard_index, shard_count)
+        return path
+
+    def test_merge_partial_results(self):
+        """Test that the partial results of every shard are combined."""
+        paths = [
+            self.write_shard(0, 2, "org/repo0"),
+            self.write_shard(1, 2, "org/repo1", errors=["boom"]),
+        ]
+
+        merged = merge_partial_results(paths)
+
+        self.assertEqual(
+            merged.counts,
+            {
+                "pull_count": 2,
+                "eligble_for_pr_count": 2,
+                "no_codeowners_count": 2,
+                "codeowners_count": 2,
+                "users_count": 2,
+            },
+        )
+        self.assertEqual(
+            merged.repo_and_users_to_remove,
+            {"org/repo0": ("alice",), "org/repo1": ("alice",)},
+        )
+        self.assertEqual(
+            merged.repos_missing_codeowners, ["org/repo0-empty", "org/repo1-empty"]
+        )
+        self.assertEqual(len(merged.pull_request_urls), 2)
+        self.assertEqual(merged.owner_counts, {"team": 2, "email": 0, "invalid": 4})
+        self.assertEqual(
+            merged.repo_and_outside_collaborators,
+            {"org/repo0": ("bob",), "org/repo1": ("bob",)},
+        )
+        self.assertEqual(
+            merged.repo_and_unowned_rules["org/repo1"],
+            ((3, "/docs/", 12, ["docs/a.md"]),),
+        )
+        self.assertEqual(merged.errors, ["boom"])
+        self.assertIsNone(merged.stop_reason)
+
+    def test_merge_partial_results_keeps_stop_reasons(self):
+        """Test that a shard stopped before the end leaves the merged run partial."""
+        paths = [
+            self.write_shard(0, 3, "org/repo0", stop_reason="MAX_RUNTIME was reached"),
+            self.write_shard(1, 3, "org/repo1"),
+            self.write_shard(
+                2, 3, "org/repo2", stop_reason="rate limit budget exhausted"
+            ),
+        ]
+
+        merged = merge_partial_results(paths)
+
+        self.assertEqual(
+            merged.stop_reason,
+            "shard 0: MAX_RUNTIME was reached; shard 2: rate limit budget exhausted",
+        )
+
+    def test_merge_partial_results_reports_missing_shards(self):
+        """Test that missing shards are reported as an error."""
+        merged = merge_partial_results([self.write_shard(1, 3, "org/repo")])
+
+        self.assertEqual(
+            merged.errors, ["Partial results are missing for shards [0, 2]"]
+        )
+
+    def test_merge_partial_results_rejects_duplicate_shards(self):
+        """Test that the same shard cannot be merged twice."""
+        path = self.write_shard(0, 2, "org/repo")
+        copy = os.path.join(self.tmpdir.name, "copy.json")
+        with (
+            open(path, "r", encoding="utf-8") as src,
+            open(copy, "w", encoding="utf-8") as dst,
+        ):
+            dst.write(src.read())
+
+        with self.assertRaises(ValueError):
+            merge_partial_results([path, copy])
+
+    def test_merge_partial_results_rejects_different_shard_counts(self):
+        """Test that shards of different runs cannot be merged."""
+        paths = [self.write_shard(0, 2, "org/a"), self.write_shard(1, 3, "org/b")]
+
+        with self.assertRaises(ValueError):
+            merge_partial_results(paths)
+
+    def test_merge_partial_results_rejects_unknown_files(self):
+        """Test that files that are not partial results are rejected."""
+        path = os.path.join(self.tmpdir.name, "other.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"hello": "world"}, file)
+
+        with self.assertRaises(ValueError):
+            merge_partial_results([path])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+"""Test the token_pool module."""
+
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import requests
+from github3.session import TokenAuth
+from rate_limit import RateLimitBudget
+from token_pool import (
+    Credential,
+    TokenPool,
+    build_token_pool,
+    get_resource,
+    get_target,
+)
+
+
+def make_response(request, remaining, resource="core"):
+    """Build a response to a request with rate limit headers."""
+    response = MagicMock()
+    response.request = request
+    response.headers = {
+        "X-RateLimit-Limit": "5000",
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": "0",
+        "X-RateLimit-Resource": resource,
+    }
+    return response
+
+
+def make_request(url="https://api.github.com/orgs/org/repos"):
+    """Build a prepared request without authentication."""
+    return requests.Request("GET", url).prepare()
+
+
+class TestTokenPool(unittest.TestCase):
+    """Test the TokenPool class"""
+
+    def setUp(self):
+        self.credentials = [
+            Credential(f"token {index}", TokenAuth(f"token{index}"), RateLimitBudget())
+            for index in range(3)
+        ]
+        self.pool = TokenPool(self.credentials)
+
+    def test_get_resource(self):
+        """Test that requests are attributed to their rate limit resource."""
+        self.assertEqual(get_resource("https://api.github.com/graphql"), "graphql")
+        self.assertEqual(get_resource("https://api.github.com/search/code"), "search")
+        self.assertEqual(get_resource("https://api.github.com/orgs/org"), "core")
+
+    def test_get_target(self):
+        """Test that the owner and repository of requests are recognised."""
+        cases = {
+            "https://api.github.com/repos/Org/Repo/git/refs": ("Org", "org/repo"),
+            "https://ghe.example.com/api/v3/repos/org/a/pulls": ("org", "org/a"),
+            "https://api.github.com/orgs/org/members/alice": ("org", None),
+            "https://api.github.com/search/code?q=%22%40alice%22+org%3Aorg-1": (
+                "org-1",
+                None,
+            ),
+            "https://api.github.com/rate_limit": (None, None),
+        }
+        for url, target in cases.items():
+            self.assertEqual(get_target(make_request(url)), target, url)
+        graphql = "https://api.github.com/graphql"
+        request = requests.Request(
+            "POST", graphql, json={"variables": {"owner": "org", "name": "a"}}
+        ).prepare()
+        self.assertEqual(get_target(request), ("org", "org/a"))
+        request = requests.Request(
+            "POST", graphql, json={"variables": {"slug": "enterprise"}}
+        ).prepare()
+        self.assertEqual(get_target(request), (None, None))
+
+    def test_requests_of_a_repository_share_a_credential(self):
+        """Test that a repository keeps its credential until it reaches its reserve."""
+        for credential in self.credentials:
+            credential.budget.update("core", 5000, 5000, 0)
+        url = "https://api.github.com/repos/org/a/git/refs"
+
+        first = self.pool(make_request(url))
+        self.credentials[0].budget.update("core", 5000, 1000, 0)
+        second = self.pool(make_request("https://api.github.com/repos/org/a/pulls"))
+        other = self.pool(make_request("https://api.github.com/repos/org/b/pulls"))
+        self.credentials[0].budget.update("core", 5000, 10, 0)
+        third = self.pool(make_request(url))
+
+        self.assertEqual(first.headers["Authorization"], "token token0")
+        self.assertEqual(second.headers["Authorization"], "token token0")
+        self.assertEqual(other.headers["Authorization"], "token token1")
+        self.assertEqual(third.headers["Authorization"], "token token1")
+
+    def test_installations_only_serve_their_account(self):
+        """Test that installations are never used for another owner."""
+        credentials = [
+            Credential("token", TokenAuth("token"), RateLimitBudget()),
+            Credential("installation 1", TokenAuth("org1"), RateLimitBudget(), "Org1"),
+            Credential("installation 2", TokenAuth("org2"), RateLimitBudget(), "org2"),
+        ]
+        credentials[0].budget.update("core", 5000, 100, 0)
+        pool = TokenPool(credentials)
+
+        self.assertIs(pool.pick("core", "org1"), credentials[1])
+        self.assertIs(pool.pick("core", "org2"), credentials[2])
+        self.assertIs(pool.pick("core", "other"), credentials[0])
+        self.assertIs(pool.pick("core"), credentials[0])
+        self.assertIs(TokenPool(credentials[1:]).pick("core", "other"), credentials[1])
+
+    def test_requests_use_the_credential_with_most_budget(self):
+        """Test that each request is authenticated with the fullest bucket."""
+        self.credentials[0].budget.update("core", 5000, 100, 0)
+        self.credentials[1].budget.update("core", 5000, 4000, 0)
+        self.credentials[2].budget.update("core", 5000, 2000, 0)
+
+        request = self.pool(make_request())
+
+        self.assertEqual(request.headers["Authorization"], "token token1")
+
+    def test_unused_credentials_are_tried_first(self):
+        """Test that a credential without a known budget is picked first."""
+        self.credentials[0].budget.update("core", 5000, 5000, 0)
+        self.credentials[1].budget.update("core", 5000, 5000, 0)
+
+        self.assertIs(self.pool.pick(), self.credentials[2])
+
+    def test_responses_update_the_bucket_of_their_credential(self):
+        """Test that every credential tracks its own rate limit."""
+        session = requests.Session()
+        self.pool.attach(session)
+        self.assertIs(session.auth, self.pool)
+        for credential in self.credentials:
+            credential.budget.update("core", 5000, 5000, 0)
+
+        first = self.pool(make_request())
+        session.hooks["response"][0](make_response(first, 10))
+        second = self.pool(make_request())
+        session.hooks["response"][0](make_response(second, 20))
+        session.hooks["response"][0](make_response(make_request(), 1))
+
+        self.assertEqual(self.credentials[0].budget.remaining(), 10)
+        self.assertEqual(self.credentials[1].budget.remaining(), 20)
+        self.assertEqual(self.pool.remaining(), 5030)
+        self.assertEqual(self.pool.limit(), 15000)
+
+    def test_budget_is_combined(self):
+        """Test that the pool is exhausted only when every credential is."""
+        self.assertIsNone(self.pool.remaining())
+        self.assertIsNone(self.pool.limit())
+        self.assertFalse(self.pool.exhausted())
+        self.assertEqual(self.pool.reserve, 150)
+
+        for credential in self.credentials[:2]:
+            credential.budget.update("core", 5000, 0, 0)
+        self.assertFalse(self.pool.exhausted())
+
+        self.credentials[2].budget.update("core", 5000, 10, 0)
+        self.assertTrue(self.pool.exhausted())
+
+    def test_refresh_reads_every_credential(self):
+        """Test that the budget of each credential is read with its own authentication."""
+        github_connection = MagicMock()
+        github_connection.session.base_url = "https://api.github.com"
+
+        def get(_url, auth):
+            response = MagicMock(status_code=200 if auth.token != "token2" else 401)
+            response.json.return_value = {
+                "resources": {
+                    "core": {"limit": 5000, "remaining": len(auth.token), "reset": 0}
+                }
+            }
+            return response
+
+        github_connection.session.get.side_effect = get
+
+        self.pool.refresh(github_connection)
+
+        self.assertEqual(self.pool.remaining(), 12)
+        self.assertIsNone(self.credentials[2].budget.remaining())
+
+
+class TestBuildTokenPool(unittest.TestCase):
+    """Test the build_token_pool function"""
+
+    @patch("token_pool.auth.get_installation_account")
+    @patch("token_pool.auth.auth_to_github")
+    def test_tokens_and_installations(self, mock_auth, mock_account):
+        """Test that every token and installation becomes a credential."""
+        mock_auth.side_effect = lambda token, app_id, installation_id, *_args: (
+            MagicMock(session=MagicMock(auth=token or installation_id))
+        )
+        mock_account.side_effect = lambda app_id, installation_id, *_args: (
+            f"org{installation_id}"
+        )
+
+        with patch("sys.stdout", new_callable=StringIO):
+            pool = build_token_pool(["a", "b"], 1, [11, 12], b"key", "", False)
+
+        self.assertEqual(
+            [credential.name for credential in pool.credentials],
+            ["token 1", "token 2", "installation 11", "installation 12"],
+        )
+        self.assertEqual(
+            [credential.auth for credential in pool.credentials], ["a", "b", 11, 12]
+        )
+        self.assertEqual(
+            [credential.owner for credential in pool.credentials],
+            [None, None, "org11", "org12"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
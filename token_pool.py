@@ -0,0 +1,226 @@
+"""Spread the requests of a run across several credentials and their rate limits."""
+
+import json
+import re
+import threading
+from dataclasses import dataclass
+from urllib.parse import unquote_plus, urlsplit
+
+import auth
+from rate_limit import DEFAULT_RATE_LIMIT_RESERVE, RateLimitBudget
+
+
+def get_resource(url: str) -> str:
+    """Return the rate limit resource a request to an API URL counts against."""
+    if url.rstrip("/").endswith("/graphql"):
+        return "graphql"
+    if "/search/" in url:
+        return "search"
+    return "core"
+
+
+REPOSITORY_PATH = re.compile(r"/repos/([^/]+)/([^/]+)")
+ORGANIZATION_PATH = re.compile(r"/orgs/([^/]+)")
+SEARCH_ORGANIZATION = re.compile(r"\borg:([\w.-]+)")
+
+
+def get_target(request) -> tuple[str | None, str | None]:
+    """
+    Return the owner a request is made for and the repository it belongs to.
+
+    REST requests are read from their path, GraphQL queries from their owner
+    and name variables and code searches from their org: qualifier.
+
+    Returns:
+        tuple: the owner and the lowercase owner/name of the repository,
+        each None when the request does not name one
+    """
+    url = urlsplit(request.url or "")
+    found = REPOSITORY_PATH.search(url.path)
+    if found:
+        return found.group(1), f"{found.group(1)}/{found.group(2)}".lower()
+    found = ORGANIZATION_PATH.search(url.path)
+    if found:
+        return found.group(1), None
+    if url.path.rstrip("/").endswith("/graphql") and request.body:
+        variables = json.loads(request.body).get("variables") or {}
+        owner, name = variables.get("owner"), variables.get("name")
+        return owner, f"{owner}/{name}".lower() if owner and name else None
+    found = SEARCH_ORGANIZATION.search(unquote_plus(url.query))
+    return (found.group(1) if found else None), None
+
+
+@dataclass
+class Credential:
+    """A token or GitHub App installation with its own rate limit bucket"""
+
+    name: str
+    auth: object
+    budget: RateLimitBudget
+    # The account a GitHub App is installed on, None for tokens that reach any owner
+    owner: str | None = None
+
+
+class TokenPool(RateLimitBudget):
+    """
+    Authenticate each request with a credential that can reach its owner.
+
+    The pool replaces the authentication of a session and tracks the rate
+    limit of every credential separately from the headers of its responses.
+    Installations only serve the account they are installed on. Every
+    request for a repository uses the credential picked for its first
+    request, so the reads, commits and pull request of a repository share
+    one identity. The credential of a repository is only replaced once it
+    reaches its reserve. As a budget, the pool reports the combined
+    remaining calls of all credentials and is only exhausted once every
+    credential is.
+    """
+
+    def __init__(self, credentials, reserve: int = DEFAULT_RATE_LIMIT_RESERVE):
+        super().__init__(reserve * len(credentials))
+        self.credentials = credentials
+        self._by_header: dict[str, Credential] = {}
+        self._by_repository: dict[str, Credential] = {}
+        self._pool_lock = threading.Lock()
+
+    def attach(self, session) -> None:
+        """Authenticate the requests of a session through the pool."""
+        session.auth = self
+        session.hooks["response"].append(self.record_response)
+
+    def pick(self, resource: str = "core", owner: str | None = None) -> Credential:
+        """
+        Return the credential with the most remaining calls of a resource for an owner.
+
+        Tokens serve every owner and installations only their own account.
+        Requests without a known owner go to the tokens. When no credential
+        of the pool matches, any credential is picked.
+        """
+
+        def remaining(credential):
+            value = credential.budget.remaining(resource)
+            # Credentials that were not used yet are tried first
+            return float("inf") if value is None else value
+
+        candidates = [
+            credential
+            for credential in self.credentials
+            if credential.owner is None
+            or (owner and credential.owner.lower() == owner.lower())
+        ]
+        return max(candidates or self.credentials, key=remaining)
+
+    def __call__(self, request):
+        resource = get_resource(request.url or "")
+        owner, repository = get_target(request)
+        with self._pool_lock:
+            credential = self._by_repository.get(repository or "")
+        if credential is None or credential.budget.exhausted(resource):
+            credential = self.pick(resource, owner)
+            if repository:
+                with self._pool_lock:
+                    self._by_repository[repository] = credential
+        request = credential.auth(request)
+        with self._pool_lock:
+            self._by_header[request.headers.get("Authorization", "")] = credential
+        return request
+
+    def record_response(self, response, *_args, **_kwargs):
+        """Update the budget of the credential that made a request."""
+        with self._pool_lock:
+            credential = self._by_header.get(
+                response.request.headers.get("Authorization", "")
+            )
+        if credential:
+            credential.budget.record_response(response)
+        return response
+
+    def refresh(self, github_connection) -> None:
+        """Load the current budget of every credential from the /rate_limit endpoint."""
+        session = github_connection.session
+        for credential in self.credentials:
+            response = session.get(
+                f"{session.base_url}/rate_limit", auth=credential.auth
+            )
+            if response.status_code == 200:
+                for resource, values in response.json()["resources"].items():
+                    credential.budget.update(
+                        resource, values["limit"], values["remaining"], values["reset"]
+                    )
+
+    def remaining(self, resource: str = "core") -> int | None:
+        """Return the remaining calls of every credential combined."""
+        values = [
+            credential.budget.remaining(resource) for credential in self.credentials
+        ]
+        known = [value for value in values if value is not None]
+        return sum(known) if known else None
+
+    def limit(self, resource: str = "core") -> int | None:
+        """Return the hourly limit of every credential combined."""
+        values = [credential.budget.limit(resource) for credential in self.credentials]
+        known = [value for value in values if value is not None]
+        return sum(known) if known else None
+
+    def exhausted(self, resource: str = "core") -> bool:
+        """Return True once the budget of every credential reached its reserve."""
+        return all(
+            credential.budget.exhausted(resource) for credential in self.credentials
+        )
+
+
+def build_token_pool(
+    token_list: list[str],
+    gh_app_id: int | None,
+    gh_app_installation_id_list: list[int],
+    gh_app_private_key_bytes: bytes,
+    ghe: str,
+    gh_app_enterprise_only: bool,
+) -> TokenPool:
+    """
+    Authenticate every token and GitHub App installation of a pool.
+
+    Every token must be able to read the repositories of the run. The account
+    of each installation is looked up so that it only serves that account.
+
+    Returns:
+        TokenPool: the pool of credentials
+    """
+    credentials = []
+    for index, token in enumerate(token_list):
+        github_connection = auth.auth_to_github(
+            token, None, None, b"", ghe, gh_app_enterprise_only
+        )
+        credentials.append(
+            Credential(
+                f"token {index + 1}",
+                github_connection.session.auth,
+                RateLimitBudget(),
+            )
+        )
+    if gh_app_id and gh_app_private_key_bytes:
+        for installation_id in gh_app_installation_id_list:
+            github_connection = auth.auth_to_github(
+                "",
+                gh_app_id,
+                installation_id,
+                gh_app_private_key_bytes,
+                ghe,
+                gh_app_enterprise_only,
+            )
+            credentials.append(
+                Credential(
+                    f"installation {installation_id}",
+                    github_connection.session.auth,
+                    RateLimitBudget(),
+                    auth.get_installation_account(
+                        gh_app_id,
+                        installation_id,
+                        gh_app_private_key_bytes,
+                        ghe,
+                        gh_app_enterprise_only,
+                    ),
+                )
+            )
+    print(f"Spreading requests across a pool of {len(credentials)} credentials")
+    return TokenPool(credentials)